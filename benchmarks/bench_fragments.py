@@ -0,0 +1,85 @@
+"""
+Rerun cost per condition click: wall time and websocket bytes.
+
+Starts the app under a real Streamlit server, opens one condition section
+and toggles one of its checkboxes repeatedly, recording how long each rerun
+takes, how much server CPU it burns and how many bytes the server sends
+back. Pass several app paths
+(e.g. a copy of app.py from before a change) to compare them.
+
+Usage:
+    python benchmarks/bench_fragments.py [app.py ...] [--clicks N] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+
+from st_client import (
+    REPO_ROOT,
+    connected_client,
+    free_port,
+    process_cpu_seconds,
+    start_server,
+    stop_server,
+)
+
+SECTION_KEY = "section:Cardiovascular disease"
+CHECKBOX_KEY = "cond:AF"
+
+
+async def measure_clicks(port: int, pid: int, clicks: int) -> dict:
+    client = await connected_client(port)
+    try:
+        await client.set_widget(SECTION_KEY, True)
+        cpu_before = process_cpu_seconds(pid)
+        results = [
+            await client.set_widget(CHECKBOX_KEY, i % 2 == 0) for i in range(clicks)
+        ]
+        cpu_after = process_cpu_seconds(pid)
+    finally:
+        client.close()
+    times_ms = [r.seconds * 1000 for r in results]
+    cpu_ms = None
+    if cpu_before is not None and cpu_after is not None:
+        cpu_ms = (cpu_after - cpu_before) * 1000 / clicks
+    return {
+        "clicks": clicks,
+        "fragment_run": results[0].fragment_run,
+        "median_ms": statistics.median(times_ms),
+        "mean_ms": statistics.fmean(times_ms),
+        "mean_bytes": statistics.fmean(r.bytes_received for r in results),
+        "mean_deltas": statistics.fmean(r.deltas for r in results),
+        "server_cpu_ms": cpu_ms,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure rerun cost per checkbox click.")
+    parser.add_argument("apps", nargs="*", default=[str(REPO_ROOT / "app.py")])
+    parser.add_argument("--clicks", type=int, default=60)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args(argv)
+
+    report = {}
+    for app in args.apps:
+        port = free_port()
+        proc = start_server(app, port)
+        try:
+            report[app] = stats = asyncio.run(measure_clicks(port, proc.pid, args.clicks))
+        finally:
+            stop_server(proc)
+        print(f"{app}: {'fragment' if stats['fragment_run'] else 'full'} rerun, "
+              f"median {stats['median_ms']:.1f} ms, "
+              f"server CPU {stats['server_cpu_ms'] or float('nan'):.1f} ms, "
+              f"{stats['mean_bytes']:,.0f} bytes / {stats['mean_deltas']:.0f} deltas per click")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""
+Cold-import benchmark for the ukmec engine package.
+
+Imports ``ukmec`` in fresh interpreters, reports the median import time and
+fails (exit status 1) if it exceeds the budget or if the import drags in any
+of the UI/IO stack (Streamlit, tornado, pandas, pyarrow).
+
+Usage:
+    python benchmarks/bench_import.py [--runs N] [--budget-ms MS]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_BUDGET_MS = 150.0
+FORBIDDEN_MODULES = ("streamlit", "tornado", "pandas", "pyarrow")
+
+_PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import ukmec
+elapsed = time.perf_counter() - start
+loaded = [m for m in {FORBIDDEN_MODULES!r} if m in sys.modules]
+print(json.dumps({{"seconds": elapsed, "forbidden": loaded}}))
+"""
+
+
+def measure_cold_import(runs: int) -> tuple[list[float], set[str]]:
+    """
+    Import ukmec in `runs` fresh interpreters. Returns the per-run import
+    times in milliseconds and the forbidden modules seen in any run.
+    """
+    timings, forbidden = [], set()
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE],
+            cwd=REPO_ROOT, check=True, capture_output=True, text=True,
+        ).stdout
+        probe = json.loads(out)
+        timings.append(probe["seconds"] * 1000)
+        forbidden.update(probe["forbidden"])
+    return timings, forbidden
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    args = parser.parse_args(argv)
+
+    timings, forbidden = measure_cold_import(args.runs)
+    median = statistics.median(timings)
+    print(f"import ukmec: median {median:.1f} ms over {args.runs} runs "
+          f"(min {min(timings):.1f}, max {max(timings):.1f}; budget {args.budget_ms:.0f} ms)")
+
+    ok = True
+    if forbidden:
+        print(f"FAIL: importing ukmec loaded {', '.join(sorted(forbidden))}")
+        ok = False
+    if median > args.budget_ms:
+        print(f"FAIL: median import time exceeds the {args.budget_ms:.0f} ms budget")
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Scaling benchmark for multi-core cohort scoring (ukmec.parallel).
+
+Scores one seeded random cohort (default 1,000,000 patients) with
+evaluate_cohort() in this process, then with a ParallelScorer for each of
+--workers (default 1, 2, 4, ... up to the core count). Every parallel
+result is checked against the single-process one.
+
+For each worker count it reports rows/s, the speedup over one worker and
+the scaling efficiency (speedup / workers; 100% is perfectly linear). Pool
+start-up is excluded: each scorer is warmed up on the cohort once before
+it is timed.
+
+Usage:
+    python benchmarks/bench_parallel.py [--rows N] [--workers 1,2,4,8]
+        [--chunk-rows N] [--apply-rules] [--repeat N] [--json out.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+import numpy as np  # noqa: E402
+
+from ukmec import CONDITION_KEYS, evaluate_cohort, selection_matrix_to_words  # noqa: E402
+from ukmec.parallel import DEFAULT_CHUNK_ROWS, ParallelScorer  # noqa: E402
+from ukmec.rules import current_rules  # noqa: E402
+
+SEED = 20160101
+
+
+def default_worker_counts() -> list[int]:
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cores:
+        counts.append(cores)
+    return counts
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def serial_score(cohort: np.ndarray, chunk_rows: int, apply_rules: bool) -> np.ndarray:
+    parts = []
+    for start in range(0, len(cohort), chunk_rows):
+        chunk = cohort[start:start + chunk_rows]
+        worst = evaluate_cohort(chunk)
+        if apply_rules:
+            worst, _ = current_rules().apply_cohort(selection_matrix_to_words(chunk), worst)
+        parts.append(worst)
+    return np.concatenate(parts)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure parallel cohort scoring scaling.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=lambda s: [int(n) for n in s.split(",")],
+                        default=default_worker_counts())
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--density", type=float, default=0.05)
+    parser.add_argument("--apply-rules", action="store_true")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(SEED)
+    cohort = rng.random((args.rows, len(CONDITION_KEYS)), dtype=np.float32) < args.density
+    expected = serial_score(cohort, args.chunk_rows, args.apply_rules)
+    serial = best_of(lambda: serial_score(cohort, args.chunk_rows, args.apply_rules), args.repeat)
+    print(f"{args.rows:,} rows on {os.cpu_count()} cores; "
+          f"single process: {args.rows / serial:,.0f} rows/s")
+
+    steps = []
+    for workers in args.workers:
+        with ParallelScorer(workers, args.chunk_rows) as scorer:
+            if not np.array_equal(scorer.score(cohort, args.apply_rules), expected):
+                print(f"FAIL: {workers} workers disagree with the single-process result")
+                return 1
+            seconds = best_of(lambda: scorer.score(cohort, args.apply_rules), args.repeat)
+        steps.append({"workers": workers, "seconds": seconds, "rows_per_s": args.rows / seconds})
+
+    base = next((step for step in steps if step["workers"] == 1), steps[0])
+    base_rate = base["rows_per_s"] / base["workers"]
+    for step in steps:
+        step["speedup"] = step["rows_per_s"] / base["rows_per_s"]
+        step["efficiency"] = step["rows_per_s"] / (base_rate * step["workers"])
+        print(f"{step['workers']:3d} workers: {step['rows_per_s']:12,.0f} rows/s, "
+              f"speedup {step['speedup']:5.2f}x, scaling efficiency {step['efficiency']:6.1%}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "rows": args.rows, "cores": os.cpu_count(), "apply_rules": args.apply_rules,
+                "single_process_rows_per_s": args.rows / serial, "steps": steps,
+            }, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+Cold-start benchmark for the Streamlit app, with budgets.
+
+Measures:
+    import      -- importing app.py's module-level dependencies (Streamlit
+                   and ukmec) in fresh interpreters, without running the page;
+    heavy       -- modules a first full run loads that the UKMEC page never
+                   needs (pandas, pyarrow, altair), via AppTest in a fresh
+                   interpreter;
+    first widget -- for a real ``streamlit run`` server, the time from a new
+                   session's websocket connect to its first interactive
+                   widget, for the first session after boot (cold caches)
+                   and for later sessions (median).
+
+Exits with status 1 if a median exceeds its budget or a heavy module is
+loaded, so it can gate CI like bench_import.py.
+
+Usage:
+    python benchmarks/bench_startup.py [app.py] [--runs N] [--sessions N]
+        [--import-budget-ms MS] [--cold-budget-ms MS] [--warm-budget-ms MS]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from st_client import HARNESS_ENV, REPO_ROOT, StreamlitClient, free_port, start_server, stop_server
+
+DEFAULT_IMPORT_BUDGET_MS = 600.0
+DEFAULT_COLD_BUDGET_MS = 600.0
+DEFAULT_WARM_BUDGET_MS = 100.0
+HEAVY_MODULES = ("pandas", "pyarrow", "altair")
+
+_IMPORT_PROBE = """
+import importlib.util, json, sys, time
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("ukmec_app", {app!r})
+spec.loader.exec_module(importlib.util.module_from_spec(spec))
+print(json.dumps({{"seconds": time.perf_counter() - start}}))
+"""
+
+_HEAVY_PROBE = """
+import json, sys
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=60)
+at.run()
+print(json.dumps({{"loaded": [m for m in {heavy!r} if m in sys.modules],
+                   "exception": bool(at.exception)}}))
+"""
+
+
+def _probe(source: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", source],
+        cwd=REPO_ROOT, check=True, capture_output=True, text=True,
+        env=dict(os.environ, **HARNESS_ENV, PYTHONPATH=str(REPO_ROOT)),
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def measure_imports(app: str, runs: int) -> list[float]:
+    return [_probe(_IMPORT_PROBE.format(app=app))["seconds"] * 1000 for _ in range(runs)]
+
+
+async def measure_first_widgets(port: int, sessions: int) -> list[float]:
+    """Time to first widget, in ms, for `sessions` new sessions one after another."""
+    timings = []
+    for _ in range(sessions):
+        client = StreamlitClient(port)
+        start = time.perf_counter()
+        await client.connect()
+        connect_seconds = time.perf_counter() - start
+        result = await client.rerun()
+        client.close()
+        if result.first_widget_seconds is None:
+            raise RuntimeError("the first run rendered no widget")
+        timings.append((connect_seconds + result.first_widget_seconds) * 1000)
+    return timings
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure the app's cold start.")
+    parser.add_argument("app", nargs="?", default=str(REPO_ROOT / "app.py"))
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters for the import probe")
+    parser.add_argument("--sessions", type=int, default=10, help="new sessions per server")
+    parser.add_argument("--import-budget-ms", type=float, default=DEFAULT_IMPORT_BUDGET_MS)
+    parser.add_argument("--cold-budget-ms", type=float, default=DEFAULT_COLD_BUDGET_MS)
+    parser.add_argument("--warm-budget-ms", type=float, default=DEFAULT_WARM_BUDGET_MS)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args(argv)
+
+    imports = measure_imports(args.app, args.runs)
+    heavy = _probe(_HEAVY_PROBE.format(app=args.app, heavy=HEAVY_MODULES))
+
+    port = free_port()
+    boot_start = time.perf_counter()
+    proc = start_server(args.app, port)
+    boot_ms = (time.perf_counter() - boot_start) * 1000
+    try:
+        widgets = asyncio.run(measure_first_widgets(port, args.sessions + 1))
+    finally:
+        stop_server(proc)
+
+    report = {
+        "import_ms": statistics.median(imports),
+        "server_boot_ms": boot_ms,
+        "cold_first_widget_ms": widgets[0],
+        "warm_first_widget_ms": statistics.median(widgets[1:]) if len(widgets) > 1 else None,
+        "heavy_modules": heavy["loaded"],
+    }
+    print(f"import app: median {report['import_ms']:.0f} ms over {args.runs} runs "
+          f"(budget {args.import_budget_ms:.0f} ms)")
+    print(f"server boot: {boot_ms:.0f} ms")
+    print(f"first widget, first session: {report['cold_first_widget_ms']:.0f} ms "
+          f"(budget {args.cold_budget_ms:.0f} ms)")
+    if report["warm_first_widget_ms"] is not None:
+        print(f"first widget, later sessions: median {report['warm_first_widget_ms']:.0f} ms "
+              f"(budget {args.warm_budget_ms:.0f} ms)")
+
+    ok = True
+    if heavy["exception"]:
+        print("FAIL: the app raised on its first run")
+        ok = False
+    if heavy["loaded"]:
+        print(f"FAIL: the first run loaded {', '.join(heavy['loaded'])}")
+        ok = False
+    for name, value, budget in (
+        ("import time", report["import_ms"], args.import_budget_ms),
+        ("first-session time to first widget", report["cold_first_widget_ms"], args.cold_budget_ms),
+        ("later-session time to first widget", report["warm_first_widget_ms"], args.warm_budget_ms),
+    ):
+        if value is not None and value > budget:
+            print(f"FAIL: {name} exceeds the {budget:.0f} ms budget")
+            ok = False
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+"""
+Invariant checks for the UKMEC engine, runnable without Streamlit.
+
+Each check exercises one property that an optimisation could silently
+break, on seeded random inputs where that makes sense, and raises
+AssertionError with the first counterexample. A check that raises
+anything else fails too.
+
+Usage:
+    python benchmarks/checks.py [--checks name,name] [--seed N]
+
+Exits with status 1 if any check fails, so it can gate CI like the suite.
+"""
+import argparse
+import random
+import shutil
+import sys
+import tempfile
+import traceback
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+import numpy as np  # noqa: E402
+
+from ukmec import CONDITION_KEYS, MASK_WORDS, METHODS, load_table  # noqa: E402
+from ukmec.derive import derive_conditions, derive_selection_matrix  # noqa: E402
+from ukmec.core import evaluate_with_provenance  # noqa: E402
+from ukmec.editions import diff_editions  # noqa: E402
+from ukmec.incremental import IncrementalEvaluator  # noqa: E402
+
+SEED = 20160101
+TABLE_FILE = REPO_ROOT / "ukmec" / "ukmec_table.ukt"
+
+CHECKS = {}
+
+
+def check(name: str):
+    def register(fn):
+        CHECKS[name] = fn
+        return fn
+    return register
+
+
+##############################################################################
+# CHECKS
+##############################################################################
+@check("identical_edition_unchanged")
+def check_identical_edition(rng: random.Random):
+    """Comparing against a byte-identical edition, rules applied, flags nothing."""
+    with tempfile.TemporaryDirectory() as tmp:
+        copy = Path(tmp) / "same.ukt"
+        shutil.copyfile(TABLE_FILE, copy)
+        diff = diff_editions("builtin", load_table(str(copy)))
+    selections = [
+        # Rules fire: multiple CVD risk factors and obesity + smoking at 35+.
+        derive_conditions(age=40, smoker=True, cigarettes_per_day=10, bmi=40),
+    ] + [rng.sample(CONDITION_KEYS, rng.randint(0, 12)) for _ in range(2000)]
+    for selection in selections:
+        comparison = diff.compare(selection, apply_rules=True)
+        assert not comparison.changed.any(), f"identical edition differs for {selection}"
+
+
+@check("empty_cohort_aggregates")
+def check_empty_cohort(rng: random.Random):
+    """A filter that matches nobody still gives (empty) aggregates."""
+    from ukmec.analytics import blocking_conditions, category_shares, phase_differences
+
+    worst = np.ones((0, len(METHODS), 2), dtype=np.int8)
+    assert category_shares(worst)["patients"].sum() == 0
+    assert blocking_conditions(np.zeros((0, MASK_WORDS), dtype="<u8")).empty
+    assert (phase_differences(worst)[["C higher than I", "C lower than I"]] == 0).all().all()
+
+
+@check("incremental_toggles")
+def check_incremental(rng: random.Random):
+    """30k random toggles keep IncrementalEvaluator equal to a full re-evaluation."""
+    evaluator = IncrementalEvaluator()
+    for step in range(30_000):
+        key = rng.choice(CONDITION_KEYS)
+        evaluator.toggle(key, key not in evaluator.selected)
+        if step % 1000 == 999:
+            # Clear a large selection through set_mask() now and then.
+            evaluator.set_mask(0)
+        worst, drivers = evaluate_with_provenance(evaluator.keys())
+        assert np.array_equal(evaluator.worst(), worst), f"worst differs at step {step}"
+        assert evaluator.drivers() == drivers, f"drivers differ at step {step}"
+
+
+def _branching_derive(p: dict) -> list[str]:
+    """The app's if/elif logic from before ukmec.derive, for one patient."""
+    keys = ["AGE_MENARCHE_TO_LT_20" if p["age"] < 20 else "AGE_GE_20"]
+    keys.append("PARITY_NULLIPAROUS" if p["nulliparous"] else "PARITY_PAROUS")
+    if p["postpartum"]:
+        weeks_pp = p["weeks_postpartum"]
+        if p["breastfeeding"]:
+            if weeks_pp < 6:
+                keys.append("BREASTFEEDING_0_TO_6_WEEKS")
+            elif 6 <= weeks_pp < 24:
+                keys.append("BREASTFEEDING_6_WEEKS_TO_6_MONTHS")
+            else:
+                keys.append("BREASTFEEDING_GE_6_MONTHS")
+        elif weeks_pp < 3:
+            keys.append("PP_0_TO_3_WEEKS_VTE" if p["postpartum_vte_risk"] else "PP_0_TO_3_WEEKS_NO_VTE")
+        elif 3 <= weeks_pp < 6:
+            keys.append("PP_3_TO_6_WEEKS_VTE" if p["postpartum_vte_risk"] else "PP_3_TO_6_WEEKS_NO_VTE")
+        else:
+            keys.append("PP_GE_6_WEEKS")
+    if p["smoker"]:
+        if p["age"] < 35:
+            keys.append("SMOKE_AGE_LT_35")
+        elif p["cigarettes_per_day"] == 0:
+            keys.append("SMOKE_AGE_GE_35_STOP_LT1" if p["years_since_stopping"] < 1
+                        else "SMOKE_AGE_GE_35_STOP_GE1")
+        elif p["cigarettes_per_day"] < 15:
+            keys.append("SMOKE_AGE_GE_35_LT15")
+        else:
+            keys.append("SMOKE_AGE_GE_35_GE15")
+    if 30 <= p["bmi"] < 35:
+        keys.append("OBESITY_BMI_30_34")
+    elif p["bmi"] >= 35:
+        keys.append("OBESITY_BMI_GE_35")
+    return keys
+
+
+def _random_patient(rng: random.Random) -> dict:
+    # Numeric attributes land on a threshold often enough to test the edges.
+    def pick(edges, low, high, integer=False):
+        if rng.random() < 0.3:
+            return rng.choice(edges)
+        return rng.randint(low, high) if integer else rng.uniform(low, high)
+
+    return {
+        "age": pick((20, 35), 12, 60, integer=True),
+        "nulliparous": rng.random() < 0.5,
+        "postpartum": rng.random() < 0.5,
+        "breastfeeding": rng.random() < 0.5,
+        "weeks_postpartum": pick((3, 6, 24), 0.0, 52.0),
+        "postpartum_vte_risk": rng.random() < 0.5,
+        "smoker": rng.random() < 0.5,
+        "cigarettes_per_day": pick((0, 0, 15), 0, 60, integer=True),
+        "years_since_stopping": rng.choice((0, 1)),
+        "bmi": pick((30, 35), 10.0, 70.0),
+    }
+
+
+@check("derive_parity")
+def check_derive(rng: random.Random):
+    """derive's banding table matches the old branching logic on 20k patients."""
+    patients = [_random_patient(rng) for _ in range(20_000)]
+    columns = {name: [p[name] for p in patients] for name in patients[0]}
+    matrix = derive_selection_matrix(columns)
+    for i, patient in enumerate(patients):
+        derived = [CONDITION_KEYS[k] for k in np.flatnonzero(matrix[i])]
+        expected = sorted(_branching_derive(patient), key=CONDITION_KEYS.index)
+        assert derived == expected, f"{patient}: derived {derived}, expected {expected}"
+        if i < 500:
+            assert derive_conditions(**patient) == expected, f"{patient}: derive_conditions differs"
+
+
+@check("empty_conditions_column")
+def check_empty_conditions(rng: random.Random):
+    """A conditions column with every cell empty scores as no conditions."""
+    import io
+
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    from ukmec.analytics import score_cohort
+    from ukmec.batch import score_batch
+    from ukmec.ipc import evaluate_ipc
+
+    table = pa_csv.read_csv(io.BytesIO(b"id,conditions\n1,\n2,\n"))
+    assert pa.types.is_null(table.schema.field("conditions").type)
+    batch = table.to_batches()[0]
+    expected = np.ones((2, len(METHODS), 2), dtype=np.int8)
+
+    scored, unknown = score_batch(batch)
+    assert unknown == 0 and all(set(scored.column(name).to_pylist()) == {1}
+                                for name in scored.schema.names if name != "id")
+    assert np.array_equal(score_cohort(table).worst, expected)
+
+    source, sink = io.BytesIO(), io.BytesIO()
+    with pa.ipc.new_stream(source, table.schema) as writer:
+        writer.write_table(table)
+    source.seek(0)
+    evaluate_ipc(source, sink)
+    result = pa.ipc.open_stream(sink.getvalue()).read_all()
+    assert result.num_rows == 2 and set(result.column("CHC_I").to_pylist()) == {1}
+
+
+@check("output_paths_apply_rules")
+def check_output_paths(rng: random.Random):
+    """Batch, IPC, JSONL and HTTP scoring give the categories the app shows."""
+    import io
+    import json
+
+    import pyarrow as pa
+
+    from ukmec.batch import RESULT_COLUMNS, score_batch
+    from ukmec.core import selection_to_mask
+    from ukmec.ipc import evaluate_ipc
+    from ukmec.rules import current_rules
+    from ukmec.server import score_rows
+    from ukmec.stream import evaluate_stream
+
+    selections = [
+        derive_conditions(age=40, smoker=True, cigarettes_per_day=10, bmi=40),
+    ] + [rng.sample(CONDITION_KEYS, rng.randint(0, 12)) for _ in range(200)]
+    shown = np.stack([
+        current_rules().apply(selection_to_mask(s), evaluate_with_provenance(s))[0][0]
+        for s in selections
+    ]).reshape(len(selections), -1)
+    assert (shown[0] > evaluate_with_provenance(selections[0])[0].ravel()).any(), "no rule fired"
+
+    batch = pa.RecordBatch.from_pydict({"conditions": [";".join(s) for s in selections]})
+    scored, _ = score_batch(batch)
+    assert np.array_equal(np.column_stack([scored.column(c) for c in RESULT_COLUMNS]), shown)
+
+    source, sink = io.BytesIO(), io.BytesIO()
+    with pa.ipc.new_stream(source, batch.schema) as writer:
+        writer.write_batch(batch)
+    source.seek(0)
+    evaluate_ipc(source, sink)
+    result = pa.ipc.open_stream(sink.getvalue()).read_all()
+    assert np.array_equal(np.column_stack([result.column(c) for c in RESULT_COLUMNS]), shown)
+
+    out = io.StringIO()
+    evaluate_stream((json.dumps({"conditions": s}) for s in selections), out)
+    streamed = [json.loads(line)["results"] for line in out.getvalue().splitlines()]
+    assert np.array_equal(
+        np.array([[r[m][p] for m in METHODS for p in "IC"] for r in streamed]), shown
+    )
+
+    rows = [[CONDITION_KEYS.index(k) for k in s] for s in selections]
+    assert np.array_equal(score_rows(rows).reshape(len(selections), -1), shown)
+
+
+##############################################################################
+# RUNNER
+##############################################################################
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the UKMEC invariant checks.")
+    parser.add_argument("--checks", default=",".join(CHECKS),
+                        help=f"comma-separated subset of {', '.join(CHECKS)}")
+    parser.add_argument("--seed", type=int, default=SEED)
+    args = parser.parse_args(argv)
+
+    failed = []
+    for name in args.checks.split(","):
+        try:
+            CHECKS[name](random.Random(args.seed))
+        except Exception:
+            failed.append(name)
+            print(f"FAIL {name}")
+            traceback.print_exc()
+        else:
+            print(f"ok   {name}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+Load generator for the UKMEC HTTP API (python -m ukmec.server).
+
+Opens --connections keep-alive HTTP/1.1 connections and sends random
+condition selections as fast as each connection allows for --duration
+seconds, either one patient per request (/v1/evaluate) or --batch-size
+patients per request (/v1/evaluate/batch). Reports throughput, latency
+percentiles of the scored (200) responses -- as the server's own histogram
+does, since fast rejections would drag them down -- and 503 rejections
+separately.
+
+Usage:
+    python -m ukmec.server &
+    python benchmarks/http_loadgen.py [--connections 32] [--duration 10] [--batch-size 1]
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ukmec import CONDITION_KEYS  # noqa: E402
+
+
+def random_selection(rng: random.Random, max_conditions: int = 12) -> list[str]:
+    return rng.sample(CONDITION_KEYS, rng.randint(1, max_conditions))
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+async def _read_response(reader: asyncio.StreamReader) -> int:
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("server closed the connection")
+    status = int(status_line.split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def connection_worker(host, port, path, make_body, deadline, latencies, counts):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            body = make_body()
+            request = (
+                f"POST {path} HTTP/1.1\r\nHost: {host}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+            ).encode() + body
+            start = time.perf_counter()
+            writer.write(request)
+            status = await _read_response(reader)
+            if status == 200:
+                latencies.append((time.perf_counter() - start) * 1000)
+            counts[status] = counts.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, connections, duration, batch_size, seed) -> dict:
+    rng = random.Random(seed)
+    if batch_size == 1:
+        path = "/v1/evaluate"
+        def make_body():
+            return json.dumps({"conditions": random_selection(rng)}).encode()
+    else:
+        path = "/v1/evaluate/batch"
+        def make_body():
+            return json.dumps(
+                {"selections": [random_selection(rng) for _ in range(batch_size)]}
+            ).encode()
+
+    latencies, counts = [], {}
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(
+        connection_worker(host, port, path, make_body, deadline, latencies, counts)
+        for _ in range(connections)
+    ))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    ok = counts.get(200, 0)
+    requests = sum(counts.values())
+    return {
+        "connections": connections,
+        "batch_size": batch_size,
+        "seconds": elapsed,
+        "requests": requests,
+        "rejected": counts.get(503, 0),
+        "status_counts": counts,
+        "requests_per_s": requests / elapsed,
+        "patients_per_s": ok * batch_size / elapsed,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "mean_ms": statistics.fmean(latencies) if latencies else 0.0,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test the UKMEC HTTP API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_load(
+        args.host, args.port, args.connections, args.duration, args.batch_size, args.seed
+    ))
+    print(
+        f"{report['requests']} requests in {report['seconds']:.1f}s over "
+        f"{args.connections} connections: {report['requests_per_s']:,.0f} req/s, "
+        f"{report['patients_per_s']:,.0f} patients/s; "
+        f"p50 {report['p50_ms']:.2f} ms, p95 {report['p95_ms']:.2f} ms, "
+        f"p99 {report['p99_ms']:.2f} ms (200s only); {report['rejected']} rejected (503); "
+        f"status {report['status_counts']}"
+    )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
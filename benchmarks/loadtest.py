@@ -0,0 +1,230 @@
+"""
+Concurrent-session load test for the Streamlit app.
+
+Starts ``app.py`` under a real Streamlit server and, for each step of
+--sessions (e.g. 1,2,4,8,16,32), connects that many simulated browser
+sessions over the websocket protocol (see st_client.py). Every session
+replays a click script for --duration seconds: open a condition section,
+tick and untick a few of its checkboxes, now and then switch method or
+move to another section, with an exponentially distributed think time
+(mean --think-ms) between clicks.
+
+For each step it reports the p50/p95/p99 rerun latency, reruns/s, server
+CPU (as a share of one core, per session and per rerun) and RSS growth
+per session. The saturation point is the first step whose p95 exceeds
+--slo-ms or whose server CPU reaches --cpu-limit of a core: Streamlit runs
+every session's script in one process, so past that point clicks queue up.
+
+The sessions all run in this process's event loop; the report includes
+the load generator's own CPU share so a saturated client is easy to spot.
+
+Usage:
+    python benchmarks/loadtest.py [app.py] [--sessions 1,2,4,8,16,32]
+        [--duration 20] [--think-ms 800] [--slo-ms 250] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+from st_client import (
+    REPO_ROOT,
+    ScriptError,
+    connected_client,
+    free_port,
+    process_cpu_seconds,
+    process_rss_bytes,
+    start_server,
+    stop_server,
+)
+
+sys.path.insert(0, str(REPO_ROOT))
+
+from ukmec import METHODS  # noqa: E402
+from ukmec.schema import form_sections  # noqa: E402
+
+# Section toggle key -> its checkbox keys (exclusivity groups are radios
+# and left alone; checkboxes are what clinicians click most).
+SECTIONS = {
+    f"section:{section.name}": [f"cond:{field[0].key}" for field in section.fields if len(field) == 1]
+    for section in form_sections()
+}
+SECTIONS = {key: checkboxes for key, checkboxes in SECTIONS.items() if checkboxes}
+
+SWITCH_SECTION_P = 0.15
+SWITCH_METHOD_P = 0.05
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+##############################################################################
+# 1) ONE SIMULATED SESSION
+##############################################################################
+async def session_worker(port: int, rng: random.Random, deadline: float, think_ms: float,
+                         latencies: list, errors: list):
+    """Replay clicks until the deadline, appending each rerun's latency in ms."""
+    try:
+        client = await connected_client(port)
+    except Exception as exc:
+        errors.append(f"connect: {exc}")
+        return
+    section, ticked = None, set()
+    try:
+        while time.perf_counter() < deadline:
+            roll = rng.random()
+            if section is None or roll < SWITCH_SECTION_P:
+                if section is not None:
+                    closed = await client.set_widget(section, False)
+                    latencies.append(closed.seconds * 1000)
+                section = rng.choice(list(SECTIONS))
+                result = await client.set_widget(section, True)
+            elif roll < SWITCH_SECTION_P + SWITCH_METHOD_P:
+                result = await client.set_widget("method", rng.randrange(len(METHODS)))
+            else:
+                checkbox = rng.choice(SECTIONS[section])
+                ticked ^= {checkbox}
+                result = await client.set_widget(checkbox, checkbox in ticked)
+            latencies.append(result.seconds * 1000)
+            if think_ms:
+                await asyncio.sleep(rng.expovariate(1000 / think_ms))
+    except (ScriptError, ConnectionError, KeyError) as exc:
+        errors.append(f"{type(exc).__name__}: {exc}")
+    finally:
+        client.close()
+
+
+##############################################################################
+# 2) ONE STEP: N SESSIONS AT ONCE
+##############################################################################
+async def run_step(port: int, pid: int, sessions: int, duration: float, think_ms: float,
+                   seed: int, baseline_rss: int | None) -> dict:
+    latencies, errors = [], []
+    cpu_before = process_cpu_seconds(pid)
+    client_cpu_before = time.process_time()
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(
+        session_worker(port, random.Random(seed * 1000 + i), deadline, think_ms, latencies, errors)
+        for i in range(sessions)
+    ))
+    elapsed = time.perf_counter() - start
+    cpu_after = process_cpu_seconds(pid)
+    rss = process_rss_bytes(pid)
+
+    latencies.sort()
+    server_cpu = None
+    if cpu_before is not None and cpu_after is not None:
+        server_cpu = (cpu_after - cpu_before) / elapsed
+    return {
+        "sessions": sessions,
+        "seconds": elapsed,
+        "reruns": len(latencies),
+        "reruns_per_s": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "server_cpu_core_share": server_cpu,
+        "server_cpu_per_session": server_cpu / sessions if server_cpu is not None else None,
+        "server_cpu_ms_per_rerun": (
+            server_cpu * elapsed * 1000 / len(latencies) if server_cpu is not None and latencies else None
+        ),
+        "rss_mb": rss / 2**20 if rss is not None else None,
+        "rss_mb_per_session": (
+            (rss - baseline_rss) / 2**20 / sessions if rss is not None and baseline_rss is not None else None
+        ),
+        "client_cpu_core_share": (time.process_time() - client_cpu_before) / elapsed,
+        "errors": errors,
+    }
+
+
+def saturation(steps: list[dict], slo_ms: float, cpu_limit: float) -> dict | None:
+    """The first step that breaks the latency SLO or pins the server's core."""
+    for step in steps:
+        reasons = []
+        if step["p95_ms"] > slo_ms:
+            reasons.append(f"p95 {step['p95_ms']:.0f} ms > {slo_ms:.0f} ms")
+        if (step["server_cpu_core_share"] or 0) >= cpu_limit:
+            reasons.append(f"server CPU {step['server_cpu_core_share']:.0%} of a core")
+        if step["errors"]:
+            reasons.append(f"{len(step['errors'])} session errors")
+        if reasons:
+            return {"sessions": step["sessions"], "reasons": reasons}
+    return None
+
+
+async def run_load_test(port: int, pid: int, steps: list[int], args) -> dict:
+    # One warm-up session fills the process-wide caches, so RSS growth
+    # measured afterwards is per-session state.
+    warmup = await connected_client(port)
+    warmup.close()
+    await asyncio.sleep(1)
+    baseline_rss = process_rss_bytes(pid)
+
+    results = []
+    for sessions in steps:
+        step = await run_step(port, pid, sessions, args.duration, args.think_ms, args.seed, baseline_rss)
+        results.append(step)
+        print(
+            f"{sessions:4d} sessions: {step['reruns_per_s']:7.1f} reruns/s, "
+            f"p50 {step['p50_ms']:6.1f} ms, p95 {step['p95_ms']:6.1f} ms, p99 {step['p99_ms']:6.1f} ms, "
+            f"server CPU {(step['server_cpu_core_share'] or float('nan')):.0%}, "
+            f"RSS {(step['rss_mb'] or float('nan')):.0f} MB "
+            f"(+{(step['rss_mb_per_session'] or float('nan')):.2f} MB/session), "
+            f"client CPU {step['client_cpu_core_share']:.0%}"
+            + (f", {len(step['errors'])} errors" if step["errors"] else ""),
+            flush=True,
+        )
+        # Let disconnected sessions be cleaned up before the next step.
+        await asyncio.sleep(1)
+
+    return {
+        "baseline_rss_mb": baseline_rss / 2**20 if baseline_rss is not None else None,
+        "slo_ms": args.slo_ms,
+        "think_ms": args.think_ms,
+        "steps": results,
+        "saturation": saturation(results, args.slo_ms, args.cpu_limit),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test the Streamlit app with concurrent sessions.")
+    parser.add_argument("app", nargs="?", default=str(REPO_ROOT / "app.py"))
+    parser.add_argument("--sessions", default="1,2,4,8,16,32",
+                        help="comma-separated session counts, one step each")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per step")
+    parser.add_argument("--think-ms", type=float, default=800.0,
+                        help="mean think time between clicks (0 = click as fast as possible)")
+    parser.add_argument("--slo-ms", type=float, default=250.0, help="p95 rerun latency budget")
+    parser.add_argument("--cpu-limit", type=float, default=0.95,
+                        help="server CPU share of one core counted as saturated")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args(argv)
+    steps = [int(n) for n in args.sessions.split(",") if n.strip()]
+
+    port = free_port()
+    proc = start_server(args.app, port)
+    try:
+        report = asyncio.run(run_load_test(port, proc.pid, steps, args))
+    finally:
+        stop_server(proc)
+
+    if report["saturation"]:
+        print(f"Saturated at {report['saturation']['sessions']} sessions: "
+              + "; ".join(report["saturation"]["reasons"]))
+    else:
+        print(f"Not saturated up to {steps[-1]} sessions (p95 budget {args.slo_ms:.0f} ms).")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+"""
+Minimal headless client for the Streamlit websocket protocol.
+
+Speaks the same BackMsg/ForwardMsg protobufs as the browser, so benchmarks
+can drive a real ``streamlit run`` server: trigger reruns, set widget values
+(scoped to their fragment, like the frontend does) and measure the wall time
+and bytes of each rerun.
+"""
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from tornado.websocket import websocket_connect
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+# Synthetic sessions must never reach the audit log (ukmec.audit).
+HARNESS_ENV = {"UKMEC_AUDIT_DB": "off"}
+
+# Element types the client knows how to set (toggles are checkboxes).
+_WIDGET_TYPES = {"checkbox", "radio", "selectbox", "number_input"}
+
+
+@dataclass
+class Widget:
+    id: str
+    kind: str
+    label: str
+    fragment_id: str
+    options: list[str] = field(default_factory=list)
+    is_int: bool = False
+
+    @property
+    def user_key(self) -> str | None:
+        # Widget ids look like "$$ID-<hash>-<user key or None>".
+        key = self.id.split("-", 2)[-1]
+        return None if key == "None" else key
+
+
+@dataclass
+class RerunResult:
+    seconds: float
+    bytes_received: int
+    messages: int
+    deltas: int
+    fragment_run: bool
+    first_widget_seconds: float | None = None  # until the first widget arrived
+
+
+class ScriptError(RuntimeError):
+    """The app raised an exception during a rerun."""
+
+
+class StreamlitClient:
+    def __init__(self, port: int, host: str = "127.0.0.1"):
+        self.url = f"ws://{host}:{port}/_stcore/stream"
+        self.widgets: dict[str, Widget] = {}
+        self._states: dict[str, WidgetState] = {}
+        self._conn = None
+
+    async def connect(self) -> "StreamlitClient":
+        self._conn = await websocket_connect(self.url, subprotocols=["streamlit"])
+        return self
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def find(self, key_or_label: str) -> Widget:
+        """Look a widget up by its user key, falling back to its label."""
+        for widget in self.widgets.values():
+            if widget.user_key == key_or_label:
+                return widget
+        for widget in self.widgets.values():
+            if widget.label == key_or_label:
+                return widget
+        raise KeyError(key_or_label)
+
+    async def rerun(self, fragment_id: str = "") -> RerunResult:
+        """Send a rerun with the current widget states and wait for it to finish."""
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = ""
+        msg.rerun_script.fragment_id = fragment_id
+        msg.rerun_script.widget_states.widgets.extend(self._states.values())
+
+        start = time.perf_counter()
+        await self._conn.write_message(msg.SerializeToString(), binary=True)
+        n_bytes = n_messages = n_deltas = 0
+        seen = set()
+        first_widget = None
+        while True:
+            payload = await self._conn.read_message()
+            if payload is None:
+                raise ConnectionError("Streamlit server closed the websocket")
+            n_bytes += len(payload)
+            n_messages += 1
+            fwd = ForwardMsg.FromString(payload)
+            kind = fwd.WhichOneof("type")
+            if kind == "delta":
+                n_deltas += 1
+                self._record_delta(fwd, seen)
+                if first_widget is None and seen:
+                    first_widget = time.perf_counter() - start
+            elif kind == "script_finished":
+                break
+        self._forget_unrendered(fragment_id, seen)
+        return RerunResult(
+            time.perf_counter() - start, n_bytes, n_messages, n_deltas, bool(fragment_id),
+            first_widget,
+        )
+
+    async def set_widget(self, key_or_label: str, value) -> RerunResult:
+        """
+        Change one widget and rerun its fragment (or the whole app if the
+        widget is not inside a fragment), as the browser would.
+        """
+        widget = self.find(key_or_label)
+        state = WidgetState(id=widget.id)
+        if widget.kind == "checkbox":
+            state.bool_value = bool(value)
+        elif widget.kind in ("radio", "selectbox"):
+            state.int_value = value if isinstance(value, int) else widget.options.index(value)
+        elif widget.is_int:
+            state.int_value = int(value)
+        else:
+            state.double_value = float(value)
+        self._states[widget.id] = state
+        return await self.rerun(widget.fragment_id)
+
+    def _forget_unrendered(self, fragment_id: str, seen: set[str]):
+        """
+        Drop widgets the rerun's scope (one fragment, or the whole page)
+        didn't render, e.g. the checkboxes of a section that was closed. The
+        browser stops sending their state too; sending it anyway would fire
+        their callbacks without the widgets existing.
+        """
+        for widget in list(self.widgets.values()):
+            in_scope = not fragment_id or widget.fragment_id == fragment_id
+            if in_scope and widget.id not in seen:
+                del self.widgets[widget.id]
+                self._states.pop(widget.id, None)
+
+    def _record_delta(self, fwd: ForwardMsg, seen: set[str]):
+        element = fwd.delta.new_element
+        if fwd.delta.WhichOneof("type") != "new_element":
+            return
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            raise ScriptError(f"{element.exception.type}: {element.exception.message}")
+        if kind not in _WIDGET_TYPES:
+            return
+        proto = getattr(element, kind)
+        seen.add(proto.id)
+        self.widgets[proto.id] = Widget(
+            id=proto.id,
+            kind=kind,
+            label=proto.label,
+            fragment_id=fwd.delta.fragment_id,
+            options=list(getattr(proto, "options", [])),
+            is_int=kind == "number_input" and proto.data_type == proto.INT,
+        )
+
+
+##############################################################################
+# SERVER LIFECYCLE
+##############################################################################
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(app_path: str, port: int, extra_args: list[str] = (), env: dict | None = None):
+    """
+    Start ``streamlit run app_path`` headless on `port` and wait until it is
+    healthy. The repo root is put on PYTHONPATH so copies of the app outside
+    the tree can still import ``ukmec``, and the audit log is turned off
+    (HARNESS_ENV).
+    """
+    server_env = {**os.environ, **HARNESS_ENV, **(env or {})}
+    server_env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(REPO_ROOT), server_env.get("PYTHONPATH")])
+    )
+    proc = subprocess.Popen(
+        [
+            sys.executable, "-m", "streamlit", "run", str(app_path),
+            "--server.headless", "true",
+            "--server.port", str(port),
+            "--server.fileWatcherType", "none",
+            "--browser.gatherUsageStats", "false",
+            *extra_args,
+        ],
+        cwd=REPO_ROOT, env=server_env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return proc
+        except OSError:
+            if proc.poll() is not None:
+                raise RuntimeError(f"streamlit exited with status {proc.returncode}")
+            time.sleep(0.2)
+    proc.terminate()
+    raise TimeoutError("streamlit server did not become healthy within 30s")
+
+
+def process_cpu_seconds(pid: int) -> float | None:
+    """User+system CPU time of a process from /proc, or None off Linux."""
+    try:
+        stat = Path(f"/proc/{pid}/stat").read_text()
+    except OSError:
+        return None
+    fields = stat.rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def process_rss_bytes(pid: int) -> int | None:
+    """Resident set size of a process from /proc, or None off Linux."""
+    try:
+        status = Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return None
+    for line in status.splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1]) * 1024
+    return None
+
+
+def stop_server(proc):
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+async def connected_client(port: int) -> StreamlitClient:
+    """Connect and run the initial full script, like a new browser tab."""
+    client = await StreamlitClient(port).connect()
+    await client.rerun()
+    return client
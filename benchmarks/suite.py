@@ -0,0 +1,341 @@
+"""
+Reproducible benchmark suite for the UKMEC engine and the Streamlit page.
+
+Groups:
+    micro  -- combine_ukmec_categories for selections of 1, 10 and all
+              conditions, for every method and phase; evaluate_all_methods
+              vs evaluate_with_provenance; one patient under two editions;
+              evaluate_mask, checking the combination rules and
+              an incremental one-key toggle; ranking every method
+              through the inverted index
+    bulk   -- evaluate_cohort, combination rules and derive_selection_matrix
+              throughput on seeded random cohorts; JSONL streaming through ukmec.stream
+    rerun  -- full-page reruns driven headlessly through Streamlit's AppTest:
+              first load, opening a section, toggling a checkbox
+
+Results are written as JSON ({"meta": ..., "benchmarks": {name: {...}}}) and
+can be compared against a stored baseline; --fail-on-regression makes the
+comparison fail when any benchmark is more than --tolerance worse.
+
+Usage:
+    python benchmarks/suite.py [--groups micro,bulk,rerun] [--output results.json]
+        [--baseline benchmarks/baseline.json] [--update-baseline] [--fail-on-regression]
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+import numpy as np  # noqa: E402
+
+from ukmec import (  # noqa: E402
+    CONDITION_KEYS,
+    METHODS,
+    combine_ukmec_categories,
+    evaluate_all_methods,
+    evaluate_cohort,
+    evaluate_mask,
+    evaluate_with_provenance,
+    selection_matrix_to_words,
+    selection_to_mask,
+)
+from ukmec.audit import AUDIT_DB_ENV  # noqa: E402
+from ukmec.derive import derive_selection_matrix  # noqa: E402
+from ukmec.editions import diff_editions  # noqa: E402
+from ukmec.incremental import IncrementalEvaluator  # noqa: E402
+from ukmec.rules import current_rules  # noqa: E402
+from ukmec.stream import evaluate_stream  # noqa: E402
+from ukmec.index import current_index  # noqa: E402
+
+DEFAULT_BASELINE = REPO_ROOT / "benchmarks" / "baseline.json"
+DEFAULT_TOLERANCE = 0.25
+BULK_CHUNK_ROWS = 65_536
+STREAM_RECORDS = 20_000
+SEED = 20160101
+
+# group name -> function(args) returning {benchmark name: result dict}
+GROUPS = {}
+
+
+def group(name: str):
+    def register(fn):
+        GROUPS[name] = fn
+        return fn
+    return register
+
+
+def per_call(seconds: float) -> dict:
+    return {"value": seconds, "unit": "s", "better": "lower"}
+
+
+def per_second(rate: float, unit: str) -> dict:
+    return {"value": rate, "unit": unit, "better": "higher"}
+
+
+def time_call(fn, min_time: float = 0.05, repeat: int = 5) -> float:
+    """
+    Median seconds per call of fn(), calibrating the loop count so each of the
+    `repeat` samples runs for at least min_time.
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(min_time / elapsed) + 1)
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return statistics.median(samples)
+
+
+def random_selections(rng: random.Random, size: int) -> list[str]:
+    return rng.sample(CONDITION_KEYS, size)
+
+
+##############################################################################
+# 1) MICROBENCHMARKS
+##############################################################################
+@group("micro")
+def bench_micro(args) -> dict:
+    rng = random.Random(SEED)
+    sizes = {"1": random_selections(rng, 1), "10": random_selections(rng, 10),
+             "all": list(CONDITION_KEYS)}
+    results = {}
+    for size_name, selection in sizes.items():
+        for method in METHODS:
+            for phase_name, is_initiation in (("I", True), ("C", False)):
+                seconds = time_call(
+                    lambda: combine_ukmec_categories(method, selection, is_initiation)
+                )
+                results[f"micro/combine/n={size_name}/{method}/{phase_name}"] = per_call(seconds)
+
+    # Provenance overhead: the same selections with and without drivers.
+    for size_name in ("10", "all"):
+        selection = sizes[size_name]
+        results[f"micro/evaluate_all_methods/n={size_name}"] = per_call(
+            time_call(lambda: evaluate_all_methods(selection))
+        )
+        results[f"micro/evaluate_with_provenance/n={size_name}"] = per_call(
+            time_call(lambda: evaluate_with_provenance(selection))
+        )
+
+    # One patient under two editions (the diff's stacked reduction).
+    diff = diff_editions("builtin", "active")
+    results["micro/compare_editions/n=10"] = per_call(
+        time_call(lambda: diff.compare(sizes["10"]))
+    )
+
+    mask = selection_to_mask(sizes["10"])
+    results["micro/evaluate_mask/n=10"] = per_call(time_call(lambda: evaluate_mask(mask)))
+    rules = current_rules()
+    results["micro/rules_fired/n=10"] = per_call(time_call(lambda: rules.fired(mask)))
+    # One checkbox click: toggle a key on a 10-condition selection, then read
+    # the worst categories.
+    evaluator = IncrementalEvaluator(sizes["10"])
+    extra = next(key for key in CONDITION_KEYS if key not in sizes["10"])
+    clicks = iter(range(10**9))
+    results["micro/incremental_toggle/n=10"] = per_call(time_call(
+        lambda: (evaluator.toggle(extra, next(clicks) % 2 == 0), evaluator.worst())
+    ))
+    results["micro/rank_methods/n=10"] = per_call(
+        time_call(lambda: current_index().rank_methods(sizes["10"], True))
+    )
+    return results
+
+
+##############################################################################
+# 2) BULK THROUGHPUT
+##############################################################################
+def random_cohort(n_rows: int, density: float = 0.05, seed: int = SEED) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.random((n_rows, len(CONDITION_KEYS)), dtype=np.float32) < density
+
+
+def score_in_chunks(matrix: np.ndarray) -> np.ndarray:
+    return np.concatenate([
+        evaluate_cohort(matrix[start:start + BULK_CHUNK_ROWS])
+        for start in range(0, len(matrix), BULK_CHUNK_ROWS)
+    ])
+
+
+def random_attributes(n_rows: int, seed: int = SEED) -> dict:
+    rng = np.random.default_rng(seed)
+    return {
+        "age": rng.integers(14, 55, n_rows),
+        "nulliparous": rng.random(n_rows) < 0.4,
+        "postpartum": rng.random(n_rows) < 0.1,
+        "breastfeeding": rng.random(n_rows) < 0.5,
+        "weeks_postpartum": rng.uniform(0, 52, n_rows),
+        "postpartum_vte_risk": rng.random(n_rows) < 0.2,
+        "smoker": rng.random(n_rows) < 0.15,
+        "cigarettes_per_day": rng.integers(0, 30, n_rows),
+        "years_since_stopping": rng.uniform(0, 5, n_rows),
+        "bmi": rng.uniform(17, 45, n_rows),
+    }
+
+
+@group("bulk")
+def bench_bulk(args) -> dict:
+    results = {}
+    for n_rows in args.bulk_rows:
+        cohort = random_cohort(n_rows)
+        seconds = time_call(lambda: score_in_chunks(cohort), min_time=0.3, repeat=5)
+        results[f"bulk/evaluate_cohort/rows={n_rows}"] = per_second(n_rows / seconds, "rows/s")
+
+        words = selection_matrix_to_words(cohort)
+        worst = score_in_chunks(cohort)
+        seconds = time_call(lambda: current_rules().apply_cohort(words, worst), min_time=0.3, repeat=5)
+        results[f"bulk/rules/rows={n_rows}"] = per_second(n_rows / seconds, "rows/s")
+
+        attributes = random_attributes(n_rows)
+        seconds = time_call(lambda: derive_selection_matrix(attributes), min_time=0.3, repeat=5)
+        results[f"bulk/derive/rows={n_rows}"] = per_second(n_rows / seconds, "rows/s")
+
+    # JSONL streaming, including parsing and encoding.
+    rng = random.Random(SEED)
+    lines = [
+        json.dumps({"id": i, "conditions": random_selections(rng, 5)}) + "\n"
+        for i in range(STREAM_RECORDS)
+    ]
+    seconds = time_call(lambda: evaluate_stream(iter(lines), io.StringIO()), min_time=0.3, repeat=3)
+    results[f"bulk/stream/records={STREAM_RECORDS}"] = per_second(STREAM_RECORDS / seconds, "records/s")
+    return results
+
+
+##############################################################################
+# 3) END-TO-END RERUNS (AppTest)
+##############################################################################
+RERUN_SECTION = "section:Cardiovascular disease"
+RERUN_CHECKBOX = "cond:AF"
+
+
+def _timed_run(element_or_app) -> float:
+    start = time.perf_counter()
+    element_or_app.run(timeout=60)
+    return time.perf_counter() - start
+
+
+@group("rerun")
+def bench_rerun(args) -> dict:
+    from streamlit.testing.v1 import AppTest
+
+    # Benchmark sessions must not land in the audit log.
+    os.environ[AUDIT_DB_ENV] = "off"
+    first_loads, opens, toggles = [], [], []
+    for _ in range(args.rerun_sessions):
+        at = AppTest.from_file(str(REPO_ROOT / "app.py"), default_timeout=60)
+        first_loads.append(_timed_run(at))
+        at.toggle(key=RERUN_SECTION).set_value(True)
+        opens.append(_timed_run(at))
+        for i in range(args.rerun_clicks):
+            at.checkbox(key=RERUN_CHECKBOX).set_value(i % 2 == 0)
+            toggles.append(_timed_run(at))
+        if at.exception:
+            raise RuntimeError(f"app raised during rerun benchmark: {at.exception}")
+    return {
+        "rerun/first_load": per_call(statistics.median(first_loads)),
+        "rerun/open_section": per_call(statistics.median(opens)),
+        "rerun/toggle_checkbox": per_call(statistics.median(toggles)),
+    }
+
+
+##############################################################################
+# RUNNER
+##############################################################################
+def metadata() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Print current vs baseline and return the names of regressed benchmarks."""
+    regressions = []
+    for name, result in current.items():
+        base = baseline.get(name)
+        if base is None or not base["value"]:
+            continue
+        ratio = result["value"] / base["value"]
+        worse = ratio > 1 + tolerance if result["better"] == "lower" else ratio < 1 / (1 + tolerance)
+        if worse:
+            regressions.append(name)
+        print(f"  {'REGRESSED' if worse else 'ok':9} {name}: {ratio:.2f}x baseline")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the UKMEC benchmark suite.")
+    parser.add_argument("--groups", default=",".join(GROUPS),
+                        help=f"comma-separated subset of {', '.join(GROUPS)}")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="merge these results into the baseline file")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--bulk-rows", type=lambda s: [int(n) for n in s.split(",")],
+                        default=[10_000, 200_000])
+    parser.add_argument("--rerun-sessions", type=int, default=3)
+    parser.add_argument("--rerun-clicks", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    benchmarks = {}
+    for name in args.groups.split(","):
+        print(f"running {name} benchmarks...", file=sys.stderr)
+        benchmarks.update(GROUPS[name](args))
+    report = {"meta": metadata(), "benchmarks": benchmarks}
+
+    for name, result in benchmarks.items():
+        print(f"{name}: {result['value']:.6g} {result['unit']}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+    status = 0
+    if args.baseline.exists() and not args.update_baseline:
+        print(f"compared with {args.baseline}:")
+        baseline = json.loads(args.baseline.read_text())["benchmarks"]
+        regressions = compare(benchmarks, baseline, args.tolerance)
+        if regressions and args.fail_on_regression:
+            print(f"{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}")
+            status = 1
+    if args.update_baseline:
+        merged = {}
+        if args.baseline.exists():
+            merged = json.loads(args.baseline.read_text())["benchmarks"]
+        merged.update(benchmarks)
+        args.baseline.write_text(json.dumps({"meta": report["meta"], "benchmarks": merged}, indent=2) + "\n")
+        print(f"baseline updated: {args.baseline}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
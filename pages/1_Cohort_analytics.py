@@ -0,0 +1,149 @@
+import hashlib
+
+import altair as alt
+import streamlit as st
+
+from ukmec import CONDITION_KEYS, METHODS, current_table
+from ukmec.analytics import (
+    blocking_conditions,
+    category_shares,
+    phase_differences,
+    read_cohort,
+    row_mask,
+    score_cohort,
+)
+
+# Uploaded file id -> content hash, so a rerun doesn't hash the upload again.
+DIGESTS_KEY = "_cohort_digests"
+CATEGORY_COLORS = alt.Scale(domain=[1, 2, 3, 4], range=["#2e7d32", "#9ccc65", "#ffa726", "#c62828"])
+
+
+##############################################################################
+# CACHED PARSING / SCORING / AGGREGATION
+##############################################################################
+# Everything is keyed on the upload's content hash (the bytes themselves
+# are passed as an unhashed `_data`). The scored cohort is parsed and scored
+# once per file, options and table version; filters only pick rows of it,
+# and each filter combination's aggregates are cached in turn.
+@st.cache_data(max_entries=4, show_spinner="Scoring the cohort…")
+def load_cohort(digest: str, _data: bytes, name: str, conditions_column: str,
+                separator: str, table_version: str):
+    return score_cohort(read_cohort(_data, name), conditions_column, separator)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def cohort_summary(cohort_key: tuple, _cohort, segment: str | None, values: tuple,
+                   with_conditions: tuple, apply_rules: bool):
+    rows = row_mask(_cohort, segment, values, with_conditions)
+    worst = (_cohort.escalated if apply_rules else _cohort.worst)[rows]
+    return {
+        "patients": int(rows.sum()),
+        "shares": category_shares(worst),
+        "blocking": blocking_conditions(_cohort.words[rows]),
+        "phases": phase_differences(worst),
+    }
+
+
+def _digest(upload) -> str:
+    digests = st.session_state.setdefault(DIGESTS_KEY, {})
+    if upload.file_id not in digests:
+        digests[upload.file_id] = hashlib.sha256(upload.getvalue()).hexdigest()
+    return digests[upload.file_id]
+
+
+##############################################################################
+# PAGE
+##############################################################################
+def render_charts(summary: dict, method: str):
+    shares = summary["shares"]
+    st.subheader("Category by method")
+    st.altair_chart(
+        alt.Chart(shares).mark_bar().encode(
+            x=alt.X("method:N", sort=list(METHODS), title=None),
+            xOffset=alt.XOffset("phase:N"),
+            y=alt.Y("share:Q", stack="zero", axis=alt.Axis(format="%"), title="Patients"),
+            color=alt.Color("category:O", scale=CATEGORY_COLORS, title="UKMEC"),
+            tooltip=["method", "phase", "category", "patients", alt.Tooltip("share:Q", format=".1%")],
+        ),
+        use_container_width=True,
+    )
+    high = shares[shares["category"] >= 3].groupby(["method", "phase"], sort=False)["share"].sum()
+    st.caption("Share at category 3 or 4 (I / C): " + ", ".join(
+        f"{m} {high[m, 'I']:.0%} / {high[m, 'C']:.0%}" for m in METHODS
+    ))
+
+    st.subheader(f"Most common blocking conditions for {method}")
+    blocking = summary["blocking"]
+    blocking = blocking[blocking["method"] == method]
+    if blocking.empty:
+        st.write("No patient has a condition at category 3 or 4 for this method.")
+    else:
+        st.altair_chart(
+            alt.Chart(blocking).mark_bar().encode(
+                x=alt.X("patients:Q", title="Patients"),
+                y=alt.Y("condition:N", sort="-x", title=None),
+                yOffset=alt.YOffset("phase:N"),
+                color=alt.Color("category:O", scale=CATEGORY_COLORS, title="UKMEC"),
+                tooltip=["condition", "phase", "category", "patients"],
+            ),
+            use_container_width=True,
+        )
+
+    st.subheader("Initiation vs. Continuation")
+    phases = summary["phases"].melt("method", var_name="difference", value_name="share")
+    st.altair_chart(
+        alt.Chart(phases).mark_bar().encode(
+            x=alt.X("method:N", sort=list(METHODS), title=None),
+            xOffset="difference:N",
+            y=alt.Y("share:Q", axis=alt.Axis(format="%"), title="Patients"),
+            color=alt.Color("difference:N", title=None),
+            tooltip=["method", "difference", alt.Tooltip("share:Q", format=".1%")],
+        ),
+        use_container_width=True,
+    )
+
+
+def main():
+    st.title("Cohort analytics")
+    st.markdown(
+        "Upload a month of consults (CSV or Parquet) to see how the patients fall "
+        "across UKMEC categories. Rows take the same columns as `python -m ukmec.batch`: "
+        "a condition-keys column or one column per key, plus raw attributes such as "
+        "`age`, `bmi` and `smoker`."
+    )
+    upload = st.file_uploader("Cohort file", type=["csv", "parquet"])
+    with st.expander("File options"):
+        conditions_column = st.text_input("Condition-keys column", "conditions")
+        separator = st.text_input("Key separator", ";")
+    if upload is None:
+        return
+
+    # Identifies the scored cohort: the same file, options and table.
+    cohort_key = (_digest(upload), upload.name, conditions_column, separator, current_table().version)
+    cohort = load_cohort(cohort_key[0], upload.getvalue(), *cohort_key[1:])
+    if not len(cohort):
+        st.warning("The file has no rows.")
+        return
+
+    st.sidebar.header("Filters")
+    segment = st.sidebar.selectbox(
+        "Group column", [None, *cohort.segments],
+        format_func=lambda name: "None" if name is None else name,
+    )
+    values = ()
+    if segment is not None:
+        values = tuple(st.sidebar.multiselect("Values", cohort.segments[segment][0]))
+    with_conditions = tuple(st.sidebar.multiselect("Patients with conditions", CONDITION_KEYS))
+    apply_rules = st.sidebar.checkbox("Apply combination rules", value=True)
+    method = st.sidebar.selectbox("Method for blocking conditions", METHODS)
+
+    summary = cohort_summary(cohort_key, cohort, segment, values, with_conditions, apply_rules)
+    st.write(f"**{summary['patients']:,}** of {len(cohort):,} patients selected.")
+    if cohort.unknown_keys:
+        st.caption(f"{cohort.unknown_keys:,} unknown condition keys were skipped.")
+    if summary["patients"]:
+        render_charts(summary, method)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+UKMEC contraception eligibility engine, independent of the Streamlit UI.
+
+Importing this package loads only numpy; heavier helpers such as
+``ukmec.batch`` (pyarrow) are imported on demand.
+"""
+from . import core as _core
+from .core import (
+    CONDITION_BITS,
+    CONDITION_INDEX,
+    CONDITION_KEYS,
+    FULL_MASK,
+    MASK_WORDS,
+    METHOD_INDEX,
+    NOT_APPLICABLE,
+    PHASES,
+    CategoryTable,
+    UnknownMethodError,
+    combine_ukmec_categories,
+    compile_category_tensor,
+    current_table,
+    evaluate_all_methods,
+    evaluate_cohort,
+    evaluate_mask,
+    evaluate_with_provenance,
+    install_table,
+    load_table,
+    mask_to_row_mask,
+    mask_to_selection,
+    mask_to_words,
+    reload_table,
+    selection_matrix_to_words,
+    selection_to_mask,
+    table_version,
+    watch_table,
+    words_to_selection_matrix,
+)
+from .data import (
+    CATEGORY_DEFINITIONS,
+    CONTINUATION_DEFINITION,
+    INITIATION_DEFINITION,
+    METHODS,
+    UKMEC_DATA,
+)
+from .tablefile import TableFileError
+
+
+def __getattr__(name):
+    # The active table can be swapped at runtime, so these are looked up on
+    # each access rather than bound at import.
+    if name in ("CATEGORY_TENSOR", "TABLE_VERSION"):
+        return getattr(_core, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,192 @@
+"""
+Cohort analytics: score an uploaded consult extract once, then aggregate
+any subset of its rows.
+
+score_cohort() parses nothing itself; it takes a pyarrow Table (see
+read_cohort()) and scores it batch by batch through the same selection-
+matrix code as ukmec.batch. What it keeps is compact -- the packed
+selections, the worst categories with and without the combination rules,
+and low-cardinality pass-through columns (site, clinician, ...) as integer
+codes -- so a ScoredCohort is cheap to cache and copy. Filtering is a
+boolean row mask over those arrays, and every aggregate below is a few
+vectorized reductions over the masked rows; nothing is re-parsed or
+re-scored.
+"""
+import io
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from .batch import DEFAULT_BATCH_SIZE, selection_matrix_for_batch
+from .core import (
+    CONDITION_INDEX,
+    CONDITION_KEYS,
+    PHASES,
+    CategoryTable,
+    current_table,
+    evaluate_cohort,
+    selection_matrix_to_words,
+    words_to_selection_matrix,
+)
+from .data import METHODS
+from .derive import ATTRIBUTES
+from .rules import current_rules
+
+MAX_SEGMENT_VALUES = 50
+CATEGORIES = (1, 2, 3, 4)
+
+
+@dataclass(frozen=True)
+class ScoredCohort:
+    words: np.ndarray        # (patients, MASK_WORDS) packed selections
+    worst: np.ndarray        # (patients, methods, 2) worst categories
+    escalated: np.ndarray    # ... after the combination rules (ukmec.rules)
+    # column -> (distinct values, per-row code into them; -1 = null)
+    segments: dict[str, tuple[list, np.ndarray]]
+    unknown_keys: int
+    table_version: str
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+
+##############################################################################
+# 1) READING / SCORING
+##############################################################################
+def read_cohort(data: bytes, name: str) -> pa.Table:
+    """Parse an uploaded CSV or Parquet file (chosen by its name)."""
+    if name.lower().endswith(".parquet"):
+        return pq.read_table(io.BytesIO(data))
+    return pa_csv.read_csv(io.BytesIO(data))
+
+
+def _segment(column: pa.ChunkedArray) -> tuple[list, np.ndarray] | None:
+    """Dictionary-encode a column, or None if it has too many distinct values."""
+    if pa.types.is_floating(column.type) or pa.types.is_nested(column.type):
+        return None
+    encoded = pc.dictionary_encode(column).combine_chunks()
+    if len(encoded.dictionary) > MAX_SEGMENT_VALUES:
+        return None
+    codes = encoded.indices.fill_null(-1).to_numpy(zero_copy_only=False).astype(np.int32)
+    return encoded.dictionary.to_pylist(), codes
+
+
+def score_cohort(
+    table: pa.Table,
+    conditions_column: str = "conditions",
+    separator: str = ";",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> ScoredCohort:
+    """Score every row of table once, under the active category table."""
+    active = current_table()
+    rules = current_rules()
+    words, worst, unknown_keys = [], [], 0
+    input_columns = set()
+    for batch in table.to_batches(max_chunksize=batch_size):
+        matrix, unknown, input_columns = selection_matrix_for_batch(batch, conditions_column, separator)
+        words.append(selection_matrix_to_words(matrix))
+        worst.append(evaluate_cohort(matrix, active))
+        unknown_keys += unknown
+
+    words = np.concatenate(words) if words else selection_matrix_to_words(
+        np.zeros((0, len(CONDITION_KEYS)), dtype=bool)
+    )
+    worst = np.concatenate(worst) if worst else np.ones((0, len(METHODS), 2), dtype=np.int8)
+    escalated, _ = rules.apply_cohort(words, worst)
+
+    segments = {}
+    for name in table.column_names:
+        if name in input_columns or name in CONDITION_INDEX or name in ATTRIBUTES:
+            continue
+        segment = _segment(table.column(name))
+        if segment is not None:
+            segments[name] = segment
+    return ScoredCohort(words, worst, escalated, segments, unknown_keys, active.version)
+
+
+##############################################################################
+# 2) FILTERING
+##############################################################################
+def row_mask(
+    cohort: ScoredCohort,
+    segment: str | None = None,
+    values=(),
+    with_conditions=(),
+) -> np.ndarray:
+    """
+    Rows whose `segment` column is one of `values` (all rows if no values)
+    and that have every condition in with_conditions.
+    """
+    mask = np.ones(len(cohort), dtype=bool)
+    if segment is not None and values:
+        labels, codes = cohort.segments[segment]
+        wanted = [i for i, label in enumerate(labels) if label in set(values)]
+        mask &= np.isin(codes, wanted)
+    if with_conditions:
+        selected = words_to_selection_matrix(cohort.words)
+        rows = [CONDITION_INDEX[k] for k in with_conditions]
+        mask &= selected[:, rows].all(axis=1)
+    return mask
+
+
+##############################################################################
+# 3) AGGREGATES (chart-ready DataFrames)
+##############################################################################
+def category_shares(worst: np.ndarray) -> pd.DataFrame:
+    """
+    Share of patients at each category, per method and phase: one bincount
+    over (method, phase, category) cells.
+    """
+    n, n_methods = len(worst), len(METHODS)
+    cells = np.arange(n_methods * 2) * (len(CATEGORIES) + 1)
+    counts = np.bincount(
+        (cells + worst.reshape(n, n_methods * 2)).ravel(), minlength=n_methods * 2 * (len(CATEGORIES) + 1)
+    ).reshape(n_methods, 2, -1)[..., 1:]
+    shares = counts / max(n, 1)
+    j, p, c = np.meshgrid(np.arange(n_methods), np.arange(2), np.arange(len(CATEGORIES)), indexing="ij")
+    return pd.DataFrame({
+        "method": np.asarray(METHODS)[j.ravel()],
+        "phase": np.asarray(PHASES)[p.ravel()],
+        "category": np.asarray(CATEGORIES)[c.ravel()],
+        "patients": counts.ravel(),
+        "share": shares.ravel(),
+    })
+
+
+def blocking_conditions(
+    words: np.ndarray, table: CategoryTable | None = None, top: int = 15, threshold: int = 3
+) -> pd.DataFrame:
+    """
+    The conditions that most often put a method at `threshold` or worse:
+    per method and phase, the number of patients with each condition the
+    table rates that high, keeping the `top` conditions per cell.
+    """
+    tensor = (table or current_table()).tensor
+    prevalence = words_to_selection_matrix(words).sum(axis=0)
+    counts = prevalence[:, None, None] * (tensor >= threshold)
+    rows, methods, phases = np.nonzero(counts)
+    frame = pd.DataFrame({
+        "condition": np.asarray(CONDITION_KEYS)[rows],
+        "method": np.asarray(METHODS)[methods],
+        "phase": np.asarray(PHASES)[phases],
+        "category": tensor[rows, methods, phases],
+        "patients": counts[rows, methods, phases],
+    })
+    frame = frame.sort_values("patients", ascending=False, kind="stable")
+    return frame.groupby(["method", "phase"], sort=False).head(top).reset_index(drop=True)
+
+
+def phase_differences(worst: np.ndarray) -> pd.DataFrame:
+    """Per method, the share of patients whose Continuation is higher / lower than Initiation."""
+    n = max(len(worst), 1)
+    initiation, continuation = worst[..., 0], worst[..., 1]
+    return pd.DataFrame({
+        "method": list(METHODS),
+        "C higher than I": (continuation > initiation).sum(axis=0) / n,
+        "C lower than I": (continuation < initiation).sum(axis=0) / n,
+    })
@@ -0,0 +1,320 @@
+"""
+Audit log of every category shown, written off the request path.
+
+The app calls AuditLog.record() from the Streamlit script thread after it
+has drawn a result. record() never touches the disk: it drops the event if
+the session's last event had the same method, phase, selection, table
+version and categories (a rerun that changed nothing, e.g. opening a
+section), and otherwise puts it on a bounded queue without blocking. If the
+queue is full the event is counted in `dropped` and a warning is logged,
+rather than slowing the click down.
+
+A background writer drains the queue into a local SQLite database in WAL
+mode, one transaction per batch (up to batch_size events, or whatever
+arrived within flush_interval seconds), so readers never block it and a
+burst of clicks costs one fsync. query() reads the log back by time range,
+method, session, table version and/or condition, using the indexes on
+(ts) and (method, ts).
+
+    python -m ukmec.audit [db] [--since 2025-01-01] [--method CHC] [--limit 100]
+
+prints matching events as JSON lines, newest first.
+
+The database is audit/ukmec-audit.sqlite3 next to app.py unless
+UKMEC_AUDIT_DB names another path, or "off" to disable the log.
+"""
+import argparse
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+
+import numpy as np
+
+from .core import CONDITION_INDEX, METHOD_INDEX, results_json
+
+AUDIT_DB_ENV = "UKMEC_AUDIT_DB"
+# Next to the app, not relative to whatever directory it was started from.
+DEFAULT_AUDIT_DB = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "audit", "ukmec-audit.sqlite3"
+)
+DEFAULT_QUEUE_SIZE = 10_000
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 1.0
+_MAX_TRACKED_SESSIONS = 10_000
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS evaluations (
+    id            INTEGER PRIMARY KEY,
+    ts            REAL NOT NULL,     -- unix time
+    session       TEXT NOT NULL,
+    method        TEXT NOT NULL,
+    phase         TEXT NOT NULL,     -- "I" or "C"
+    conditions    TEXT NOT NULL,     -- ";KEY;KEY;" so LIKE '%;KEY;%' (escaped) matches one key
+    category      INTEGER NOT NULL,  -- the category shown for method/phase
+    results       TEXT NOT NULL,     -- every method, as JSON {method: {"I": .., "C": ..}}
+    rules         TEXT NOT NULL,     -- combination rules that fired, ";"-separated
+    table_version TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS evaluations_ts ON evaluations (ts);
+CREATE INDEX IF NOT EXISTS evaluations_method_ts ON evaluations (method, ts);
+"""
+_COLUMNS = (
+    "ts", "session", "method", "phase", "conditions", "category", "results", "rules", "table_version"
+)
+_INSERT = f"INSERT INTO evaluations ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})"
+
+
+@dataclass(frozen=True)
+class AuditEvent:
+    ts: float
+    session: str
+    method: str
+    phase: str
+    conditions: tuple[str, ...]
+    category: int
+    results: dict            # {method: {"I": .., "C": ..}}
+    rules: tuple[str, ...]
+    table_version: str
+
+
+@dataclass
+class AuditStats:
+    enqueued: int = 0
+    written: int = 0
+    duplicates: int = 0
+    dropped: int = 0
+    batches: int = 0
+    last_error: str | None = None
+
+
+def connect(path: str, readonly: bool = False) -> sqlite3.Connection:
+    if readonly:
+        return sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+##############################################################################
+# 1) WRITING
+##############################################################################
+class AuditLog:
+    def __init__(
+        self,
+        path: str,
+        max_queue: int = DEFAULT_QUEUE_SIZE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats = AuditStats()
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._last: dict[str, tuple] = {}   # session -> last event's identity
+        self._conn = connect(path)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="ukmec-audit-writer", daemon=True)
+        self._thread.start()
+        # Write out what is still queued when the process exits normally.
+        atexit.register(self.close)
+
+    def record(
+        self,
+        session: str,
+        method: str,
+        is_initiation: bool,
+        conditions,
+        worst: np.ndarray,
+        table_version: str,
+        rules=(),
+    ) -> bool:
+        """
+        Queue one shown result (worst: the methods x 2 categories). Returns
+        False if it was a duplicate of the session's last event or the queue
+        was full.
+        """
+        phase = 0 if is_initiation else 1
+        conditions = tuple(conditions)
+        identity = (method, phase, conditions, table_version, worst.tobytes())
+        if self._last.get(session) == identity:
+            self.stats.duplicates += 1
+            return False
+        if len(self._last) >= _MAX_TRACKED_SESSIONS:
+            self._last.clear()
+        self._last[session] = identity
+
+        event = AuditEvent(
+            ts=time.time(),
+            session=session,
+            method=method,
+            phase="IC"[phase],
+            conditions=conditions,
+            category=int(worst[METHOD_INDEX[method], phase]),
+            results=results_json(worst),
+            rules=tuple(rules),
+            table_version=table_version,
+        )
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            if not self.stats.dropped:
+                logger.warning("Audit queue full (%d events); dropping events", self._queue.maxsize)
+            self.stats.dropped += 1
+            return False
+        self.stats.enqueued += 1
+        return True
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until everything queued so far is written. True if it was."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return not self._queue.unfinished_tasks
+
+    def close(self):
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join()
+        self._conn.close()
+        atexit.unregister(self.close)
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write(self, batch: list[AuditEvent]):
+        rows = [
+            (e.ts, e.session, e.method, e.phase, _encode_conditions(e.conditions), e.category,
+             json.dumps(e.results), ";".join(e.rules), e.table_version)
+            for e in batch
+        ]
+        try:
+            with self._conn:
+                self._conn.executemany(_INSERT, rows)
+        except sqlite3.Error as exc:
+            self.stats.last_error = str(exc)
+            self.stats.dropped += len(batch)
+            logger.warning("Could not write %d audit events to %s: %s", len(batch), self.path, exc)
+            return
+        self.stats.written += len(batch)
+        self.stats.batches += 1
+
+
+def _encode_conditions(conditions) -> str:
+    return ";" + ";".join(conditions) + ";" if conditions else ""
+
+
+def _like_literal(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def configured_audit_path() -> str | None:
+    """$UKMEC_AUDIT_DB, the default path if unset, or None if it is "off"."""
+    value = os.environ.get(AUDIT_DB_ENV, DEFAULT_AUDIT_DB)
+    return None if value.lower() in ("", "0", "off", "false", "no") else value
+
+
+##############################################################################
+# 2) READING
+##############################################################################
+def query(
+    path: str,
+    since: float | None = None,
+    until: float | None = None,
+    method: str | None = None,
+    session: str | None = None,
+    table_version: str | None = None,
+    condition: str | None = None,
+    limit: int = 1000,
+) -> list[AuditEvent]:
+    """Events matching every given filter, newest first."""
+    clauses, params = [], []
+    for column, op, value in (
+        ("ts", ">=", since), ("ts", "<", until), ("method", "=", method),
+        ("session", "=", session), ("table_version", "=", table_version),
+    ):
+        if value is not None:
+            clauses.append(f"{column} {op} ?")
+            params.append(value)
+    if condition is not None:
+        if condition not in CONDITION_INDEX:
+            raise KeyError(condition)
+        # Keys contain "_", a LIKE wildcard, so match them literally.
+        clauses.append("conditions LIKE ? ESCAPE '\\'")
+        params.append(f"%;{_like_literal(condition)};%")
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    conn = connect(path, readonly=True)
+    try:
+        rows = conn.execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM evaluations {where} ORDER BY ts DESC LIMIT ?",
+            (*params, limit),
+        ).fetchall()
+    finally:
+        conn.close()
+    return [
+        AuditEvent(
+            ts=ts, session=session_, method=method_, phase=phase,
+            conditions=tuple(filter(None, conditions.split(";"))), category=category,
+            results=json.loads(results), rules=tuple(filter(None, rules.split(";"))),
+            table_version=version,
+        )
+        for ts, session_, method_, phase, conditions, category, results, rules, version in rows
+    ]
+
+
+def _timestamp(value: str) -> float:
+    return datetime.fromisoformat(value).timestamp()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Read the UKMEC audit log.")
+    parser.add_argument("db", nargs="?", default=configured_audit_path() or DEFAULT_AUDIT_DB)
+    parser.add_argument("--since", type=_timestamp, help="ISO date/time")
+    parser.add_argument("--until", type=_timestamp, help="ISO date/time")
+    parser.add_argument("--method")
+    parser.add_argument("--session")
+    parser.add_argument("--table-version")
+    parser.add_argument("--condition", help="only events whose selection includes this key")
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    events = query(
+        args.db, args.since, args.until, args.method, args.session,
+        args.table_version, args.condition, args.limit,
+    )
+    for event in events:
+        print(json.dumps(asdict(event)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
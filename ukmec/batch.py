@@ -0,0 +1,259 @@
+"""
+Bulk UKMEC scoring for cohort files.
+
+Reads a CSV or Parquet file of patient rows in fixed-size record batches,
+scores every row for all METHODS under both Initiation and Continuation,
+and streams the result to a CSV or Parquet file, so memory stays flat no
+matter how many rows the input has.
+
+Each input row describes its conditions in one of two ways:
+
+* a condition-keys column (default ``conditions``) holding either a list of
+  keys (Parquet) or a delimited string such as ``AGE_GE_20;PARITY_PAROUS``;
+* one boolean column per condition key, named exactly like the key.
+
+Raw patient attributes (``age``, ``bmi``, ``smoker``, ... -- see
+ukmec.derive.ATTRIBUTES) are turned into their age/parity/postpartum/
+smoking/BMI condition keys as well, so an EHR extract can be scored as-is.
+
+All other columns (patient ids, dates, ...) are passed through unchanged,
+followed by one int8 column per method and phase, e.g. ``CHC_I``/``CHC_C``.
+
+With --workers N, each record batch's selection matrix is scored by a pool
+of N processes through shared memory (ukmec.parallel); reading, parsing
+and writing stay in this process, so use a large --batch-size with it.
+
+Usage:
+    python -m ukmec.batch consults.parquet scored.parquet [--batch-size N] [--no-apply-rules]
+        [--workers N]
+"""
+import argparse
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from .core import CONDITION_INDEX, CONDITION_KEYS, PHASES, evaluate_cohort, selection_matrix_to_words
+from .data import METHODS
+from .derive import ATTRIBUTES, derive_selection_matrix
+from .parallel import ParallelScorer
+from .rules import current_rules
+
+DEFAULT_BATCH_SIZE = 65_536
+
+RESULT_COLUMNS = [
+    f"{method}_{suffix}" for method in METHODS for suffix in PHASES
+]
+
+_CONDITION_KEY_ARRAY = pa.array(CONDITION_KEYS)
+
+
+@dataclass
+class BatchStats:
+    rows: int = 0
+    batches: int = 0
+    unknown_keys: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+##############################################################################
+# 1) READING
+##############################################################################
+def iter_record_batches(path: str, batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Yield record batches of at most batch_size rows from a CSV or Parquet file.
+    """
+    if path.endswith(".parquet"):
+        yield from pq.ParquetFile(path).iter_batches(batch_size=batch_size)
+        return
+
+    # The CSV reader chunks by bytes, so re-slice its blocks to batch_size rows.
+    reader = pa_csv.open_csv(path)
+    for block in reader:
+        for offset in range(0, block.num_rows, batch_size):
+            yield block.slice(offset, batch_size)
+
+
+##############################################################################
+# 2) BATCH -> SELECTION MATRIX
+##############################################################################
+def selection_matrix_from_keys(column: pa.Array, separator: str = ";") -> tuple[np.ndarray, int]:
+    """
+    Turn a list-of-keys or delimited-string column into a boolean
+    (rows x len(CONDITION_KEYS)) matrix. Returns it with the number of
+    unknown keys that were skipped.
+    """
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks()
+    if pa.types.is_null(column.type):
+        # A column with no values at all (e.g. every CSV cell empty) is
+        # inferred as null-typed: no keys for any row.
+        column = column.cast(pa.string())
+    if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+        column = pc.split_pattern(column, separator)
+
+    flat = pc.utf8_trim_whitespace(pc.list_flatten(column))
+    parents = pc.list_parent_indices(column).to_numpy()
+    positions = pc.index_in(flat, value_set=_CONDITION_KEY_ARRAY)
+
+    known = pc.is_valid(positions).to_numpy(zero_copy_only=False)
+    present = pc.not_equal(flat, "").fill_null(False).to_numpy(zero_copy_only=False)
+    matrix = np.zeros((len(column), len(CONDITION_KEYS)), dtype=bool)
+    matrix[parents[known], positions.to_numpy(zero_copy_only=False)[known].astype(np.intp)] = True
+    return matrix, int(np.count_nonzero(present & ~known))
+
+
+def selection_matrix_from_flags(batch: pa.RecordBatch) -> np.ndarray:
+    """
+    Build the selection matrix from boolean columns named after condition keys.
+    Missing columns and nulls count as not selected.
+    """
+    matrix = np.zeros((batch.num_rows, len(CONDITION_KEYS)), dtype=bool)
+    for name in batch.schema.names:
+        if name in CONDITION_INDEX:
+            flags = pc.cast(batch.column(name), pa.bool_()).fill_null(False)
+            matrix[:, CONDITION_INDEX[name]] = flags.to_numpy(zero_copy_only=False)
+    return matrix
+
+
+def selection_matrix_from_attributes(batch: pa.RecordBatch) -> np.ndarray | None:
+    """
+    Derived condition keys for the raw attribute columns of a batch, or None
+    if it has none. Nulls count as missing.
+    """
+    columns = {
+        name: pc.cast(batch.column(name), pa.float64()).to_numpy(zero_copy_only=False)
+        for name in ATTRIBUTES if name in batch.schema.names
+    }
+    return derive_selection_matrix(columns) if columns else None
+
+
+def selection_matrix_for_batch(
+    batch: pa.RecordBatch, conditions_column: str = "conditions", separator: str = ";"
+) -> tuple[np.ndarray, int, set[str]]:
+    """
+    The full selection matrix of a batch: its condition keys (or flag
+    columns) plus the keys derived from raw attributes. Returns it with the
+    number of unknown keys skipped and the names of the columns it consumed.
+    """
+    if conditions_column in batch.schema.names:
+        matrix, unknown = selection_matrix_from_keys(batch.column(conditions_column), separator)
+        input_columns = {conditions_column}
+    else:
+        matrix, unknown = selection_matrix_from_flags(batch), 0
+        input_columns = set(CONDITION_INDEX)
+    derived = selection_matrix_from_attributes(batch)
+    if derived is not None:
+        matrix |= derived
+    return matrix, unknown, input_columns
+
+
+##############################################################################
+# 3) SCORING
+##############################################################################
+def score_batch(
+    batch: pa.RecordBatch,
+    conditions_column: str = "conditions",
+    separator: str = ";",
+    apply_rules: bool = True,
+    scorer: ParallelScorer | None = None,
+) -> tuple[pa.RecordBatch, int]:
+    """
+    Score one record batch. Returns the passed-through columns followed by the
+    RESULT_COLUMNS, plus the number of unknown condition keys seen. With
+    apply_rules (the default, as in the app), the combination rules in
+    ukmec.rules escalate the result.
+    A scorer spreads the scoring over its process pool.
+    """
+    matrix, unknown, input_columns = selection_matrix_for_batch(batch, conditions_column, separator)
+    if scorer is not None:
+        worst = scorer.score(matrix, apply_rules)
+    else:
+        worst = evaluate_cohort(matrix)
+        if apply_rules:
+            worst, _ = current_rules().apply_cohort(selection_matrix_to_words(matrix), worst)
+    worst = worst.reshape(batch.num_rows, -1)
+
+    kept = [name for name in batch.schema.names if name not in input_columns]
+    arrays = [batch.column(name) for name in kept]
+    arrays += [pa.array(worst[:, j]) for j in range(worst.shape[1])]
+    return pa.RecordBatch.from_arrays(arrays, names=kept + RESULT_COLUMNS), unknown
+
+
+def evaluate_file(
+    input_path: str,
+    output_path: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    conditions_column: str = "conditions",
+    separator: str = ";",
+    apply_rules: bool = True,
+    workers: int = 1,
+) -> BatchStats:
+    """
+    Stream input_path through score_batch() into output_path (CSV or Parquet,
+    chosen by extension), one record batch at a time. With workers other
+    than 1 (0 = one per core), batches are scored by a ParallelScorer.
+    """
+    stats = BatchStats()
+    writer = None
+    scorer = ParallelScorer(workers or None) if workers != 1 else None
+    start = time.perf_counter()
+    try:
+        for batch in iter_record_batches(input_path, batch_size):
+            scored, unknown = score_batch(batch, conditions_column, separator, apply_rules, scorer)
+            if writer is None:
+                if output_path.endswith(".parquet"):
+                    writer = pq.ParquetWriter(output_path, scored.schema)
+                else:
+                    writer = pa_csv.CSVWriter(output_path, scored.schema)
+            writer.write_batch(scored)
+            stats.rows += batch.num_rows
+            stats.batches += 1
+            stats.unknown_keys += unknown
+    finally:
+        if writer is not None:
+            writer.close()
+        if scorer is not None:
+            scorer.close()
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Score a cohort file against UKMEC.")
+    parser.add_argument("input", help="CSV or Parquet file of patient rows")
+    parser.add_argument("output", help="CSV or Parquet file to write")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--conditions-column", default="conditions")
+    parser.add_argument("--separator", default=";")
+    parser.add_argument("--apply-rules", action=argparse.BooleanOptionalAction, default=True,
+                        help="escalate results with the combination rules (ukmec.rules), "
+                             "as the app does (default: on)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="score in this many processes (0 = one per core)")
+    args = parser.parse_args(argv)
+
+    stats = evaluate_file(
+        args.input, args.output, args.batch_size, args.conditions_column, args.separator,
+        args.apply_rules, args.workers,
+    )
+    print(
+        f"Scored {stats.rows} rows in {stats.batches} batches, "
+        f"{stats.seconds:.2f}s ({stats.rows_per_second:,.0f} rows/s); "
+        f"{stats.unknown_keys} unknown condition keys skipped.",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+"""
+UKMEC evaluation engine.
+
+Holds the UKMEC categories as a dense tensor and combines conditions by
+taking the worst category. Depends only on numpy -- never on Streamlit -- so
+batch jobs, services and CLIs can import it cheaply.
+"""
+import hashlib
+import os
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+from .data import METHODS, UKMEC_DATA
+from .tablefile import TableWatcher, read_table
+
+
+class UnknownMethodError(ValueError):
+    """Raised when a method name is not one of METHODS."""
+
+    def __init__(self, method: str):
+        super().__init__(f"Unknown method: {method}")
+        self.method = method
+
+
+##############################################################################
+# 1) CATEGORY TABLE
+##############################################################################
+# The categories are held as a dense int8 tensor of shape (conditions,
+# methods, 2), where the last axis is (I, C). Cells that don't apply to a
+# method -- the (None, None) rows such as PP_SEPSIS for the hormonal methods
+# -- hold NOT_APPLICABLE, which sits below every real category, so a plain
+# max-reduction skips them.
+#
+# At import the tensor is memory-mapped from a table file (UKMEC_TABLE, or
+# the one shipped next to this module), falling back to compiling
+# UKMEC_DATA. The active table can be swapped at runtime by
+# install_table(); evaluations take one reference to it, so a swap never
+# mixes two tables within a call. Condition keys and methods are fixed by
+# the code -- a table file must match them.
+
+NOT_APPLICABLE = 0
+PHASES = ("I", "C")      # the tensor's last axis: initiation, continuation
+
+TABLE_ENV = "UKMEC_TABLE"
+DEFAULT_TABLE_PATH = os.path.join(os.path.dirname(__file__), "ukmec_table.ukt")
+
+CONDITION_KEYS = list(UKMEC_DATA)
+CONDITION_INDEX = {key: i for i, key in enumerate(CONDITION_KEYS)}
+METHOD_INDEX = {method: j for j, method in enumerate(METHODS)}
+
+
+def compile_category_tensor(data: dict) -> np.ndarray:
+    """
+    Build the read-only (conditions x methods x I/C) int8 tensor from a
+    UKMEC_DATA-style dict, in the dict's key order.
+
+    Missing methods and None categories become NOT_APPLICABLE.
+    """
+    tensor = np.full((len(data), len(METHODS), 2), NOT_APPLICABLE, dtype=np.int8)
+    for i, method_map in enumerate(data.values()):
+        for method, cat_tuple in method_map.items():
+            if method not in METHOD_INDEX or cat_tuple is None:
+                continue
+            for phase, cat_value in enumerate(cat_tuple):
+                if cat_value is not None:
+                    tensor[i, METHOD_INDEX[method], phase] = cat_value
+    tensor.setflags(write=False)
+    return tensor
+
+
+def table_version(tensor: np.ndarray, condition_keys) -> str:
+    """Short content hash of a compiled table; caches key on it."""
+    digest = hashlib.sha1("\n".join(condition_keys).encode())
+    digest.update(np.ascontiguousarray(tensor).tobytes())
+    return digest.hexdigest()[:12]
+
+
+@dataclass(frozen=True)
+class CategoryTable:
+    tensor: np.ndarray
+    version: str
+    label: str
+    source: str  # file path, or "builtin"
+
+
+def builtin_table() -> CategoryTable:
+    """The table compiled from the UKMEC_DATA literal."""
+    tensor = compile_category_tensor(UKMEC_DATA)
+    return CategoryTable(tensor, table_version(tensor, CONDITION_KEYS), "UKMEC_DATA", "builtin")
+
+
+def load_table(path: str) -> CategoryTable:
+    """Memory-map and validate a table file; raises TableFileError."""
+    table_file = read_table(path, CONDITION_KEYS, METHODS)
+    return CategoryTable(
+        table_file.tensor,
+        table_version(table_file.tensor, CONDITION_KEYS),
+        table_file.label,
+        table_file.path,
+    )
+
+
+def install_table(table: CategoryTable):
+    """Make `table` the active one for every later evaluation."""
+    global _TABLE, CATEGORY_TENSOR, TABLE_VERSION
+    if table.tensor.shape != (len(CONDITION_KEYS), len(METHODS), 2):
+        raise ValueError(f"Table shape {table.tensor.shape} doesn't match the engine")
+    with _install_lock:
+        _TABLE = table
+        CATEGORY_TENSOR, TABLE_VERSION = table.tensor, table.version
+
+
+def current_table() -> CategoryTable:
+    return _TABLE
+
+
+def reload_table(path: str) -> CategoryTable:
+    """load_table() + install_table(); the old table stays if loading fails."""
+    table = load_table(path)
+    install_table(table)
+    return table
+
+
+def watch_table(interval: float = 2.0) -> TableWatcher | None:
+    """
+    Start a thread that hot-reloads the active table file when it is
+    replaced. Returns None if the active table didn't come from a file.
+    """
+    source = _TABLE.source
+    if source == "builtin":
+        return None
+    return TableWatcher(source, reload_table, interval).start()
+
+
+def _startup_table() -> CategoryTable:
+    path = os.environ.get(TABLE_ENV)
+    if path:
+        return load_table(path)
+    if os.path.exists(DEFAULT_TABLE_PATH):
+        return load_table(DEFAULT_TABLE_PATH)
+    return builtin_table()
+
+
+_install_lock = threading.Lock()
+_TABLE = CATEGORY_TENSOR = TABLE_VERSION = None
+install_table(_startup_table())
+
+##############################################################################
+# 2) BITMASK SELECTIONS
+##############################################################################
+# Condition key i (its row in CONDITION_KEYS) owns bit i, so a selection is
+# one Python int. New conditions must be appended to the table to keep the
+# existing bits stable. For cohorts, the same bits are packed into MASK_WORDS
+# little-endian uint64 words per patient.
+
+CONDITION_BITS = {key: 1 << i for i, key in enumerate(CONDITION_KEYS)}
+FULL_MASK = (1 << len(CONDITION_KEYS)) - 1
+MASK_WORDS = (len(CONDITION_KEYS) + 63) // 64
+_MASK_BYTES = (len(CONDITION_KEYS) + 7) // 8
+
+
+def selection_to_mask(chosen_conditions) -> int:
+    """Bitmask of the known keys in chosen_conditions; unknown keys are skipped."""
+    mask = 0
+    for key in chosen_conditions:
+        mask |= CONDITION_BITS.get(key, 0)
+    return mask
+
+
+def mask_to_row_mask(mask: int) -> np.ndarray:
+    """Boolean vector over CONDITION_KEYS for a selection bitmask."""
+    packed = np.frombuffer((mask & FULL_MASK).to_bytes(_MASK_BYTES, "little"), dtype=np.uint8)
+    return np.unpackbits(packed, bitorder="little")[:len(CONDITION_KEYS)].view(bool)
+
+
+def mask_to_words(mask: int) -> np.ndarray:
+    """A selection bitmask as a (MASK_WORDS,) uint64 array."""
+    return np.frombuffer((mask & FULL_MASK).to_bytes(MASK_WORDS * 8, "little"), dtype="<u8")
+
+
+def selection_matrix_to_words(selection_matrix: np.ndarray) -> np.ndarray:
+    """Pack a boolean (patients x CONDITION_KEYS) matrix into (patients, MASK_WORDS) uint64."""
+    packed = np.packbits(selection_matrix, axis=1, bitorder="little")
+    padded = np.zeros((len(selection_matrix), MASK_WORDS * 8), dtype=np.uint8)
+    padded[:, :packed.shape[1]] = packed
+    return padded.view("<u8")
+
+
+def words_to_selection_matrix(words: np.ndarray) -> np.ndarray:
+    """Unpack (patients, MASK_WORDS) uint64 selections into a boolean matrix."""
+    bits = np.unpackbits(np.ascontiguousarray(words, dtype="<u8").view(np.uint8), axis=1, bitorder="little")
+    return bits[:, :len(CONDITION_KEYS)].astype(bool)
+
+
+def mask_to_selection(mask: int) -> list[str]:
+    """The condition keys set in mask, in CONDITION_KEYS order."""
+    return [CONDITION_KEYS[i] for i in np.flatnonzero(mask_to_row_mask(mask))]
+
+##############################################################################
+# 3) HELPER: COMBINE MULTIPLE CONDITIONS
+##############################################################################
+def evaluate_all_methods(chosen_conditions, table: CategoryTable | None = None) -> np.ndarray:
+    """
+    Worst (max) category for every method and both phases at once.
+
+    Returns an int8 array of shape (len(METHODS), 2), indexed by
+    METHOD_INDEX on the first axis; column 0 is Initiation, column 1 is
+    Continuation. Unknown condition keys are skipped, and a method with no
+    applicable condition comes out as 1. `table` defaults to the active one.
+    """
+    tensor = (table or _TABLE).tensor
+    rows = [CONDITION_INDEX[k] for k in chosen_conditions if k in CONDITION_INDEX]
+    return tensor[rows].max(axis=0, initial=1)
+
+
+def evaluate_mask(mask: int, table: CategoryTable | None = None) -> np.ndarray:
+    """evaluate_all_methods() for a selection bitmask."""
+    return (table or _TABLE).tensor[mask_to_row_mask(mask)].max(axis=0, initial=1)
+
+
+def evaluate_with_provenance(
+    chosen_conditions, table: CategoryTable | None = None
+) -> tuple[np.ndarray, tuple]:
+    """
+    evaluate_all_methods() plus the conditions behind each result.
+
+    Returns (worst, drivers): worst as from evaluate_all_methods(), and
+    drivers[j][phase] the chosen condition keys that sit at that worst
+    category, in selection order. Cells at category 1 have no drivers.
+    Both come from one max over the selected rows of the tensor.
+    """
+    keys = [k for k in dict.fromkeys(chosen_conditions) if k in CONDITION_INDEX]
+    selected = (table or _TABLE).tensor[[CONDITION_INDEX[k] for k in keys]]
+    worst = selected.max(axis=0, initial=1)
+    at_worst = (selected == worst) & (worst > 1)
+
+    drivers = [[[], []] for _ in METHODS]
+    methods, phases, rows = np.nonzero(at_worst.transpose(1, 2, 0))
+    for j, phase, i in zip(methods.tolist(), phases.tolist(), rows.tolist()):
+        drivers[j][phase].append(keys[i])
+    return worst, tuple(tuple(tuple(cell) for cell in method) for method in drivers)
+
+
+def evaluate_cohort(selection_matrix: np.ndarray, table: CategoryTable | None = None) -> np.ndarray:
+    """
+    Vectorized evaluate_all_methods() for many patients at once.
+
+    selection_matrix is a boolean (patients x len(CONDITION_KEYS)) array with
+    columns in CONDITION_KEYS order. Returns an int8 array of shape
+    (patients, len(METHODS), 2).
+
+    A patient's category for a cell is 1 plus the number of levels 2..4 that
+    at least one selected condition reaches, so the whole cohort is scored
+    with a single matrix product against the per-level threshold masks.
+    """
+    n_patients = selection_matrix.shape[0]
+    levels = np.arange(2, 5, dtype=np.int8)
+    cells = (table or _TABLE).tensor.reshape(len(CONDITION_KEYS), -1)
+    reaches = (cells[:, None, :] >= levels[None, :, None]).reshape(len(CONDITION_KEYS), -1)
+    hits = selection_matrix.astype(np.float32) @ reaches.astype(np.float32)
+    worst = 1 + (hits > 0).reshape(n_patients, len(levels), cells.shape[1]).sum(axis=1, dtype=np.int8)
+    return worst.reshape(n_patients, len(METHODS), 2)
+
+
+def results_json(worst: np.ndarray) -> dict:
+    """One patient's (methods x 2) result as {method: {"I": .., "C": ..}}."""
+    return {
+        method: {"I": int(worst[j, 0]), "C": int(worst[j, 1])}
+        for j, method in enumerate(METHODS)
+    }
+
+
+def combine_ukmec_categories(
+    chosen_method: str,
+    chosen_conditions: list[str],
+    is_initiation: bool
+) -> int:
+    """
+    For the chosen method, pick the worst (max) category among the chosen
+    conditions. Thin wrapper over evaluate_all_methods().
+
+    Conditions that are unknown or N/A for the method are skipped; an unknown
+    method raises UnknownMethodError.
+    """
+    if chosen_method not in METHOD_INDEX:
+        raise UnknownMethodError(chosen_method)
+
+    phase = 0 if is_initiation else 1
+    return int(evaluate_all_methods(chosen_conditions)[METHOD_INDEX[chosen_method], phase])
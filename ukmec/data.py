@@ -0,0 +1,672 @@
+"""
+UKMEC 2016 reference data: category definitions, methods and the
+condition table. Plain Python literals only, so importing it is free.
+"""
+
+##############################################################################
+# 1) UKMEC CATEGORY DEFINITIONS
+##############################################################################
+CATEGORY_DEFINITIONS = {
+    1: (
+        "UKMEC 1: A condition for which there is no restriction "
+        "for the use of the method."
+    ),
+    2: (
+        "UKMEC 2: A condition where the advantages of using the method "
+        "generally outweigh the theoretical or proven risks."
+    ),
+    3: (
+        "UKMEC 3: A condition where the theoretical or proven risks "
+        "usually outweigh the advantages of using the method. "
+        "Use of the method requires expert clinical judgement and/or referral "
+        "to a specialist, since the method is not usually recommended unless "
+        "other more appropriate methods are not available or not acceptable."
+    ),
+    4: (
+        "UKMEC 4: A condition which represents an unacceptable health risk "
+        "if the method is used."
+    ),
+}
+
+INITIATION_DEFINITION = (
+    "**Initiation (I)** = Starting the method by a woman who has a specific medical condition."
+)
+CONTINUATION_DEFINITION = (
+    "**Continuation (C)** = Continuing the method already in use when a woman "
+    "develops a new medical condition."
+)
+
+METHODS = [
+    "Cu-IUD",
+    "LNG-IUS",
+    "IMP",
+    "DMPA",
+    "POP",
+    "CHC",
+    "Female Sterilization"
+]
+
+##############################################################################
+# 2) GIANT UKMEC DATA DICTIONARY
+##############################################################################
+# Each key is a unique condition code (e.g. "BREASTFEEDING_0_TO_6_WEEKS").
+# The value is a dict: {method: (initiation_cat, continuation_cat), ...} for all 7 methods.
+#
+# This literal fixes the condition keys and their order, and seeds the
+# shipped table file (ukmec_table.ukt, built with `python -m ukmec.tablecli
+# compile`). At runtime the categories come from that file, so corrections
+# go there, not here.
+# 
+# Transcribed from the final UKMEC summary table plus postpartum/abortion postpartum expansions, etc.
+# 
+# We store (I, C) even if they are the same, for consistency.
+
+UKMEC_DATA = {
+
+    # ---------------------------------------------------------------------
+    # PERSONAL CHARACTERISTICS & REPRODUCTIVE HISTORY
+    # ---------------------------------------------------------------------
+    # Age
+    "AGE_MENARCHE_TO_LT_20": {
+        "Cu-IUD": (2,2), "LNG-IUS": (2,2), "IMP": (1,1), "DMPA": (2,2),
+        "POP": (1,1), "CHC": (1,1), "Female Sterilization": (1,1),
+    },
+    "AGE_GE_20": {
+        "Cu-IUD": (1,1), "LNG-IUS": (1,1), "IMP": (1,1), "DMPA": (1,1),
+        "POP": (1,1), "CHC": (1,1), "Female Sterilization": (1,1),
+    },
+
+    # Parity
+    "PARITY_NULLIPAROUS": {
+        "Cu-IUD": (1,1), "LNG-IUS": (1,1), "IMP": (1,1), "DMPA": (1,1),
+        "POP": (1,1), "CHC": (1,1), "Female Sterilization": (1,1),
+    },
+    "PARITY_PAROUS": {
+        "Cu-IUD": (1,1), "LNG-IUS": (1,1), "IMP": (1,1), "DMPA": (1,1),
+        "POP": (1,1), "CHC": (1,1), "Female Sterilization": (1,1),
+    },
+
+    # Breastfeeding: 0 to <6 weeks
+    "BREASTFEEDING_0_TO_6_WEEKS": {
+        "Cu-IUD": (1,1), "LNG-IUS": (1,1), "IMP": (2,2), "DMPA": (1,1),
+        "POP": (4,4), "CHC": (4,4), "Female Sterilization": (1,1),
+    },
+    # Breastfeeding: ≥6 weeks to <6 months (primarily BF)
+    "BREASTFEEDING_6_WEEKS_TO_6_MONTHS": {
+        "Cu-IUD": (1,1), "LNG-IUS": (1,1), "IMP": (1,1), "DMPA": (1,1),
+        "POP": (2,2), "CHC": (2,2), "Female Sterilization": (1,1),
+    },
+    # Breastfeeding: ≥6 months
+    "BREASTFEEDING_GE_6_MONTHS": {
+        "Cu-IUD": (1,1), "LNG-IUS": (1,1), "IMP": (1,1), "DMPA": (1,1),
+        "POP": (1,1), "CHC": (1,1), "Female Sterilization": (1,1),
+    },
+
+    # Postpartum (non-bf), 0 to <3 weeks + risk factors for VTE
+    "PP_0_TO_3_WEEKS_VTE": {
+        "Cu-IUD": (1,1), "LNG-IUS": (1,1), "IMP": (2,2), "DMPA": (1,1),
+        "POP": (4,4), "CHC": (4,4), "Female Sterilization": (1,1),
+    },
+    # Postpartum (non-bf), 0 to <3 weeks NO VTE
+    "PP_0_TO_3_WEEKS_NO_VTE": {
+        "Cu-IUD": (1,1), "LNG-IUS": (1,1), "IMP": (2,2), "DMPA": (1,1),
+        "POP": (3,3), "CHC": (3,3), "Female Sterilization": (1,1),
+    },
+    # Postpartum (non-bf), 3 to <6 weeks + VTE
+    "PP_3_TO_6_WEEKS_VTE": {
+        "Cu-IUD": (1,1), "LNG-IUS": (1,1), "IMP": (2,2), "DMPA": (1,1),
+        "POP": (3,3), "CHC": (3,3), "Female Sterilization": (1,1),
+    },
+    # Postpartum (non-bf), 3 to <6 weeks NO VTE
+    "PP_3_TO_6_WEEKS_NO_VTE": {
+        "Cu-IUD": (1,1), "LNG-IUS": (1,1), "IMP": (1,1), "DMPA": (1,1),
+        "POP": (2,2), "CHC": (2,2), "Female Sterilization": (1,1),
+    },
+    # Postpartum (non-bf), ≥6 weeks
+    "PP_GE_6_WEEKS": {
+        "Cu-IUD": (1,1), "LNG-IUS": (1,1), "IMP": (1,1), "DMPA": (1,1),
+        "POP": (1,1), "CHC": (1,1), "Female Sterilization": (1,1),
+    },
+
+    # Postpartum IUC insertion:
+    "PP_0_TO_48H_IUC": {
+        "Cu-IUD": (1,1), "LNG-IUS": (1,1), "IMP": (None,None), "DMPA": (None,None),
+        "POP": (None,None), "CHC": (None,None), "Female Sterilization": (None,None),
+    },
+    "PP_48H_TO_4W_IUC": {
+        "Cu-IUD": (3,3), "LNG-IUS": (3,3), "IMP": (None,None), "DMPA": (None,None),
+        "POP": (None,None), "CHC": (None,None), "Female Sterilization": (None,None),
+    },
+    "PP_SEPSIS": {
+        "Cu-IUD": (4,4), "LNG-IUS": (4,4), "IMP": (None,None), "DMPA": (None,None),
+        "POP": (None,None), "CHC": (None,None), "Female Sterilization": (None,None),
+    },
+
+    # Post-abortion
+    "ABORT_1ST_TRIM": {
+        "Cu-IUD": (1,1), "LNG-IUS": (1,1), "IMP": (1,1), "DMPA": (1,1),
+        "POP": (1,1), "CHC": (1,1), "Female Sterilization": (1,1),
+    },
+    "ABORT_2ND_TRIM": {
+        "Cu-IUD": (2,2), "LNG-IUS": (2,2), "IMP": (1,1), "DMPA": (1,1),
+        "POP": (1,1), "CHC": (1,1), "Female Sterilization": (1,1),
+    },
+    "ABORT_SEPSIS": {
+        "Cu-IUD": (4,4), "LNG-IUS": (4,4), "IMP": (1,1), "DMPA": (1,1),
+        "POP": (1,1), "CHC": (1,1), "Female Sterilization": (1,1),
+    },
+
+    # Past ectopic
+    "PAST_ECTOPIC": {
+        "Cu-IUD": (1,1), "LNG-IUS": (1,1), "IMP": (1,1), "DMPA": (1,1),
+        "POP": (1,1), "CHC": (1,1), "Female Sterilization": (1,1),
+    },
+
+    # History pelvic surgery => all 1
+    "HX_PELVIC_SURG": {
+        "Cu-IUD": (1,1), "LNG-IUS": (1,1), "IMP": (1,1), "DMPA": (1,1),
+        "POP": (1,1), "CHC": (1,1), "Female Sterilization": (1,1),
+    },
+
+    # Smoking
+    "SMOKE_AGE_LT_35": {
+        "Cu-IUD": (1,1), "LNG-IUS": (1,1), "IMP": (1,1), "DMPA": (1,1),
+        "POP": (1,1), "CHC": (2,2), "Female Sterilization": (1,1),
+    },
+    "SMOKE_AGE_GE_35_LT15": {
+        "Cu-IUD": (1,1), "LNG-IUS": (1,1), "IMP": (1,1), "DMPA": (1,1),
+        "POP": (1,1), "CHC": (3,3), "Female Sterilization": (1,1),
+    },
+    "SMOKE_AGE_GE_35_GE15": {
+        "Cu-IUD": (1,1), "LNG-IUS": (1,1), "IMP": (1,1), "DMPA": (1,1),
+        "POP": (1,1), "CHC": (4,4), "Female Sterilization": (1,1),
+    },
+    "SMOKE_AGE_GE_35_STOP_LT1": {
+        "Cu-IUD": (1,1), "LNG-IUS": (1,1), "IMP": (1,1), "DMPA": (1,1),
+        "POP": (1,1), "CHC": (3,3), "Female Sterilization": (1,1),
+    },
+    "SMOKE_AGE_GE_35_STOP_GE1": {
+        "Cu-IUD": (1,1), "LNG-IUS": (1,1), "IMP": (1,1), "DMPA": (1,1),
+        "POP": (1,1), "CHC": (2,2), "Female Sterilization": (1,1),
+    },
+
+    # Obesity (BMI)
+    "OBESITY_BMI_30_34": {
+        "Cu-IUD": (1,1), "LNG-IUS": (1,1), "IMP": (1,1), "DMPA": (1,1),
+        "POP": (1,1), "CHC": (2,2), "Female Sterilization": (1,1),
+    },
+    "OBESITY_BMI_GE_35": {
+        "Cu-IUD": (1,1), "LNG-IUS": (1,1), "IMP": (1,1), "DMPA": (1,1),
+        "POP": (1,1), "CHC": (3,3), "Female Sterilization": (1,1),
+    },
+
+    # ---------------------------------------------------------------------
+    # ORGAN TRANSPLANT, CARDIO, HTN, etc. (Skipping comment, just listing)
+    # ---------------------------------------------------------------------
+    "TRANSPLANT_COMPLICATED": {
+        "Cu-IUD": (2,2),"LNG-IUS": (2,2),"IMP": (2,2),"DMPA": (3,3),
+        "POP": (2,2),"CHC": (3,3),"Female Sterilization": (2,2),
+    },
+    "TRANSPLANT_UNCOMPLICATED": {
+        "Cu-IUD": (2,2),"LNG-IUS": (2,2),"IMP": (2,2),"DMPA": (2,2),
+        "POP": (2,2),"CHC": (2,2),"Female Sterilization": (2,2),
+    },
+
+    "CVD_MULTIPLE_RISK": {
+        "Cu-IUD": (1,1),"LNG-IUS": (2,2),"IMP": (2,2),"DMPA": (3,3),
+        "POP": (2,2),"CHC": (3,3),"Female Sterilization": (1,1),
+    },
+
+    # Hypertension
+    "HTN_ADEQ_CONTROL": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (2,2),
+        "POP": (1,1),"CHC": (3,3),"Female Sterilization": (1,1),
+    },
+    "HTN_SYST_140_159_DIA_90_99": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (3,3),"Female Sterilization": (1,1),
+    },
+    "HTN_SYST_GE160_DIA_GE100": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (2,2),
+        "POP": (1,1),"CHC": (4,4),"Female Sterilization": (1,1),
+    },
+    "HTN_VASC_DISEASE": {
+        "Cu-IUD": (1,1),"LNG-IUS": (2,2),"IMP": (2,2),"DMPA": (3,3),
+        "POP": (2,2),"CHC": (4,4),"Female Sterilization": (1,1),
+    },
+    "HX_HIGH_BP_PREG": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (2,2),"Female Sterilization": (1,1),
+    },
+
+    "IHD_CURRENT_OR_HISTORY": {
+        "Cu-IUD": (1,1),"LNG-IUS": (2,2),"IMP": (2,2),"DMPA": (3,3),
+        "POP": (2,2),"CHC": (4,4),"Female Sterilization": (1,1),
+    },
+    "STROKE_TIA": {
+        "Cu-IUD": (1,1),"LNG-IUS": (2,2),"IMP": (2,2),"DMPA": (3,3),
+        "POP": (2,2),"CHC": (4,4),"Female Sterilization": (1,1),
+    },
+
+    "DYSLIPIDEMIAS": {
+        "Cu-IUD": (1,1),"LNG-IUS": (2,2),"IMP": (2,2),"DMPA": (2,2),
+        "POP": (2,2),"CHC": (2,2),"Female Sterilization": (1,1),
+    },
+
+    # VTE
+    "VTE_HISTORY": {
+        "Cu-IUD": (1,1),"LNG-IUS": (2,2),"IMP": (2,2),"DMPA": (2,2),
+        "POP": (2,2),"CHC": (4,4),"Female Sterilization": (1,1),
+    },
+    "VTE_CURRENT_ANTICOAG": {
+        "Cu-IUD": (1,1),"LNG-IUS": (2,2),"IMP": (2,2),"DMPA": (2,2),
+        "POP": (2,2),"CHC": (4,4),"Female Sterilization": (1,1),
+    },
+    "VTE_FHX_1ST_LT_45": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (3,3),"Female Sterilization": (1,1),
+    },
+    "VTE_FHX_1ST_GE_45": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (2,2),"Female Sterilization": (1,1),
+    },
+    "VTE_MAJ_SURG_PROLONG_IMMOB": {
+        "Cu-IUD": (1,1),"LNG-IUS": (2,2),"IMP": (2,2),"DMPA": (2,2),
+        "POP": (2,2),"CHC": (4,4),"Female Sterilization": (1,1),
+    },
+    "VTE_MAJ_SURG_NO_IMMOB": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (2,2),"Female Sterilization": (1,1),
+    },
+    "VTE_MINOR_SURG_NO_IMMOB": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (1,1),
+    },
+    "VTE_IMMOBILITY": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (3,3),"Female Sterilization": (1,1),
+    },
+    "SVT_VARICOSE": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (1,1),
+    },
+    "SVT_THROMBOSIS": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (2,2),"Female Sterilization": (1,1),
+    },
+    "THROMBO_MUTATIONS": {
+        "Cu-IUD": (1,1),"LNG-IUS": (2,2),"IMP": (2,2),"DMPA": (2,2),
+        "POP": (2,2),"CHC": (4,4),"Female Sterilization": (1,1),
+    },
+
+    # Valvular / Congenital
+    "VALV_CONG_UNCOMPLICATED": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (2,2),"Female Sterilization": (1,1),
+    },
+    "VALV_CONG_COMPLICATED": {
+        "Cu-IUD": (2,2),"LNG-IUS": (2,2),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (4,4),"Female Sterilization": (2,2),
+    },
+
+    # Cardiomyopathy
+    "CARDIOMYO_NORMAL": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (2,2),"Female Sterilization": (1,1),
+    },
+    "CARDIOMYO_IMPAIRED": {
+        "Cu-IUD": (2,2),"LNG-IUS": (2,2),"IMP": (2,2),"DMPA": (2,2),
+        "POP": (2,2),"CHC": (4,4),"Female Sterilization": (2,2),
+    },
+
+    # Arrhythmias
+    "AF": {
+        "Cu-IUD": (1,1),"LNG-IUS": (2,2),"IMP": (2,2),"DMPA": (2,2),
+        "POP": (2,2),"CHC": (4,4),"Female Sterilization": (1,1),
+    },
+    "LONG_QT": {
+        "Cu-IUD": (1,1),"LNG-IUS": (2,2),"IMP": (1,1),"DMPA": (2,2),
+        "POP": (1,1),"CHC": (2,2),"Female Sterilization": (1,1),
+    },
+
+    # NEURO
+    "HEADACHE_NON_MIGRAINE": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (2,2),"Female Sterilization": (1,1),
+    },
+    "MIGRAINE_NO_AURA": {
+        "Cu-IUD": (1,1),"LNG-IUS": (2,2),"IMP": (2,2),"DMPA": (2,2),
+        "POP": (1,1),"CHC": (3,3),"Female Sterilization": (1,1),
+    },
+    "MIGRAINE_WITH_AURA": {
+        "Cu-IUD": (1,1),"LNG-IUS": (2,2),"IMP": (2,2),"DMPA": (2,2),
+        "POP": (2,2),"CHC": (4,4),"Female Sterilization": (1,1),
+    },
+    "MIGRAINE_AURA_HX_5Y": {
+        "Cu-IUD": (1,1),"LNG-IUS": (2,2),"IMP": (2,2),"DMPA": (2,2),
+        "POP": (2,2),"CHC": (3,3),"Female Sterilization": (1,1),
+    },
+    "IIH": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (2,2),"Female Sterilization": (1,1),
+    },
+    "EPILEPSY": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (1,1),
+    },
+
+    "DEPRESSION": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (1,1),
+    },
+
+    # BREAST & REPRO TRACT
+    # Vaginal bleeding
+    "BLEED_IRREG_NO_HEAVY": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (2,2),"DMPA": (2,2),
+        "POP": (2,2),"CHC": (1,1),"Female Sterilization": (1,1),
+    },
+    "BLEED_HEAVY_OR_PROLONGED": {
+        "Cu-IUD": (2,2),"LNG-IUS": (1,1),"IMP": (2,2),"DMPA": (2,2),
+        "POP": (2,2),"CHC": (1,1),"Female Sterilization": (1,1),
+    },
+    "UNEXPL_BLEED_BEFORE_EVAL": {
+        "Cu-IUD": (4,2),"LNG-IUS": (4,2),"IMP": (2,2),"DMPA": (2,2),
+        "POP": (2,2),"CHC": (2,2),"Female Sterilization": (2,2),
+    },
+
+    "ENDOMETRIOSIS": {
+        "Cu-IUD": (2,2),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (1,1),
+    },
+    "OVARIAN_BENIGN": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (1,1),
+    },
+    "DYSMENORRHEA_SEV": {
+        "Cu-IUD": (2,2),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (1,1),
+    },
+
+    # GTD
+    "GTD_UNDETECTABLE_HCG": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (1,1),
+    },
+    "GTD_DECREASING_HCG": {
+        "Cu-IUD": (3,3),"LNG-IUS": (3,3),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (3,3),
+    },
+    "GTD_PERSIST_ELEV": {
+        "Cu-IUD": (4,4),"LNG-IUS": (4,4),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (4,4),
+    },
+
+    "CERVICAL_ECTROPION": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (1,1),
+    },
+    "CIN": {
+        "Cu-IUD": (1,1),"LNG-IUS": (2,2),"IMP": (1,1),"DMPA": (2,2),
+        "POP": (1,1),"CHC": (2,2),"Female Sterilization": (1,1),
+    },
+    # Cervical Ca
+    "CERV_CA_AWAIT_TX_I": {
+        "Cu-IUD": (2,2),"LNG-IUS": (2,2),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (2,2),"Female Sterilization": (2,2),
+    },
+    "CERV_CA_AWAIT_TX_C": {
+        "Cu-IUD": (4,4),"LNG-IUS": (4,4),"IMP": (2,2),"DMPA": (2,2),
+        "POP": (2,2),"CHC": (2,2),"Female Sterilization": (4,4),
+    },
+    "CERV_CA_RAD_TRA": {
+        "Cu-IUD": (3,3),"LNG-IUS": (3,3),"IMP": (2,2),"DMPA": (2,2),
+        "POP": (1,1),"CHC": (2,2),"Female Sterilization": (3,3),
+    },
+
+    # Breast conditions
+    "BREAST_UNDX_MASS_I": {
+        "Cu-IUD": (1,1),"LNG-IUS": (2,2),"IMP": (2,2),"DMPA": (2,2),
+        "POP": (2,2),"CHC": (3,3),"Female Sterilization": (1,1),
+    },
+    "BREAST_UNDX_MASS_C": {
+        "Cu-IUD": (1,1),"LNG-IUS": (2,2),"IMP": (2,2),"DMPA": (2,2),
+        "POP": (2,2),"CHC": (2,2),"Female Sterilization": (1,1),
+    },
+    "BREAST_BENIGN": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (1,1),
+    },
+    "BREAST_FHX_CA": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (1,1),
+    },
+    "BREAST_BRCA_MUT": {
+        "Cu-IUD": (1,1),"LNG-IUS": (2,2),"IMP": (2,2),"DMPA": (2,2),
+        "POP": (2,2),"CHC": (3,3),"Female Sterilization": (1,1),
+    },
+    "BREAST_CA_CURRENT": {
+        "Cu-IUD": (1,1),"LNG-IUS": (4,4),"IMP": (4,4),"DMPA": (4,4),
+        "POP": (4,4),"CHC": (4,4),"Female Sterilization": (1,1),
+    },
+    "BREAST_CA_PAST": {
+        "Cu-IUD": (1,1),"LNG-IUS": (3,3),"IMP": (3,3),"DMPA": (3,3),
+        "POP": (3,3),"CHC": (3,3),"Female Sterilization": (1,1),
+    },
+
+    "ENDOMETRIAL_CA_I": {
+        "Cu-IUD": (1,4),"LNG-IUS": (1,2),"IMP": (1,2),"DMPA": (1,2),
+        "POP": (1,2),"CHC": (1,2),"Female Sterilization": (1,4),
+    },
+    "ENDOMETRIAL_CA_C": {
+        # some are from the doc: "4,2" or "2,2", we interpret carefully
+        "Cu-IUD": (1,1),"LNG-IUS": (2,2),"IMP": (2,2),"DMPA": (2,2),
+        "POP": (2,2),"CHC": (2,2),"Female Sterilization": (2,2),
+    },
+
+    "OVARIAN_CA": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (1,1),
+    },
+
+    "FIBROIDS_NO_DISTORT": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (1,1),
+    },
+    "FIBROIDS_DISTORT": {
+        "Cu-IUD": (3,3),"LNG-IUS": (3,3),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (3,3),
+    },
+    "ANAT_UTERINE_DISTORT": {
+        "Cu-IUD": (3,3),"LNG-IUS": (3,3),"IMP": (None,None),"DMPA": (None,None),
+        "POP": (None,None),"CHC": (None,None),"Female Sterilization": (3,3),
+    },
+    "ANAT_UTERINE_OTHER": {
+        "Cu-IUD": (2,2),"LNG-IUS": (2,2),"IMP": (None,None),"DMPA": (None,None),
+        "POP": (None,None),"CHC": (None,None),"Female Sterilization": (2,2),
+    },
+
+    # PID
+    "PID_PAST_NO_RISK": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (1,1),
+    },
+    "PID_CURRENT_I": {
+        "Cu-IUD": (4,4),"LNG-IUS": (4,4),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (4,4),
+    },
+    "PID_CURRENT_C": {
+        "Cu-IUD": (2,2),"LNG-IUS": (2,2),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (2,2),
+    },
+
+    # STIs
+    "STI_CHLAM_SYMPT_I": {
+        "Cu-IUD": (4,4),"LNG-IUS": (4,4),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (4,4),
+    },
+    "STI_CHLAM_SYMPT_C": {
+        "Cu-IUD": (2,2),"LNG-IUS": (2,2),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (2,2),
+    },
+    "STI_CHLAM_ASYMP_I": {
+        "Cu-IUD": (3,3),"LNG-IUS": (3,3),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (3,3),
+    },
+    "STI_CHLAM_ASYMP_C": {
+        "Cu-IUD": (2,2),"LNG-IUS": (2,2),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (2,2),
+    },
+    "STI_GONORR_I": {
+        "Cu-IUD": (4,4),"LNG-IUS": (4,4),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (4,4),
+    },
+    "STI_GONORR_C": {
+        "Cu-IUD": (2,2),"LNG-IUS": (2,2),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (2,2),
+    },
+    "STI_OTHER_CURRENT": {
+        "Cu-IUD": (2,2),"LNG-IUS": (2,2),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (2,2),
+    },
+    "STI_VAGINITIS": {
+        "Cu-IUD": (2,2),"LNG-IUS": (2,2),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (2,2),
+    },
+    "STI_INCREASED_RISK": {
+        "Cu-IUD": (2,2),"LNG-IUS": (2,2),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (2,2),
+    },
+
+    # HIV
+    "HIV_HIGH_RISK": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (1,1),
+    },
+    "HIV_INF_CD4_GE200": {
+        "Cu-IUD": (2,2),"LNG-IUS": (2,2),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (2,2),
+    },
+    "HIV_INF_CD4_LT200_I": {
+        "Cu-IUD": (3,3),"LNG-IUS": (3,3),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (3,3),
+    },
+    "HIV_INF_CD4_LT200_C": {
+        "Cu-IUD": (2,2),"LNG-IUS": (2,2),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (2,2),
+    },
+
+    # TB
+    "TB_NON_PELVIC": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (1,1),
+    },
+    "TB_PELVIC_I": {
+        "Cu-IUD": (4,4),"LNG-IUS": (4,4),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (4,4),
+    },
+    "TB_PELVIC_C": {
+        "Cu-IUD": (3,3),"LNG-IUS": (3,3),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (3,3),
+    },
+
+    # ENDOCRINE: Diabetes
+    "DM_GESTATIONAL": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (1,1),
+    },
+    "DM_NON_VASC_NON_INSULIN": {
+        "Cu-IUD": (1,1),"LNG-IUS": (2,2),"IMP": (2,2),"DMPA": (2,2),
+        "POP": (2,2),"CHC": (2,2),"Female Sterilization": (1,1),
+    },
+    "DM_NON_VASC_INSULIN": {
+        "Cu-IUD": (1,1),"LNG-IUS": (2,2),"IMP": (2,2),"DMPA": (2,2),
+        "POP": (2,2),"CHC": (2,2),"Female Sterilization": (1,1),
+    },
+    "DM_NEURO_RETINO": {
+        "Cu-IUD": (1,1),"LNG-IUS": (2,2),"IMP": (2,2),"DMPA": (2,2),
+        "POP": (2,2),"CHC": (3,3),"Female Sterilization": (1,1),
+    },
+    "DM_OTHER_VASC": {
+        "Cu-IUD": (1,1),"LNG-IUS": (2,2),"IMP": (2,2),"DMPA": (2,2),
+        "POP": (2,2),"CHC": (3,3),"Female Sterilization": (1,1),
+    },
+
+    # Viral hepatitis
+    "HEP_ACUTE_FLARE_I": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (3,3),"Female Sterilization": (1,1),
+    },
+    "HEP_ACUTE_FLARE_C": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (2,2),"Female Sterilization": (1,1),
+    },
+    "HEP_CARRIER": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (1,1),
+    },
+    "HEP_CHRONIC": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (1,1),
+    },
+
+    # Cirrhosis
+    "CIRRHOSIS_MILD": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (1,1),
+    },
+    "CIRRHOSIS_SEVERE": {
+        "Cu-IUD": (1,1),"LNG-IUS": (3,3),"IMP": (3,3),"DMPA": (3,3),
+        "POP": (3,3),"CHC": (4,4),"Female Sterilization": (1,1),
+    },
+
+    # Liver tumours
+    "LIVER_BENIGN_FNH": {
+        "Cu-IUD": (1,1),"LNG-IUS": (2,2),"IMP": (2,2),"DMPA": (2,2),
+        "POP": (2,2),"CHC": (2,2),"Female Sterilization": (1,1),
+    },
+    "LIVER_BENIGN_HCA": {
+        "Cu-IUD": (1,1),"LNG-IUS": (3,3),"IMP": (3,3),"DMPA": (3,3),
+        "POP": (3,3),"CHC": (4,4),"Female Sterilization": (1,1),
+    },
+    "LIVER_MALIGNANT": {
+        "Cu-IUD": (1,1),"LNG-IUS": (3,3),"IMP": (3,3),"DMPA": (3,3),
+        "POP": (3,3),"CHC": (4,4),"Female Sterilization": (1,1),
+    },
+
+    "IBD": {
+        "Cu-IUD": (1,1),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (2,2),"CHC": (2,2),"Female Sterilization": (1,1),
+    },
+
+    # Anaemias
+    "THALASSAEMIA": {
+        "Cu-IUD": (2,2),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (2,2),
+    },
+    "SICKLE_CELL": {
+        "Cu-IUD": (2,2),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (2,2),"Female Sterilization": (2,2),
+    },
+    "IRON_DEF_ANAEMIA": {
+        "Cu-IUD": (2,2),"LNG-IUS": (1,1),"IMP": (1,1),"DMPA": (1,1),
+        "POP": (1,1),"CHC": (1,1),"Female Sterilization": (2,2),
+    },
+
+    # Rheumatic
+    "RA": {
+        "Cu-IUD": (1,1),"LNG-IUS": (2,2),"IMP": (2,2),"DMPA": (2,2),
+        "POP": (2,2),"CHC": (2,2),"Female Sterilization": (1,1),
+    },
+    "SLE_NO_APL": {
+        "Cu-IUD": (1,1),"LNG-IUS": (2,2),"IMP": (2,2),"DMPA": (2,2),
+        "POP": (2,2),"CHC": (2,2),"Female Sterilization": (1,1),
+    },
+    "SLE_APL": {
+        "Cu-IUD": (1,1),"LNG-IUS": (2,2),"IMP": (2,2),"DMPA": (2,2),
+        "POP": (2,2),"CHC": (4,4),"Female Sterilization": (1,1),
+    },
+
+    # Done: We have a massive dictionary covering all final summary table conditions.
+}
+
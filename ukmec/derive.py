@@ -0,0 +1,180 @@
+"""
+Derive age, parity, postpartum, smoking and BMI condition keys from raw
+patient attributes.
+
+The thresholds live in one declarative table, BANDINGS. Each Banding cuts
+a numeric attribute into bands with np.digitize and maps every band to a
+condition key (or to nothing), optionally only for rows matching some
+range conditions on other attributes -- e.g. cigarettes/day is only banded
+for smokers aged 35 or over. derive_selection_matrix() applies the whole
+table to columns of raw attributes in one vectorized pass, so a cohort
+extract goes straight to a selection matrix (and from there to bitmasks or
+evaluate_cohort()); derive_conditions() does the same for one patient.
+
+Raw attributes (booleans may be given as bools or 0/1, missing values as
+NaN; a row with a missing attribute gets no key from the bandings that use
+it):
+
+    age                  years
+    nulliparous          bool
+    postpartum           bool
+    breastfeeding        bool
+    weeks_postpartum     weeks
+    postpartum_vte_risk  bool, other VTE risk factors postpartum
+    smoker               bool, current or ex-smoker
+    cigarettes_per_day   0 for an ex-smoker
+    years_since_stopping years, ex-smokers only
+    bmi                  kg/m2
+"""
+from collections.abc import Mapping
+from dataclasses import dataclass
+
+import numpy as np
+
+from .core import CONDITION_INDEX, CONDITION_KEYS
+
+ATTRIBUTES = (
+    "age",
+    "nulliparous",
+    "postpartum",
+    "breastfeeding",
+    "weeks_postpartum",
+    "postpartum_vte_risk",
+    "smoker",
+    "cigarettes_per_day",
+    "years_since_stopping",
+    "bmi",
+)
+
+_INF = float("inf")
+
+
+@dataclass(frozen=True)
+class Banding:
+    """
+    Band `attribute` at `edges` (left-closed, as np.digitize) and emit
+    keys[band]; None emits nothing. `when` restricts the banding to rows
+    where each (attribute, low, high) holds as low <= value < high.
+    """
+    attribute: str
+    edges: tuple[float, ...]
+    keys: tuple[str | None, ...]
+    when: tuple[tuple[str, float, float], ...] = ()
+
+    def __post_init__(self):
+        if len(self.keys) != len(self.edges) + 1:
+            raise ValueError(f"{self.attribute}: need one key per band ({len(self.edges) + 1})")
+
+
+def is_true(attribute: str) -> tuple[str, float, float]:
+    return (attribute, 0.5, _INF)
+
+
+def is_false(attribute: str) -> tuple[str, float, float]:
+    return (attribute, -_INF, 0.5)
+
+
+def at_least(attribute: str, low: float) -> tuple[str, float, float]:
+    return (attribute, low, _INF)
+
+
+def below(attribute: str, high: float) -> tuple[str, float, float]:
+    return (attribute, -_INF, high)
+
+
+_NOT_BREASTFEEDING = (is_true("postpartum"), is_false("breastfeeding"))
+_SMOKER_35_PLUS = (is_true("smoker"), at_least("age", 35))
+
+BANDINGS = (
+    Banding("age", (20,), ("AGE_MENARCHE_TO_LT_20", "AGE_GE_20")),
+    Banding("nulliparous", (0.5,), ("PARITY_PAROUS", "PARITY_NULLIPAROUS")),
+
+    # Breastfeeding: <6 weeks, 6 weeks to 6 months (~24 weeks), >=6 months.
+    Banding(
+        "weeks_postpartum", (6, 24),
+        ("BREASTFEEDING_0_TO_6_WEEKS", "BREASTFEEDING_6_WEEKS_TO_6_MONTHS",
+         "BREASTFEEDING_GE_6_MONTHS"),
+        when=(is_true("postpartum"), is_true("breastfeeding")),
+    ),
+    # Not breastfeeding: <3 weeks, 3-6 weeks (both split on VTE risk), >=6 weeks.
+    Banding(
+        "weeks_postpartum", (3, 6),
+        ("PP_0_TO_3_WEEKS_VTE", "PP_3_TO_6_WEEKS_VTE", "PP_GE_6_WEEKS"),
+        when=_NOT_BREASTFEEDING + (is_true("postpartum_vte_risk"),),
+    ),
+    Banding(
+        "weeks_postpartum", (3, 6),
+        ("PP_0_TO_3_WEEKS_NO_VTE", "PP_3_TO_6_WEEKS_NO_VTE", "PP_GE_6_WEEKS"),
+        when=_NOT_BREASTFEEDING + (is_false("postpartum_vte_risk"),),
+    ),
+
+    # Smoking: under 35 is one key; from 35 it depends on cigarettes/day,
+    # and for ex-smokers (0/day) on how long ago they stopped.
+    Banding("age", (35,), ("SMOKE_AGE_LT_35", None), when=(is_true("smoker"),)),
+    Banding(
+        "cigarettes_per_day", (0.5, 15),
+        (None, "SMOKE_AGE_GE_35_LT15", "SMOKE_AGE_GE_35_GE15"),
+        when=_SMOKER_35_PLUS,
+    ),
+    Banding(
+        "years_since_stopping", (1,),
+        ("SMOKE_AGE_GE_35_STOP_LT1", "SMOKE_AGE_GE_35_STOP_GE1"),
+        when=_SMOKER_35_PLUS + (below("cigarettes_per_day", 0.5),),
+    ),
+
+    Banding("bmi", (30, 35), (None, "OBESITY_BMI_30_34", "OBESITY_BMI_GE_35")),
+)
+
+
+def validate_bandings(bandings=BANDINGS):
+    """Raise ValueError if a banding names an unknown attribute or condition key."""
+    for banding in bandings:
+        for attribute in (banding.attribute, *(name for name, _, _ in banding.when)):
+            if attribute not in ATTRIBUTES:
+                raise ValueError(f"Unknown attribute in banding: {attribute}")
+        for key in banding.keys:
+            if key is not None and key not in CONDITION_INDEX:
+                raise ValueError(f"Unknown condition key in banding: {key}")
+
+
+def _column(columns: Mapping, name: str, n_rows: int) -> np.ndarray:
+    if name not in columns:
+        return np.full(n_rows, np.nan)
+    return np.asarray(columns[name], dtype=np.float64)
+
+
+def derive_selection_matrix(columns: Mapping, bandings=BANDINGS) -> np.ndarray:
+    """
+    Boolean (rows x len(CONDITION_KEYS)) selection matrix of the derived keys
+    for columns of raw attributes ({attribute: array-like}, or a DataFrame).
+    Attributes that are absent count as missing for every row.
+    """
+    present = [name for name in ATTRIBUTES if name in columns]
+    n_rows = len(np.asarray(columns[present[0]])) if present else 0
+    values = {name: _column(columns, name, n_rows) for name in ATTRIBUTES}
+
+    matrix = np.zeros((n_rows, len(CONDITION_KEYS)), dtype=bool)
+    for banding in bandings:
+        value = values[banding.attribute]
+        applies = ~np.isnan(value)
+        for name, low, high in banding.when:
+            applies &= (values[name] >= low) & (values[name] < high)
+        band = np.digitize(value, banding.edges)
+        for b, key in enumerate(banding.keys):
+            if key is not None:
+                matrix[:, CONDITION_INDEX[key]] |= applies & (band == b)
+    return matrix
+
+
+def derive_conditions(bandings=BANDINGS, **attributes) -> list[str]:
+    """Derived condition keys for one patient, in CONDITION_KEYS order."""
+    unknown = set(attributes) - set(ATTRIBUTES)
+    if unknown:
+        raise TypeError(f"Unknown patient attribute(s): {', '.join(sorted(unknown))}")
+    matrix = derive_selection_matrix(
+        {name: [attributes.get(name)] for name in ATTRIBUTES}, bandings
+    )
+    return [CONDITION_KEYS[i] for i in np.flatnonzero(matrix[0])]
+
+
+validate_bandings()
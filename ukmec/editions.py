@@ -0,0 +1,175 @@
+"""
+Several UKMEC guideline editions side by side, and the diff between them.
+
+Editions are named table files (see ukmec.tablefile), configured as
+``UKMEC_EDITIONS="2016=/data/ukmec-2016.ukt,2025=/data/ukmec-2025.ukt"``.
+Two names are always available: "active" is the table the engine is
+currently using (it follows hot reloads), and "builtin" is the one compiled
+from UKMEC_DATA. Each edition is loaded the first time it is asked for and
+then kept.
+
+diff_editions(old, new) precomputes, once per pair of table versions, which
+(condition, method, phase) cells changed. Its compare() then scores one
+patient against both editions with a single max-reduction over the two
+tensors stacked together, rather than a second full evaluation. With
+apply_rules, each side is then escalated by the combination rules compiled
+against its own edition, so it matches what the app shows for that edition.
+"""
+import os
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+from .core import (
+    CONDITION_INDEX,
+    CONDITION_KEYS,
+    PHASES,
+    CategoryTable,
+    builtin_table,
+    current_table,
+    load_table,
+    mask_to_words,
+    selection_to_mask,
+)
+from .data import METHODS
+from .rules import compiled_rules
+
+EDITIONS_ENV = "UKMEC_EDITIONS"
+_MAX_DIFFS = 16
+
+
+class UnknownEditionError(KeyError):
+    """Raised when an edition name is not configured."""
+
+
+def configured_editions(value: str | None = None) -> dict[str, str]:
+    """Parse "name=path,name=path" (default: $UKMEC_EDITIONS) into {name: path}."""
+    value = os.environ.get(EDITIONS_ENV, "") if value is None else value
+    editions = {}
+    for entry in value.split(","):
+        name, sep, path = entry.partition("=")
+        if sep and name.strip() and path.strip():
+            editions[name.strip()] = path.strip()
+    return editions
+
+
+class EditionRegistry:
+    def __init__(self, paths: dict[str, str] | None = None):
+        self.paths = configured_editions() if paths is None else dict(paths)
+        self._loaded: dict[str, CategoryTable] = {}
+        self._lock = threading.Lock()
+
+    def names(self) -> list[str]:
+        return ["active", *self.paths, "builtin"]
+
+    def get(self, name: str) -> CategoryTable:
+        """The edition's table, loaded (and validated) on first use."""
+        if name == "active":
+            return current_table()
+        with self._lock:
+            if name not in self._loaded:
+                if name == "builtin":
+                    self._loaded[name] = builtin_table()
+                elif name in self.paths:
+                    self._loaded[name] = load_table(self.paths[name])
+                else:
+                    raise UnknownEditionError(name)
+            return self._loaded[name]
+
+    def load_errors(self) -> dict[str, str]:
+        """Load every configured edition; {name: error} for those that fail."""
+        errors = {}
+        for name in self.paths:
+            try:
+                self.get(name)
+            except (OSError, ValueError) as exc:   # TableFileError is a ValueError
+                errors[name] = str(exc)
+        return errors
+
+
+@dataclass(frozen=True)
+class CellChange:
+    condition: str
+    method: str
+    phase: str
+    old: int  # 0 = not applicable
+    new: int
+
+
+@dataclass(frozen=True)
+class EditionComparison:
+    old: np.ndarray        # (methods x 2) worst categories under the old edition
+    new: np.ndarray        # ... and under the new one
+    changed: np.ndarray    # (methods x 2) bool, old != new
+
+
+class TableDiff:
+    """Cell-level difference between two editions, computed once."""
+
+    def __init__(self, old: CategoryTable, new: CategoryTable):
+        self.old = old
+        self.new = new
+        # (2, conditions, methods, 2): both editions in one array, so a
+        # patient's selected rows reduce in a single call.
+        self.stacked = np.stack([old.tensor, new.tensor])
+        self.stacked.setflags(write=False)
+        self.changed = old.tensor != new.tensor
+        self.changed_rows = np.flatnonzero(self.changed.any(axis=(1, 2)))
+
+    @property
+    def changed_conditions(self) -> list[str]:
+        return [CONDITION_KEYS[i] for i in self.changed_rows]
+
+    def cells(self) -> list[CellChange]:
+        """Every changed cell, in table order."""
+        rows, methods, phases = np.nonzero(self.changed)
+        return [
+            CellChange(
+                CONDITION_KEYS[i], METHODS[j], PHASES[p],
+                int(self.old.tensor[i, j, p]), int(self.new.tensor[i, j, p]),
+            )
+            for i, j, p in zip(rows.tolist(), methods.tolist(), phases.tolist())
+        ]
+
+    def compare(self, chosen_conditions, apply_rules: bool = False) -> EditionComparison:
+        """
+        Score one patient under both editions (unknown keys are skipped),
+        escalated by each edition's combination rules with apply_rules.
+        """
+        rows = [CONDITION_INDEX[k] for k in chosen_conditions if k in CONDITION_INDEX]
+        both = self.stacked[:, rows].max(axis=1, initial=1)
+        if apply_rules:
+            words = mask_to_words(selection_to_mask(chosen_conditions))[None]
+            both = np.stack([
+                compiled_rules(table).apply_cohort(words, worst[None])[0][0]
+                for table, worst in zip((self.old, self.new), both)
+            ])
+        return EditionComparison(both[0], both[1], both[0] != both[1])
+
+
+_registry: EditionRegistry | None = None
+_diffs: dict[tuple[str, str], TableDiff] = {}
+_diffs_lock = threading.Lock()
+
+
+def registry() -> EditionRegistry:
+    """The process-wide registry, built from $UKMEC_EDITIONS on first use."""
+    global _registry
+    if _registry is None:
+        _registry = EditionRegistry()
+    return _registry
+
+
+def diff_editions(old: str | CategoryTable, new: str | CategoryTable) -> TableDiff:
+    """TableDiff between two editions (names or tables), cached per version pair."""
+    old = registry().get(old) if isinstance(old, str) else old
+    new = registry().get(new) if isinstance(new, str) else new
+    key = (old.version, new.version)
+    with _diffs_lock:
+        diff = _diffs.get(key)
+        if diff is None:
+            if len(_diffs) >= _MAX_DIFFS:
+                _diffs.clear()
+            diff = _diffs[key] = TableDiff(old, new)
+        return diff
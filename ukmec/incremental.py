@@ -0,0 +1,207 @@
+"""
+Incremental evaluation of one patient whose selection changes a key at a
+time.
+
+IncrementalEvaluator keeps, for every method and phase, the selected
+conditions at each category (0 = not applicable, 1-4). Adding or removing
+a condition adjusts those sets for its one table row, and the worst
+category per cell is the highest category with a non-empty set, so a toggle
+costs the same however many conditions are selected. The set at the worst
+category is that cell's drivers, as evaluate_with_provenance() reports
+them. The selection bitmask is maintained alongside, for the combination
+rules, which key on it.
+
+By default the evaluator follows the active table: when its version
+changes (a hot reload), the sets are rebuilt from the selection once, on
+the next read. Pass a table to pin it instead.
+
+The app keeps one evaluator per session in a SessionRegistry (sessions.py),
+but nothing here depends on Streamlit.
+"""
+import threading
+
+import numpy as np
+
+from .core import (
+    CONDITION_BITS,
+    CONDITION_INDEX,
+    CONDITION_KEYS,
+    FULL_MASK,
+    METHOD_INDEX,
+    CategoryTable,
+    UnknownMethodError,
+    current_table,
+)
+from .data import METHODS
+
+_CATEGORY_SLOTS = 5                      # not applicable, 1..4
+_N_CELLS = len(METHODS) * 2              # (method, phase) pairs, method-major
+
+# table version -> {condition key: its 14 cell categories as ints}. A toggle
+# touches 14 small ints, which plain Python does faster than numpy's
+# per-call overhead allows.
+_rows_lock = threading.Lock()
+_rows_by_version: dict[str, dict[str, list[int]]] = {}
+
+
+def _table_rows(table: CategoryTable) -> dict[str, list[int]]:
+    with _rows_lock:
+        rows = _rows_by_version.get(table.version)
+        if rows is None:
+            if len(_rows_by_version) >= 8:
+                _rows_by_version.clear()
+            cells = table.tensor.reshape(len(CONDITION_KEYS), _N_CELLS).tolist()
+            rows = _rows_by_version[table.version] = dict(zip(CONDITION_KEYS, cells))
+        return rows
+
+
+def _empty_members() -> list[list[set[str]]]:
+    return [[set() for _ in range(_CATEGORY_SLOTS)] for _ in range(_N_CELLS)]
+
+
+class IncrementalEvaluator:
+    def __init__(self, conditions=(), table: CategoryTable | None = None):
+        self._pinned = table
+        self.table = table or current_table()
+        self._rows = _table_rows(self.table)
+        self.selected: set[str] = set()
+        self.mask = 0
+        self._members = _empty_members()
+        self._worst_cells = [1] * _N_CELLS
+        self._worst: np.ndarray | None = None
+        self._drivers: tuple | None = None
+        self._keys: list[str] | None = None
+        self.update(add=conditions)
+
+    # -- changes -------------------------------------------------------------
+    def add(self, key: str):
+        """Select a condition key (KeyError if unknown); a no-op if selected."""
+        bit = CONDITION_BITS[key]
+        if key in self.selected:
+            return
+        self._sync()
+        self.selected.add(key)
+        self.mask |= bit
+        members, worst = self._members, self._worst_cells
+        for cell, category in enumerate(self._rows[key]):
+            members[cell][category].add(key)
+            if category > worst[cell]:
+                worst[cell] = category
+        self._changed()
+
+    def remove(self, key: str):
+        """Deselect a condition key; a no-op if it isn't selected."""
+        if key not in self.selected:
+            return
+        self._sync()
+        self.selected.discard(key)
+        self.mask &= ~CONDITION_BITS[key]
+        members, worst = self._members, self._worst_cells
+        for cell, category in enumerate(self._rows[key]):
+            cell_members = members[cell]
+            cell_members[category].discard(key)
+            # Only a cell whose last condition at its worst category left
+            # needs a new worst: the next category down with a member.
+            if category == worst[cell] and not cell_members[category]:
+                level = category - 1
+                while level > 1 and not cell_members[level]:
+                    level -= 1
+                worst[cell] = max(level, 1)
+        self._changed()
+
+    def toggle(self, key: str, selected: bool):
+        if selected:
+            self.add(key)
+        else:
+            self.remove(key)
+
+    def update(self, add=(), remove=()):
+        """Remove then add keys; each costs one row update."""
+        for key in remove:
+            self.remove(key)
+        for key in add:
+            self.add(key)
+
+    def set_selection(self, keys):
+        """Make the selection exactly `keys`, touching only what differs."""
+        keys = set(keys)
+        self.update(add=keys - self.selected, remove=self.selected - keys)
+
+    def set_mask(self, mask: int):
+        """Make the selection exactly the keys in a bitmask, toggling only the bits that differ."""
+        diff = (mask ^ self.mask) & FULL_MASK
+        while diff:
+            low = diff & -diff
+            key = CONDITION_KEYS[low.bit_length() - 1]
+            self.toggle(key, bool(mask & low))
+            diff ^= low
+
+    # -- reads ---------------------------------------------------------------
+    def worst(self) -> np.ndarray:
+        """Read-only (methods x 2) worst categories, as evaluate_all_methods()."""
+        self._sync()
+        if self._worst is None:
+            self._worst = np.array(self._worst_cells, dtype=np.int8).reshape(len(METHODS), 2)
+            self._worst.setflags(write=False)
+        return self._worst
+
+    def drivers(self) -> tuple:
+        """
+        drivers[j][phase]: the selected keys at that cell's worst category,
+        in CONDITION_KEYS order, as evaluate_with_provenance() gives for
+        keys(). Cells at category 1 have none.
+        """
+        self._sync()
+        if self._drivers is None:
+            members, worst = self._members, self._worst_cells
+            self._drivers = tuple(
+                tuple(
+                    tuple(sorted(members[cell][worst[cell]], key=CONDITION_INDEX.__getitem__))
+                    if worst[cell] > 1 else ()
+                    for cell in (2 * j, 2 * j + 1)
+                )
+                for j in range(len(METHODS))
+            )
+        return self._drivers
+
+    @property
+    def counts(self) -> np.ndarray:
+        """(methods, 2, 5) selected conditions per category; slot 0 = not applicable."""
+        self._sync()
+        counts = [[len(keys) for keys in cell] for cell in self._members]
+        return np.array(counts, dtype=np.int32).reshape(len(METHODS), 2, _CATEGORY_SLOTS)
+
+    def category(self, method: str, is_initiation: bool) -> int:
+        """combine_ukmec_categories() for the current selection."""
+        if method not in METHOD_INDEX:
+            raise UnknownMethodError(method)
+        self._sync()
+        return self._worst_cells[2 * METHOD_INDEX[method] + (0 if is_initiation else 1)]
+
+    def keys(self) -> list[str]:
+        """The selected keys in CONDITION_KEYS order."""
+        if self._keys is None:
+            self._keys = [key for key in CONDITION_KEYS if key in self.selected]
+        return self._keys
+
+    # -- internals -----------------------------------------------------------
+    def _changed(self):
+        self._worst = None
+        self._drivers = None
+        self._keys = None
+
+    def _sync(self):
+        """Rebuild the counts if the active table changed under an unpinned evaluator."""
+        if self._pinned is not None:
+            return
+        table = current_table()
+        if table.version == self.table.version:
+            return
+        self.table = table
+        self._rows = _table_rows(table)
+        selected, self.selected, self.mask = self.selected, set(), 0
+        self._members = _empty_members()
+        self._worst_cells = [1] * _N_CELLS
+        for key in selected:
+            self.add(key)
+        self._changed()
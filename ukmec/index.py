@@ -0,0 +1,138 @@
+"""
+Inverted indexes over the compiled category table.
+
+The engine answers "what category is method X for these conditions?". The
+indexes here answer the reverse questions clinicians often start from:
+
+    safe_methods(selection)                -- which methods stay at <= 2?
+    blocking_conditions("CHC", selection)  -- which conditions push CHC up?
+    rank_methods(selection)                -- every method, best first
+
+They are built once per category table (current_index() rebuilds them
+after a hot reload), and each query only looks at the selected conditions,
+so it costs O(len(selection)) rather than a scan of the whole table.
+"""
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+from .core import CONDITION_KEYS, METHOD_INDEX, PHASES, UnknownMethodError, current_table
+from .data import METHODS
+
+CATEGORIES = (1, 2, 3, 4)
+
+
+@dataclass(frozen=True)
+class MethodRank:
+    method: str
+    category: int
+    # Selected conditions at `category`, i.e. the ones that set it (empty
+    # when the method is category 1).
+    blocking: tuple[str, ...]
+
+
+class InvertedIndex:
+    def __init__(self, tensor: np.ndarray, condition_keys):
+        keys = list(condition_keys)
+        # (method, phase, category) -> condition keys at exactly that category
+        self.by_category: dict[tuple[str, str, int], frozenset[str]] = {}
+        for j, method in enumerate(METHODS):
+            for p, phase in enumerate(PHASES):
+                column = tensor[:, j, p]
+                for category in CATEGORIES:
+                    self.by_category[(method, phase, category)] = frozenset(
+                        keys[i] for i in np.flatnonzero(column == category)
+                    )
+
+        # condition key -> per phase, {method: category} for categories >= 2
+        self.escalations: dict[str, tuple[dict[str, int], ...]] = {}
+        for i, key in enumerate(keys):
+            self.escalations[key] = tuple(
+                {METHODS[j]: int(tensor[i, j, p]) for j in np.flatnonzero(tensor[i, :, p] >= 2)}
+                for p in range(len(PHASES))
+            )
+
+    def conditions_at(self, method: str, is_initiation: bool, category: int) -> frozenset[str]:
+        """All condition keys that are exactly `category` for method."""
+        if method not in METHOD_INDEX:
+            raise UnknownMethodError(method)
+        return self.by_category.get((method, PHASES[0 if is_initiation else 1], category), frozenset())
+
+    def escalated_methods(self, key: str, is_initiation: bool) -> dict[str, int]:
+        """{method: category} for every method `key` raises above 1."""
+        return dict(self.escalations.get(key, ({}, {}))[0 if is_initiation else 1])
+
+    def worst_by_method(self, selection, is_initiation: bool) -> dict[str, int]:
+        """Same categories as evaluate_all_methods(), as {method: category}."""
+        phase = 0 if is_initiation else 1
+        worst = dict.fromkeys(METHODS, 1)
+        for key in selection:
+            for method, category in self.escalations.get(key, ({}, {}))[phase].items():
+                if category > worst[method]:
+                    worst[method] = category
+        return worst
+
+    def safe_methods(self, selection, is_initiation: bool, max_category: int = 2) -> list[str]:
+        """Methods whose combined category is <= max_category, in METHODS order."""
+        worst = self.worst_by_method(selection, is_initiation)
+        return [method for method in METHODS if worst[method] <= max_category]
+
+    def blocking_conditions(
+        self, method: str, selection, is_initiation: bool, min_category: int = 2
+    ) -> list[tuple[str, int]]:
+        """
+        (key, category) for each selected condition that puts method at
+        min_category or above, worst first. Unknown keys are skipped.
+        """
+        if method not in METHOD_INDEX:
+            raise UnknownMethodError(method)
+        phase = 0 if is_initiation else 1
+        found = []
+        for key in selection:
+            category = self.escalations.get(key, ({}, {}))[phase].get(method, 1)
+            if category >= min_category:
+                found.append((key, category))
+        found.sort(key=lambda item: -item[1])
+        return found
+
+    def rank_methods(self, selection, is_initiation: bool, result=None) -> list[MethodRank]:
+        """
+        Every method ordered by combined category (best first, ties in
+        METHODS order), with the conditions responsible for it.
+
+        `result` may be a precomputed (worst, drivers) pair from
+        evaluate_with_provenance() or an IncrementalEvaluator; otherwise
+        it is derived here from the index.
+        """
+        selection = list(selection)
+        phase = 0 if is_initiation else 1
+        ranks = []
+        if result is None:
+            by_method = self.worst_by_method(selection, is_initiation)
+            for method in METHODS:
+                category = by_method[method]
+                blocking = () if category == 1 else tuple(
+                    key for key, cat in self.blocking_conditions(method, selection, is_initiation, category)
+                )
+                ranks.append(MethodRank(method, category, blocking))
+        else:
+            worst, drivers = result
+            for j, method in enumerate(METHODS):
+                ranks.append(MethodRank(method, int(worst[j, phase]), drivers[j][phase]))
+        ranks.sort(key=lambda rank: rank.category)
+        return ranks
+
+
+_index_lock = threading.Lock()
+_index: tuple[str, InvertedIndex] | None = None
+
+
+def current_index() -> InvertedIndex:
+    """The index for the active category table, rebuilt when it changes."""
+    global _index
+    table = current_table()
+    with _index_lock:
+        if _index is None or _index[0] != table.version:
+            _index = (table.version, InvertedIndex(table.tensor, CONDITION_KEYS))
+        return _index[1]
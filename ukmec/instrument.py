@@ -0,0 +1,161 @@
+"""
+Opt-in per-rerun instrumentation.
+
+A RerunProfile times named sections of one rerun (a full script run or a
+fragment run), can wrap the whole rerun in cProfile and/or tracemalloc, and
+appends one JSON record per rerun to ``<out_dir>/reruns.jsonl`` so runs can
+be compared as the page grows. Profiles nest: a profile opened while another
+is active on the same thread becomes a timed section of the outer one.
+
+Nothing here imports Streamlit; the app decides when profiling is enabled
+(UKMEC_PROFILE env var, or timing only from the ``?profile=`` query
+parameter) and adds UI-specific fields such as the widget count to the
+record.
+"""
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+PROFILE_ENV = "UKMEC_PROFILE"
+PROFILE_DIR_ENV = "UKMEC_PROFILE_DIR"
+DEFAULT_PROFILE_DIR = "profiles"
+
+# "1"/"true"/"timing" enable section timing only; "cprofile" and
+# "tracemalloc" add the corresponding profiler. Combine with commas.
+MODES = ("timing", "cprofile", "tracemalloc")
+TRACEMALLOC_TOP = 25
+
+_active = threading.local()
+
+
+def parse_modes(value: str | None) -> frozenset[str]:
+    """Turn an env/query value like "cprofile,tracemalloc" into a set of MODES."""
+    if not value:
+        return frozenset()
+    modes = set()
+    for part in value.lower().split(","):
+        part = part.strip()
+        if part in ("1", "true", "yes", "on", "timing"):
+            modes.add("timing")
+        elif part in MODES:
+            modes.update(("timing", part))
+    return frozenset(modes)
+
+
+def deep_sizeof(obj, _seen: set | None = None) -> int:
+    """Approximate memory held by obj, following containers and __dict__."""
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), seen)
+    return size
+
+
+def process_rss_bytes() -> int | None:
+    """Resident set size of this process, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+class RerunProfile:
+    def __init__(self, label: str, modes: frozenset[str], out_dir: str | Path):
+        self.label = label
+        self.modes = modes
+        self.out_dir = Path(out_dir)
+        self.sections: dict[str, float] = {}
+        self.record: dict = {"label": label}
+        self._profiler = None
+        self._started = 0.0
+
+    @contextmanager
+    def section(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.sections[name] = self.sections.get(name, 0.0) + elapsed
+
+    def start(self):
+        if "tracemalloc" in self.modes and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if "cprofile" in self.modes:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._started = time.perf_counter()
+
+    def finish(self):
+        total_ms = (time.perf_counter() - self._started) * 1000
+        if self._profiler is not None:
+            self._profiler.disable()
+        stamp = time.strftime("%Y%m%d-%H%M%S") + f"-{time.perf_counter_ns() % 10**6:06d}"
+        slug = "".join(c if c.isalnum() else "_" for c in self.label)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+
+        if self._profiler is not None:
+            prof_path = self.out_dir / f"rerun-{stamp}-{slug}.prof"
+            self._profiler.dump_stats(prof_path)
+            self.record["cprofile"] = str(prof_path)
+        if "tracemalloc" in self.modes and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            top_path = self.out_dir / f"rerun-{stamp}-{slug}-tracemalloc.txt"
+            top_path.write_text(
+                "\n".join(str(stat) for stat in snapshot.statistics("lineno")[:TRACEMALLOC_TOP])
+            )
+            self.record.update(traced_bytes=current, traced_peak_bytes=peak, tracemalloc=str(top_path))
+
+        self.record.update(
+            time=time.time(),
+            total_ms=round(total_ms, 3),
+            sections_ms={name: round(ms, 3) for name, ms in self.sections.items()},
+            rss_bytes=process_rss_bytes(),
+        )
+        with open(self.out_dir / "reruns.jsonl", "a") as f:
+            f.write(json.dumps(self.record) + "\n")
+
+
+@contextmanager
+def profile_rerun(label: str, modes: frozenset[str], out_dir: str | Path | None = None):
+    """
+    Profile one rerun, or -- if a profile is already active on this thread --
+    time `label` as a section of it. Yields the active RerunProfile and
+    whether this call owns it (is the top level of the rerun).
+    """
+    outer = getattr(_active, "profile", None)
+    if outer is not None:
+        with outer.section(label):
+            yield outer, False
+        return
+
+    profile = RerunProfile(
+        label, modes, out_dir or os.environ.get(PROFILE_DIR_ENV, DEFAULT_PROFILE_DIR)
+    )
+    _active.profile = profile
+    profile.start()
+    try:
+        yield profile, True
+    finally:
+        _active.profile = None
+        profile.finish()
+
+
+def active_profile() -> RerunProfile | None:
+    return getattr(_active, "profile", None)
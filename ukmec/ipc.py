@@ -0,0 +1,307 @@
+"""
+Arrow IPC scoring, for pipelines that already hold Arrow record batches.
+
+Reads an Arrow IPC stream (or IPC file) of patient rows and writes an Arrow
+IPC stream back: the input's other columns (ids, dates, ...) followed by
+one int8 column per method and phase (batch.RESULT_COLUMNS, e.g.
+``CHC_I``/``CHC_C``), one output batch per input batch, in order. The
+results are escalated by the combination rules (ukmec.rules), as in the
+app, unless --no-apply-rules is given.
+
+Each input batch describes its conditions as either
+
+* a ``mask`` column of packed selection bitmasks, as
+  ``fixed_size_list<uint64>[MASK_WORDS]`` or
+  ``fixed_size_binary[MASK_WORDS * 8]``: little-endian words with bit i
+  set for CONDITION_KEYS[i] (see ukmec.core.mask_to_words); or
+* anything ukmec.batch understands: one boolean column per condition key,
+  or a ``conditions`` column of keys;
+
+plus optional raw attribute columns (``age``, ``bmi``, ... -- see
+ukmec.derive.ATTRIBUTES).
+
+Buffers are not copied on the way in or out: a file input is memory-mapped,
+a ``mask`` column is viewed in place as a (rows, MASK_WORDS) uint64 array,
+passed-through columns are reused as they are, and the result columns are
+zero-copy slices of one (columns, rows) int8 block. Unpacking the selection
+to score it is the only per-row work. Boolean flag columns are bit-packed
+in Arrow, so they are unpacked like in batch.py.
+
+Three transports:
+
+    python -m ukmec.ipc cohort.arrows -o scored.arrows     # file (stream or IPC file)
+    warehouse-job | python -m ukmec.ipc - > scored.arrows  # stdin -> stdout
+    python -m ukmec.ipc --socket /run/ukmec.sock           # local socket server
+
+A socket connection sends one IPC stream and reads the scored stream back
+while it is still sending; score_over_socket() is a client for it.
+"""
+import argparse
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+import numpy as np
+import pyarrow as pa
+
+from .batch import (
+    RESULT_COLUMNS,
+    BatchStats,
+    selection_matrix_for_batch,
+    selection_matrix_from_attributes,
+)
+from .core import MASK_WORDS, evaluate_cohort, selection_matrix_to_words, words_to_selection_matrix
+from .rules import current_rules
+
+MASK_COLUMN = "mask"
+MASK_LIST_TYPE = pa.list_(pa.uint64(), MASK_WORDS)
+MASK_BINARY_TYPE = pa.binary(MASK_WORDS * 8)
+
+
+##############################################################################
+# 1) BATCH -> WORDS / SELECTION MATRIX
+##############################################################################
+def mask_words(column) -> np.ndarray:
+    """
+    A ``mask`` column as a read-only (rows, MASK_WORDS) uint64 view of its
+    Arrow buffer. Raises ValueError for nulls or an unsupported type.
+    """
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks()
+    if column.null_count:
+        raise ValueError(f"{MASK_COLUMN} column has {column.null_count} nulls")
+    n_rows = len(column)
+    if column.type == MASK_LIST_TYPE:
+        # flatten() honours the slice offset without copying the child.
+        return column.flatten().to_numpy(zero_copy_only=True).reshape(n_rows, MASK_WORDS)
+    if column.type == MASK_BINARY_TYPE:
+        data = column.buffers()[1]
+        words = np.frombuffer(data, dtype="<u8", count=(column.offset + n_rows) * MASK_WORDS)
+        return words.reshape(-1, MASK_WORDS)[column.offset:]
+    raise ValueError(
+        f"{MASK_COLUMN} column must be {MASK_LIST_TYPE} or {MASK_BINARY_TYPE}, not {column.type}"
+    )
+
+
+def selection_for_batch(
+    batch: pa.RecordBatch, conditions_column: str = "conditions", separator: str = ";"
+) -> tuple[np.ndarray, np.ndarray | None, int, set[str]]:
+    """
+    The batch's selection matrix, its packed words when the batch carried
+    them unchanged (else None), the number of unknown keys skipped and the
+    names of the columns consumed.
+    """
+    if MASK_COLUMN not in batch.schema.names:
+        matrix, unknown, input_columns = selection_matrix_for_batch(batch, conditions_column, separator)
+        return matrix, None, unknown, input_columns
+    words = mask_words(batch.column(MASK_COLUMN))
+    matrix = words_to_selection_matrix(words)
+    derived = selection_matrix_from_attributes(batch)
+    if derived is not None:
+        matrix |= derived
+        words = None
+    return matrix, words, 0, {MASK_COLUMN}
+
+
+##############################################################################
+# 2) SCORING
+##############################################################################
+def result_arrays(worst: np.ndarray) -> list[pa.Array]:
+    """
+    RESULT_COLUMNS for an evaluate_cohort() result, as int8 arrays that
+    share one column-major block instead of each owning a copy.
+    """
+    n_rows = len(worst)
+    block = np.ascontiguousarray(worst.reshape(n_rows, len(RESULT_COLUMNS)).T)
+    return [
+        pa.Array.from_buffers(pa.int8(), n_rows, [None, pa.py_buffer(block[j])])
+        for j in range(block.shape[0])
+    ]
+
+
+def score_record_batch(
+    batch: pa.RecordBatch,
+    conditions_column: str = "conditions",
+    separator: str = ";",
+    apply_rules: bool = True,
+) -> tuple[pa.RecordBatch, int]:
+    """
+    batch.score_batch() for IPC input: the passed-through columns followed
+    by the RESULT_COLUMNS, plus the number of unknown condition keys seen.
+    """
+    matrix, words, unknown, input_columns = selection_for_batch(batch, conditions_column, separator)
+    worst = evaluate_cohort(matrix)
+    if apply_rules:
+        if words is None:
+            words = selection_matrix_to_words(matrix)
+        worst, _ = current_rules().apply_cohort(words, worst)
+
+    kept = [name for name in batch.schema.names if name not in input_columns]
+    arrays = [batch.column(name) for name in kept] + result_arrays(worst)
+    return pa.RecordBatch.from_arrays(arrays, names=kept + RESULT_COLUMNS), unknown
+
+
+def _read_input(source, on_schema):
+    """
+    Record batches from a path (memory-mapped; IPC stream or IPC file) or
+    a readable binary file object (IPC stream). on_schema(schema) is called
+    first, so an empty input still has a schema.
+    """
+    if not isinstance(source, (str, os.PathLike)):
+        reader = pa.ipc.open_stream(source)
+        on_schema(reader.schema)
+        yield from reader
+        return
+    with pa.memory_map(os.fspath(source)) as mapped:
+        try:
+            reader = pa.ipc.open_file(mapped)
+        except pa.ArrowInvalid:
+            mapped.seek(0)
+            reader = pa.ipc.open_stream(mapped)
+            on_schema(reader.schema)
+            yield from reader
+            return
+        on_schema(reader.schema)
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+
+
+def evaluate_ipc(
+    source,
+    sink,
+    conditions_column: str = "conditions",
+    separator: str = ";",
+    apply_rules: bool = True,
+) -> BatchStats:
+    """
+    Score every record batch from source (a path, memory-mapped, or a
+    readable binary file object) into an IPC stream on sink (a path or
+    writable binary file object), batch by batch.
+    """
+    stats = BatchStats()
+    schemas = []
+    writer = None
+    start = time.perf_counter()
+    try:
+        for batch in _read_input(source, schemas.append):
+            scored, unknown = score_record_batch(batch, conditions_column, separator, apply_rules)
+            if writer is None:
+                writer = pa.ipc.new_stream(sink, scored.schema)
+            writer.write_batch(scored)
+            stats.rows += batch.num_rows
+            stats.batches += 1
+            stats.unknown_keys += unknown
+        if writer is None and schemas:
+            # No batches: still answer with a valid stream of the result schema.
+            empty = pa.RecordBatch.from_pylist([], schema=schemas[0])
+            scored, _ = score_record_batch(empty, conditions_column, separator, apply_rules)
+            writer = pa.ipc.new_stream(sink, scored.schema)
+    finally:
+        if writer is not None:
+            writer.close()
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+##############################################################################
+# 3) LOCAL SOCKET
+##############################################################################
+class _IPCHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            evaluate_ipc(self.rfile, self.wfile, **self.server.options)
+        except (pa.ArrowInvalid, ValueError) as exc:
+            # The client sees the stream end early; the reason goes to our log.
+            print(f"ukmec.ipc: rejected a stream: {exc}", file=sys.stderr)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class IPCServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, **options):
+        self.options = options
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, _IPCHandler)
+
+
+def score_over_socket(path: str, batches, schema: pa.Schema) -> pa.Table:
+    """
+    Send record batches to an IPCServer at path and return the scored
+    table. The request is written from a thread so that large streams don't
+    deadlock on socket buffers while results flow back.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        errors = []
+
+        def send():
+            try:
+                with sock.makefile("wb") as out, pa.ipc.new_stream(out, schema) as writer:
+                    for batch in batches:
+                        writer.write_batch(batch)
+                sock.shutdown(socket.SHUT_WR)
+            except OSError as exc:
+                errors.append(exc)
+
+        sender = threading.Thread(target=send, daemon=True)
+        sender.start()
+        with sock.makefile("rb") as response:
+            table = pa.ipc.open_stream(response).read_all()
+        sender.join()
+    if errors:
+        raise errors[0]
+    return table
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Score Arrow IPC record batches against UKMEC.")
+    parser.add_argument("input", nargs="?", default="-",
+                        help="IPC stream or file (default '-': stdin)")
+    parser.add_argument("-o", "--output", default="-", help="IPC stream to write (default '-': stdout)")
+    parser.add_argument("--socket", help="serve on this Unix socket instead")
+    parser.add_argument("--conditions-column", default="conditions")
+    parser.add_argument("--separator", default=";")
+    parser.add_argument("--apply-rules", action=argparse.BooleanOptionalAction, default=True,
+                        help="escalate results with the combination rules (ukmec.rules), "
+                             "as the app does (default: on)")
+    args = parser.parse_args(argv)
+    options = {
+        "conditions_column": args.conditions_column,
+        "separator": args.separator,
+        "apply_rules": args.apply_rules,
+    }
+
+    if args.socket:
+        with IPCServer(args.socket, **options) as server:
+            print(f"UKMEC Arrow IPC listening on {args.socket}", file=sys.stderr)
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                os.unlink(args.socket)
+        return 0
+
+    source = sys.stdin.buffer if args.input == "-" else args.input
+    sink = sys.stdout.buffer if args.output == "-" else args.output
+    try:
+        stats = evaluate_ipc(source, sink, **options)
+    except BrokenPipeError:
+        return 1
+    print(
+        f"Scored {stats.rows} rows in {stats.batches} batches, "
+        f"{stats.seconds:.2f}s ({stats.rows_per_second:,.0f} rows/s); "
+        f"{stats.unknown_keys} unknown condition keys skipped.",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,321 @@
+"""
+Process-wide metrics in the Prometheus text exposition format.
+
+REGISTRY holds the app's and engine's metrics:
+
+    ukmec_evaluations_total{source}            selections run through the combine logic
+    ukmec_evaluation_seconds{source}           time per evaluation (histogram)
+    ukmec_rerun_seconds{kind}                  Streamlit rerun duration, "full" or "fragment"
+    ukmec_live_sessions                        sessions active within the registry's idle window
+    ukmec_final_category_total{method,phase,category}
+                                               final categories shown -- counts only,
+                                               never conditions or session ids
+
+Updates are lock-light: every thread increments its own cells (a dict per
+metric, kept in a threading.local), so inc() and observe() never take a
+lock or contend with a scrape. A lock is taken only the first time a thread
+touches a metric -- when the cells of threads that have exited are folded
+into a retired total, so short-lived script threads don't pile up -- and
+when render() sums the cells. A scrape may miss an update that is in
+progress, never one that has finished.
+
+The live-sessions gauge is a callback, read when rendered.
+
+Exposition, from the environment (start_exporters()):
+
+    UKMEC_METRICS_PORT=9464        GET http://127.0.0.1:9464/metrics
+    UKMEC_METRICS_FILE=path.prom   rewritten every UKMEC_METRICS_INTERVAL_S
+                                   seconds (default 15), e.g. for the
+                                   node_exporter textfile collector
+
+ukmec.server also serves REGISTRY at /metrics.
+"""
+import bisect
+import http.server
+import math
+import os
+import threading
+import time
+
+from .sessions import session_registry
+
+METRICS_PORT_ENV = "UKMEC_METRICS_PORT"
+METRICS_ADDRESS_ENV = "UKMEC_METRICS_ADDRESS"
+METRICS_FILE_ENV = "UKMEC_METRICS_FILE"
+METRICS_INTERVAL_ENV = "UKMEC_METRICS_INTERVAL_S"
+DEFAULT_FILE_INTERVAL = 15.0
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Histogram upper bounds, in seconds.
+EVALUATION_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.01, 0.1)
+RERUN_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+##############################################################################
+# 1) PER-THREAD CELLS
+##############################################################################
+class _ThreadCells:
+    """{label values: list of numbers} per thread, summed on read."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._live: list[tuple[threading.Thread, dict]] = []
+        self._retired: dict[tuple, list] = {}
+
+    def mine(self) -> dict:
+        try:
+            return self._local.cells
+        except AttributeError:
+            pass
+        cells = self._local.cells = {}
+        with self._lock:
+            for thread, old in self._live:
+                if not thread.is_alive():
+                    _merge_into(self._retired, old)
+            self._live = [(t, c) for t, c in self._live if t.is_alive()]
+            self._live.append((threading.current_thread(), cells))
+        return cells
+
+    def totals(self) -> dict[tuple, list]:
+        with self._lock:
+            totals = {labels: list(values) for labels, values in self._retired.items()}
+            for _, cells in self._live:
+                _merge_into(totals, dict(cells))
+        return totals
+
+
+def _merge_into(totals: dict, cells: dict):
+    for labels, values in list(cells.items()):
+        into = totals.get(labels)
+        if into is None:
+            totals[labels] = list(values)
+        else:
+            for i, value in enumerate(values):
+                into[i] += value
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+##############################################################################
+# 2) METRIC TYPES
+##############################################################################
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._cells = _ThreadCells()
+
+    def inc(self, *label_values, amount: float = 1):
+        cells = self._cells.mine()
+        cell = cells.get(label_values)
+        if cell is None:
+            cell = cells[label_values] = [0]
+        cell[0] += amount
+
+    def value(self, *label_values) -> float:
+        return self._cells.totals().get(label_values, [0])[0]
+
+    def lines(self) -> list[str]:
+        return [
+            f"{self.name}{_label_text(self.labels, values)} {_number(cell[0])}"
+            for values, cell in sorted(self._cells.totals().items())
+        ]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets=RERUN_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._cells = _ThreadCells()
+
+    def observe(self, value: float, *label_values):
+        cells = self._cells.mine()
+        cell = cells.get(label_values)
+        if cell is None:
+            # One count per bucket (the last is +Inf), then sum and count.
+            cell = cells[label_values] = [0] * (len(self.buckets) + 3)
+        cell[bisect.bisect_left(self.buckets, value)] += 1
+        cell[-2] += value
+        cell[-1] += 1
+
+    def time(self, *label_values) -> "_Timer":
+        """A context manager that observes the seconds its block took."""
+        return _Timer(self, label_values)
+
+    def lines(self) -> list[str]:
+        lines = []
+        for values, cell in sorted(self._cells.totals().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), cell):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labels, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labels, values)} {_number(cell[-2])}")
+            lines.append(f"{self.name}_count{_label_text(self.labels, values)} {cell[-1]}")
+        return lines
+
+
+class _Timer:
+    # A plain class: a @contextmanager generator costs several times more.
+    __slots__ = ("histogram", "label_values", "start")
+
+    def __init__(self, histogram: Histogram, label_values: tuple):
+        self.histogram, self.label_values = histogram, label_values
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.label_values)
+
+
+class Callback:
+    """A counter or gauge whose value is read from fn() when rendered."""
+
+    def __init__(self, name: str, help: str, kind: str, fn):
+        self.name, self.help, self.kind, self.fn = name, help, kind, fn
+
+    def lines(self) -> list[str]:
+        return [f"{self.name} {_number(self.fn())}"]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels=()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels=(), buckets=RERUN_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def callback(self, name: str, help: str, kind: str, fn) -> Callback:
+        return self.register(Callback(name, help, kind, fn))
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        out = []
+        for metric in metrics:
+            out.append(f"# HELP {metric.name} {metric.help}")
+            out.append(f"# TYPE {metric.name} {metric.kind}")
+            out.extend(metric.lines())
+        return "\n".join(out) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+EVALUATIONS = REGISTRY.counter(
+    "ukmec_evaluations_total", "Selections evaluated by the combine logic.", ("source",)
+)
+EVALUATION_SECONDS = REGISTRY.histogram(
+    "ukmec_evaluation_seconds", "Time to evaluate a selection (or a server micro-batch).",
+    ("source",), EVALUATION_BUCKETS,
+)
+RERUN_SECONDS = REGISTRY.histogram(
+    "ukmec_rerun_seconds", "Streamlit script rerun duration.", ("kind",), RERUN_BUCKETS
+)
+FINAL_CATEGORIES = REGISTRY.counter(
+    "ukmec_final_category_total", "Final categories shown for the chosen method.",
+    ("method", "phase", "category"),
+)
+REGISTRY.callback(
+    "ukmec_live_sessions", "Sessions active within the session registry's idle window.", "gauge",
+    lambda: session_registry().live_count(),
+)
+
+
+##############################################################################
+# 3) EXPOSITION
+##############################################################################
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port: int, address: str = "127.0.0.1", registry: MetricsRegistry = REGISTRY):
+    """Serve registry at http://address:port/metrics from a daemon thread."""
+    server = http.server.ThreadingHTTPServer((address, port), _MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, name="ukmec-metrics-http", daemon=True).start()
+    return server
+
+
+def write_metrics_file(path: str, registry: MetricsRegistry = REGISTRY):
+    """Replace path with the current metrics in one rename, so readers never see half a file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(registry.render())
+    os.replace(tmp, path)
+
+
+def _write_periodically(path: str, interval: float, registry: MetricsRegistry):
+    while True:
+        try:
+            write_metrics_file(path, registry)
+        except OSError:
+            pass
+        time.sleep(interval)
+
+
+def start_exporters(registry: MetricsRegistry = REGISTRY) -> dict:
+    """
+    Start the HTTP endpoint and/or file writer configured in the
+    environment. Returns what was started, e.g. {"port": 9464}.
+    """
+    started = {}
+    port = os.environ.get(METRICS_PORT_ENV)
+    if port:
+        serve_metrics(int(port), os.environ.get(METRICS_ADDRESS_ENV, "127.0.0.1"), registry)
+        started["port"] = int(port)
+    path = os.environ.get(METRICS_FILE_ENV)
+    if path:
+        interval = float(os.environ.get(METRICS_INTERVAL_ENV, DEFAULT_FILE_INTERVAL))
+        threading.Thread(
+            target=_write_periodically, args=(path, interval, registry),
+            name="ukmec-metrics-file", daemon=True,
+        ).start()
+        started["file"] = path
+    return started
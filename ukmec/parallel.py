@@ -0,0 +1,193 @@
+"""
+Multi-core cohort scoring over shared memory.
+
+evaluate_cohort() scores a whole selection matrix with one matrix product,
+but on one core. ParallelScorer spreads that over a process pool without
+pickling any cohort data:
+
+* the category table's tensor is copied once into a SharedMemory block when
+  the scorer starts, and every worker rebuilds a CategoryTable on top of it
+  (same version, so rules compile against the same categories);
+* score() copies the (patients x CONDITION_KEYS) boolean matrix into an
+  input block and allocates an int8 (patients, methods, 2) output block,
+  both reused by later calls until a larger cohort needs bigger ones;
+* each task is only (block names, start row, stop row): the worker scores
+  its chunk of the input view in place and writes into the same rows of the
+  output view, so the result comes back in order with no reassembly beyond
+  waiting for every chunk.
+
+Workers are started with the "spawn" method, so they never inherit the
+parent's threads (e.g. a table watcher) and behave the same on every
+platform. With apply_rules, each worker compiles ukmec.rules against its
+shared table and escalates its chunk, as score_batch() does.
+
+    with ParallelScorer(workers=8) as scorer:
+        worst = scorer.score(selection_matrix)
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from .core import (
+    CONDITION_KEYS,
+    CategoryTable,
+    current_table,
+    evaluate_cohort,
+    selection_matrix_to_words,
+)
+from .data import METHODS
+
+DEFAULT_CHUNK_ROWS = 65_536
+
+# (block name, shape, dtype) -- all a worker needs to map a shared array.
+SharedSpec = tuple[str, tuple[int, ...], str]
+
+
+def _create_shared(shape: tuple[int, ...], dtype) -> tuple[SharedMemory, SharedSpec]:
+    dtype = np.dtype(dtype)
+    shm = SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+    return shm, (shm.name, tuple(shape), dtype.str)
+
+
+def _view(shm: SharedMemory, spec: SharedSpec) -> np.ndarray:
+    # Views must be gone before shm.close(), so none is kept around.
+    _, shape, dtype = spec
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _release(shm: SharedMemory):
+    shm.close()
+    shm.unlink()
+
+
+##############################################################################
+# 1) WORKER SIDE
+##############################################################################
+_worker_table: CategoryTable | None = None
+_worker_table_block = ""
+_worker_rules = None
+_worker_blocks: dict[str, tuple[SharedMemory, np.ndarray]] = {}
+
+
+def _attach(spec: SharedSpec) -> np.ndarray:
+    name = spec[0]
+    block = _worker_blocks.get(name)
+    if block is None:
+        shm = SharedMemory(name=name)
+        block = _worker_blocks[name] = (shm, _view(shm, spec))
+    return block[1]
+
+
+def _init_worker(tensor_spec: SharedSpec, version: str, label: str):
+    global _worker_table, _worker_table_block
+    _worker_table = CategoryTable(_attach(tensor_spec), version, label, "shared")
+    _worker_table_block = tensor_spec[0]
+
+
+def _detach_stale(keep: set[str]):
+    # The parent replaced its input/output blocks with bigger ones.
+    for name in [name for name in _worker_blocks if name not in keep]:
+        shm = _worker_blocks.pop(name)[0]
+        shm.close()
+
+
+def _score_chunk(matrix_spec: SharedSpec, out_spec: SharedSpec, start: int, stop: int,
+                 apply_rules: bool):
+    global _worker_rules
+    _detach_stale({matrix_spec[0], out_spec[0], _worker_table_block})
+    chunk = _attach(matrix_spec)[start:stop]
+    worst = evaluate_cohort(chunk, _worker_table)
+    if apply_rules:
+        if _worker_rules is None:
+            from .rules import RULES, CompiledRules
+            _worker_rules = CompiledRules(RULES, _worker_table)
+        worst, _ = _worker_rules.apply_cohort(selection_matrix_to_words(chunk), worst)
+    _attach(out_spec)[start:stop] = worst
+
+
+##############################################################################
+# 2) PARENT SIDE
+##############################################################################
+class ParallelScorer:
+    def __init__(
+        self,
+        workers: int | None = None,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+        table: CategoryTable | None = None,
+    ):
+        """
+        A pool of `workers` processes (default: every core) scoring against
+        `table` (default: the active one, as of now). Close it, or use it as
+        a context manager, to stop the pool and free the shared blocks.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_rows = chunk_rows
+        self.table = table or current_table()
+        self._blocks: dict[str, tuple[SharedMemory, SharedSpec]] = {}   # "input", "output"
+        self._capacity = 0
+        self._table_shm, tensor_spec = _create_shared(self.table.tensor.shape, self.table.tensor.dtype)
+        _view(self._table_shm, tensor_spec)[...] = self.table.tensor
+        try:
+            self._pool = ProcessPoolExecutor(
+                self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(tensor_spec, self.table.version, self.table.label),
+            )
+        except BaseException:
+            _release(self._table_shm)
+            raise
+
+    def score(self, selection_matrix: np.ndarray, apply_rules: bool = False) -> np.ndarray:
+        """
+        evaluate_cohort(selection_matrix, table) -- escalated by the
+        combination rules with apply_rules -- scored in chunks across the pool.
+        """
+        n_rows = len(selection_matrix)
+        if selection_matrix.shape[1:] != (len(CONDITION_KEYS),):
+            raise ValueError(f"Expected {len(CONDITION_KEYS)} condition columns, got {selection_matrix.shape[1:]}")
+        if n_rows == 0:
+            return np.ones((0, len(METHODS), 2), dtype=np.int8)
+        self._reserve(n_rows)
+        matrix_shm, matrix_spec = self._blocks["input"]
+        out_shm, out_spec = self._blocks["output"]
+        _view(matrix_shm, matrix_spec)[:n_rows] = selection_matrix
+
+        futures = [
+            self._pool.submit(_score_chunk, matrix_spec, out_spec, start,
+                              min(start + self.chunk_rows, n_rows), apply_rules)
+            for start in range(0, n_rows, self.chunk_rows)
+        ]
+        for future in futures:
+            future.result()
+        return _view(out_shm, out_spec)[:n_rows].copy()
+
+    def _reserve(self, n_rows: int):
+        """Make the input/output blocks hold at least n_rows patients."""
+        if n_rows <= self._capacity:
+            return
+        for shm, _ in self._blocks.values():
+            _release(shm)
+        self._blocks.clear()
+        self._blocks["input"] = _create_shared((n_rows, len(CONDITION_KEYS)), bool)
+        self._blocks["output"] = _create_shared((n_rows, len(METHODS), 2), np.int8)
+        self._capacity = n_rows
+
+    def close(self):
+        if self._pool is None:
+            return
+        self._pool.shutdown()
+        self._pool = None
+        for shm, _ in self._blocks.values():
+            _release(shm)
+        self._blocks.clear()
+        _release(self._table_shm)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,225 @@
+"""
+Escalation rules for combinations of conditions.
+
+The engine combines conditions by taking the worst category, but UKMEC
+notes that several category 2/3 conditions affecting the same risk (e.g.
+several cardiovascular risk factors with CHC) can together warrant a
+higher category. Each EscalationRule names groups of condition keys; it
+fires when at least min_groups of its groups have a selected key, and then
+raises the listed methods to at least a floor category -- either a fixed
+one (escalate_to) or the categories of a table row it implies (implies),
+so it follows the active edition.
+
+Rules are compiled per category table into integer bitmasks, one per
+group, so checking every rule for one selection is a handful of integer
+ANDs. For cohorts the same masks are uint64 word arrays and the rules are
+checked for all patients at once.
+"""
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+from .core import (
+    CONDITION_INDEX,
+    CONDITION_KEYS,
+    MASK_WORDS,
+    METHOD_INDEX,
+    CategoryTable,
+    current_table,
+    mask_to_selection,
+    mask_to_words,
+    selection_to_mask,
+)
+from .data import METHODS
+
+
+@dataclass(frozen=True)
+class EscalationRule:
+    name: str
+    description: str
+    # Each group is a tuple of condition keys (a trailing "*" matches a
+    # prefix); a group counts once however many of its keys are selected.
+    groups: tuple[tuple[str, ...], ...]
+    min_groups: int
+    implies: str | None = None
+    escalate_to: int | None = None
+    methods: tuple[str, ...] = tuple(METHODS)
+
+    def __post_init__(self):
+        if (self.implies is None) == (self.escalate_to is None):
+            raise ValueError(f"{self.name}: give exactly one of implies / escalate_to")
+
+
+_CVD_RISK_FACTORS = (
+    ("SMOKE_AGE_LT_35", "SMOKE_AGE_GE_35_LT15", "SMOKE_AGE_GE_35_GE15", "SMOKE_AGE_GE_35_STOP_LT1"),
+    ("DM_NON_VASC_NON_INSULIN", "DM_NON_VASC_INSULIN", "DM_NEURO_RETINO", "DM_OTHER_VASC"),
+    ("HTN_*",),
+    ("OBESITY_*",),
+    ("DYSLIPIDEMIAS",),
+)
+
+RULES = (
+    EscalationRule(
+        name="multiple_cvd_risk",
+        description=(
+            "Two or more cardiovascular risk factors (smoking, diabetes, "
+            "hypertension, obesity, dyslipidaemia): treated as multiple risk "
+            "factors for CVD"
+        ),
+        groups=_CVD_RISK_FACTORS,
+        min_groups=2,
+        implies="CVD_MULTIPLE_RISK",
+    ),
+    EscalationRule(
+        name="obesity_smoking_35",
+        description="BMI ≥35 and smoking at age ≥35: CHC is unacceptable",
+        groups=(("OBESITY_BMI_GE_35",), ("SMOKE_AGE_GE_35_LT15", "SMOKE_AGE_GE_35_GE15")),
+        min_groups=2,
+        escalate_to=4,
+        methods=("CHC",),
+    ),
+)
+
+
+def expand_keys(patterns) -> tuple[str, ...]:
+    """Condition keys matched by exact keys or "PREFIX*" patterns."""
+    keys = []
+    for pattern in patterns:
+        if pattern.endswith("*"):
+            matches = [k for k in CONDITION_KEYS if k.startswith(pattern[:-1])]
+        else:
+            matches = [pattern] if pattern in CONDITION_INDEX else []
+        if not matches:
+            raise ValueError(f"Rule pattern matches no condition: {pattern}")
+        keys.extend(matches)
+    return tuple(dict.fromkeys(keys))
+
+
+@dataclass(frozen=True)
+class FiredRule:
+    rule: EscalationRule
+    triggers: tuple[str, ...]   # the selected keys that made it fire
+
+
+class CompiledRules:
+    """The rules as bitmasks, with their floors resolved against one table."""
+
+    def __init__(self, rules, table: CategoryTable):
+        self.rules = tuple(rules)
+        self.version = table.version
+        self.group_masks = [
+            [selection_to_mask(expand_keys(group)) for group in rule.groups] for rule in self.rules
+        ]
+        self.rule_masks = [
+            selection_to_mask(expand_keys(key for group in rule.groups for key in group))
+            for rule in self.rules
+        ]
+        # (rules, MASK_WORDS) per group index, for cohorts; groups beyond a
+        # rule's own count are all-zero and never hit.
+        max_groups = max((len(rule.groups) for rule in self.rules), default=0)
+        self.group_words = np.zeros((max_groups, len(self.rules), MASK_WORDS), dtype="<u8")
+        for r, masks in enumerate(self.group_masks):
+            for g, mask in enumerate(masks):
+                self.group_words[g, r] = mask_to_words(mask)
+        self.min_groups = np.array([rule.min_groups for rule in self.rules], dtype=np.int64)
+
+        # (rules, methods, 2): the category each rule raises cells to (0 = none).
+        self.floors = np.zeros((len(self.rules), len(METHODS), 2), dtype=np.int8)
+        for r, rule in enumerate(self.rules):
+            columns = [METHOD_INDEX[m] for m in rule.methods]
+            if rule.implies is not None:
+                self.floors[r, columns] = table.tensor[CONDITION_INDEX[rule.implies], columns]
+            else:
+                self.floors[r, columns] = rule.escalate_to
+        self.floors.setflags(write=False)
+
+    def fired(self, mask: int) -> list[int]:
+        """Indexes of the rules that fire for a selection bitmask."""
+        return [
+            r for r, masks in enumerate(self.group_masks)
+            if sum(1 for group in masks if mask & group) >= self.rules[r].min_groups
+        ]
+
+    def apply(self, mask: int, result: tuple[np.ndarray, tuple]) -> tuple[tuple, list[FiredRule]]:
+        """
+        Apply the rules to an evaluate_with_provenance() result. Cells a rule
+        raises get that rule's triggering keys as their drivers.
+        """
+        fired = self.fired(mask)
+        if not fired:
+            return result, []
+        worst, drivers = result
+        worst = worst.copy()
+        drivers = [list(method) for method in drivers]
+        fired_rules = []
+        for r in fired:
+            triggers = tuple(mask_to_selection(mask & self.rule_masks[r]))
+            fired_rules.append(FiredRule(self.rules[r], triggers))
+            floor = self.floors[r]
+            for j, phase in zip(*np.nonzero(floor > worst)):
+                worst[j, phase] = floor[j, phase]
+                drivers[j][phase] = triggers
+        worst.setflags(write=False)
+        return (worst, tuple(tuple(tuple(cell) for cell in method) for method in drivers)), fired_rules
+
+    def fired_cohort(self, words: np.ndarray) -> np.ndarray:
+        """(patients, rules) bool: which rules fire, for packed (patients, MASK_WORDS) selections."""
+        hits = np.zeros((len(words), len(self.rules)), dtype=np.int64)
+        for g in range(len(self.group_words)):
+            hits += (words[:, None, :] & self.group_words[g][None]).any(axis=2)
+        return hits >= self.min_groups
+
+    def apply_cohort(self, words: np.ndarray, worst: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Escalate an evaluate_cohort() result (patients x methods x 2) for
+        packed selections. Returns the escalated categories and the
+        (patients, rules) fired matrix.
+        """
+        fired = self.fired_cohort(words)
+        escalated = worst.copy()
+        for r in range(len(self.rules)):
+            rows = np.flatnonzero(fired[:, r])
+            if len(rows):
+                escalated[rows] = np.maximum(escalated[rows], self.floors[r])
+        return escalated, fired
+
+
+def validate_rules(rules=RULES):
+    """Raise ValueError for unknown keys, methods or categories in rules."""
+    for rule in rules:
+        for group in rule.groups:
+            expand_keys(group)
+        if rule.implies is not None and rule.implies not in CONDITION_INDEX:
+            raise ValueError(f"{rule.name}: unknown implied condition {rule.implies}")
+        if rule.escalate_to is not None and rule.escalate_to not in (2, 3, 4):
+            raise ValueError(f"{rule.name}: escalate_to must be 2, 3 or 4")
+        for method in rule.methods:
+            if method not in METHOD_INDEX:
+                raise ValueError(f"{rule.name}: unknown method {method}")
+        if not 1 <= rule.min_groups <= len(rule.groups):
+            raise ValueError(f"{rule.name}: min_groups out of range")
+
+
+_compiled_lock = threading.Lock()
+_compiled: dict[str, CompiledRules] = {}
+_MAX_COMPILED = 8
+
+
+def compiled_rules(table: CategoryTable) -> CompiledRules:
+    """RULES compiled against `table`, cached per table version."""
+    with _compiled_lock:
+        rules = _compiled.get(table.version)
+        if rules is None:
+            if len(_compiled) >= _MAX_COMPILED:
+                _compiled.clear()
+            rules = _compiled[table.version] = CompiledRules(RULES, table)
+        return rules
+
+
+def current_rules() -> CompiledRules:
+    """RULES compiled against the active table, recompiled when it changes."""
+    return compiled_rules(current_table())
+
+
+validate_rules()
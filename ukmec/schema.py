@@ -0,0 +1,287 @@
+"""
+Condition schema: how every UKMEC_DATA key is presented to the user.
+
+Each condition has a label, the form section it belongs to and, optionally,
+an exclusivity group (at most one key of a group can apply to a patient, so
+the group is rendered as a single radio). Keys marked ``derived`` are not
+picked directly; ukmec.derive computes them from the basic-info inputs (age,
+postpartum status, smoking, BMI).
+"""
+from dataclasses import dataclass
+
+from .data import UKMEC_DATA
+
+
+@dataclass(frozen=True)
+class ConditionSpec:
+    key: str
+    label: str
+    section: str
+    group: str | None = None
+    derived: bool = False
+
+
+@dataclass(frozen=True)
+class FormSection:
+    """
+    One collapsible section of the condition form. Each field is a tuple of
+    specs: a single spec is a checkbox, several form an exclusive radio group.
+    """
+    name: str
+    fields: tuple[tuple[ConditionSpec, ...], ...]
+
+    @property
+    def keys(self) -> tuple[str, ...]:
+        return tuple(spec.key for field in self.fields for spec in field)
+
+
+GROUP_LABELS = {
+    "age": "Age",
+    "parity": "Parity",
+    "postpartum": "Postpartum status",
+    "pp_iuc": "Postpartum IUC insertion",
+    "abortion": "Abortion <24 weeks",
+    "smoking": "Smoking",
+    "obesity": "Obesity (BMI)",
+    "transplant": "Solid organ transplant",
+    "htn": "Hypertension",
+    "vte_fhx": "Family history of VTE (first-degree relative)",
+    "valvular": "Valvular/congenital heart disease",
+    "cardiomyopathy": "Cardiomyopathy",
+    "gtd": "Gestational trophoblastic disease",
+    "cirrhosis": "Cirrhosis",
+    "sle": "Systemic lupus erythematosus",
+}
+
+# (section, [(key, label, group), ...]) in form order. Sections whose name is
+# in _DERIVED_SECTIONS are filled in from the basic-info inputs.
+_SCHEMA_TABLE = [
+    ("Age & parity", [
+        ("AGE_MENARCHE_TO_LT_20", "Age menarche to <20", "age"),
+        ("AGE_GE_20", "Age ≥20", "age"),
+        ("PARITY_NULLIPAROUS", "Nulliparous", "parity"),
+        ("PARITY_PAROUS", "Parous", "parity"),
+    ]),
+    ("Breastfeeding & postpartum", [
+        ("BREASTFEEDING_0_TO_6_WEEKS", "Breastfeeding, 0 to <6 weeks", "postpartum"),
+        ("BREASTFEEDING_6_WEEKS_TO_6_MONTHS", "Breastfeeding, 6 weeks to <6 months", "postpartum"),
+        ("BREASTFEEDING_GE_6_MONTHS", "Breastfeeding, ≥6 months", "postpartum"),
+        ("PP_0_TO_3_WEEKS_VTE", "Postpartum 0 to <3 weeks, other VTE risk factors", "postpartum"),
+        ("PP_0_TO_3_WEEKS_NO_VTE", "Postpartum 0 to <3 weeks, no other VTE risk factors", "postpartum"),
+        ("PP_3_TO_6_WEEKS_VTE", "Postpartum 3 to <6 weeks, other VTE risk factors", "postpartum"),
+        ("PP_3_TO_6_WEEKS_NO_VTE", "Postpartum 3 to <6 weeks, no other VTE risk factors", "postpartum"),
+        ("PP_GE_6_WEEKS", "Postpartum ≥6 weeks", "postpartum"),
+    ]),
+    ("Smoking", [
+        ("SMOKE_AGE_LT_35", "Smoker, age <35", "smoking"),
+        ("SMOKE_AGE_GE_35_LT15", "Smoker, age ≥35, <15 cigarettes/day", "smoking"),
+        ("SMOKE_AGE_GE_35_GE15", "Smoker, age ≥35, ≥15 cigarettes/day", "smoking"),
+        ("SMOKE_AGE_GE_35_STOP_LT1", "Age ≥35, stopped smoking <1 year ago", "smoking"),
+        ("SMOKE_AGE_GE_35_STOP_GE1", "Age ≥35, stopped smoking ≥1 year ago", "smoking"),
+    ]),
+    ("Obesity", [
+        ("OBESITY_BMI_30_34", "BMI 30-34", "obesity"),
+        ("OBESITY_BMI_GE_35", "BMI ≥35", "obesity"),
+    ]),
+    ("Pregnancy & reproductive history", [
+        ("PP_0_TO_48H_IUC", "IUC inserted 0 to <48 hours postpartum", "pp_iuc"),
+        ("PP_48H_TO_4W_IUC", "IUC inserted 48 hours to <4 weeks postpartum", "pp_iuc"),
+        ("PP_SEPSIS", "Postpartum sepsis?", None),
+        ("ABORT_1ST_TRIM", "First trimester", "abortion"),
+        ("ABORT_2ND_TRIM", "Second trimester", "abortion"),
+        ("ABORT_SEPSIS", "Post-abortion sepsis?", None),
+        ("PAST_ECTOPIC", "Past ectopic pregnancy?", None),
+        ("HX_PELVIC_SURG", "History of pelvic surgery?", None),
+    ]),
+    ("Organ transplant", [
+        ("TRANSPLANT_COMPLICATED", "Complicated", "transplant"),
+        ("TRANSPLANT_UNCOMPLICATED", "Uncomplicated", "transplant"),
+    ]),
+    ("Cardiovascular disease", [
+        ("CVD_MULTIPLE_RISK", "Multiple CVD risk factors?", None),
+        ("HTN_ADEQ_CONTROL", "Adequately controlled", "htn"),
+        ("HTN_SYST_140_159_DIA_90_99", "140-159/90-99", "htn"),
+        ("HTN_SYST_GE160_DIA_GE100", "≥160/≥100", "htn"),
+        ("HTN_VASC_DISEASE", "HTN w/ vascular disease?", None),
+        ("HX_HIGH_BP_PREG", "History of high BP in pregnancy?", None),
+        ("IHD_CURRENT_OR_HISTORY", "Ischaemic heart disease (current/past)?", None),
+        ("STROKE_TIA", "Stroke / TIA (current/past)?", None),
+        ("DYSLIPIDEMIAS", "Known dyslipidaemias?", None),
+        ("VALV_CONG_UNCOMPLICATED", "Uncomplicated", "valvular"),
+        ("VALV_CONG_COMPLICATED", "Complicated", "valvular"),
+        ("CARDIOMYO_NORMAL", "Normal cardiac function", "cardiomyopathy"),
+        ("CARDIOMYO_IMPAIRED", "Impaired cardiac function", "cardiomyopathy"),
+        ("AF", "Atrial fibrillation?", None),
+        ("LONG_QT", "Known Long QT syndrome?", None),
+    ]),
+    ("Venous thromboembolism", [
+        ("VTE_HISTORY", "History of VTE?", None),
+        ("VTE_CURRENT_ANTICOAG", "Current VTE (on anticoagulants)?", None),
+        ("VTE_FHX_1ST_LT_45", "Aged <45", "vte_fhx"),
+        ("VTE_FHX_1ST_GE_45", "Aged ≥45", "vte_fhx"),
+        ("VTE_MAJ_SURG_PROLONG_IMMOB", "Major surgery w/ prolonged immobilization?", None),
+        ("VTE_MAJ_SURG_NO_IMMOB", "Major surgery w/o prolonged immobilization?", None),
+        ("VTE_MINOR_SURG_NO_IMMOB", "Minor surgery w/o immobilization?", None),
+        ("VTE_IMMOBILITY", "Chronic immobility (wheelchair, etc.)?", None),
+        ("SVT_VARICOSE", "Superficial varicose veins?", None),
+        ("SVT_THROMBOSIS", "Superficial venous thrombosis?", None),
+        ("THROMBO_MUTATIONS", "Known thrombogenic mutations?", None),
+    ]),
+    ("Neurological & psychiatric", [
+        ("HEADACHE_NON_MIGRAINE", "Non-migrainous headache?", None),
+        ("MIGRAINE_NO_AURA", "Migraine without aura?", None),
+        ("MIGRAINE_WITH_AURA", "Migraine with aura?", None),
+        ("MIGRAINE_AURA_HX_5Y", "History of migraine with aura >5 years ago?", None),
+        ("IIH", "Idiopathic intracranial hypertension?", None),
+        ("EPILEPSY", "Epilepsy?", None),
+        ("DEPRESSION", "Depression?", None),
+    ]),
+    ("Vaginal bleeding & reproductive tract", [
+        ("BLEED_IRREG_NO_HEAVY", "Irregular bleeding (not heavy)?", None),
+        ("BLEED_HEAVY_OR_PROLONGED", "Heavy/prolonged bleeding?", None),
+        ("UNEXPL_BLEED_BEFORE_EVAL", "Unexplained bleeding (before evaluation)?", None),
+        ("ENDOMETRIOSIS", "Endometriosis?", None),
+        ("OVARIAN_BENIGN", "Benign ovarian tumors/cysts?", None),
+        ("DYSMENORRHEA_SEV", "Severe dysmenorrhea?", None),
+        ("GTD_UNDETECTABLE_HCG", "Undetectable hCG", "gtd"),
+        ("GTD_DECREASING_HCG", "Decreasing hCG", "gtd"),
+        ("GTD_PERSIST_ELEV", "Persistently elevated hCG", "gtd"),
+        ("CERVICAL_ECTROPION", "Cervical ectropion?", None),
+        ("CIN", "CIN?", None),
+        ("CERV_CA_AWAIT_TX_I", "Cervical Ca awaiting treatment (I)?", None),
+        ("CERV_CA_AWAIT_TX_C", "Cervical Ca awaiting treatment (C)?", None),
+        ("CERV_CA_RAD_TRA", "Cervical Ca radical trachelectomy?", None),
+        ("ENDOMETRIAL_CA_I", "Endometrial Ca (initiation)?", None),
+        ("ENDOMETRIAL_CA_C", "Endometrial Ca (continuation)?", None),
+        ("OVARIAN_CA", "Ovarian Ca?", None),
+        ("FIBROIDS_NO_DISTORT", "Fibroids (no distortion)?", None),
+        ("FIBROIDS_DISTORT", "Fibroids (distorting uterine cavity)?", None),
+        ("ANAT_UTERINE_DISTORT", "Anatomical abnormality that distorts uterine cavity?", None),
+        ("ANAT_UTERINE_OTHER", "Other anatomical abnormality?", None),
+    ]),
+    ("Breast", [
+        ("BREAST_UNDX_MASS_I", "Undiagnosed breast mass (I)?", None),
+        ("BREAST_UNDX_MASS_C", "Undiagnosed breast mass (C)?", None),
+        ("BREAST_BENIGN", "Benign breast conditions?", None),
+        ("BREAST_FHX_CA", "Family history of breast cancer?", None),
+        ("BREAST_BRCA_MUT", "BRCA gene mutation carrier?", None),
+        ("BREAST_CA_CURRENT", "Current breast cancer?", None),
+        ("BREAST_CA_PAST", "Past breast cancer?", None),
+    ]),
+    ("PID & STIs", [
+        ("PID_PAST_NO_RISK", "Past PID (no current risk)?", None),
+        ("PID_CURRENT_I", "Current PID (I)?", None),
+        ("PID_CURRENT_C", "Current PID (C)?", None),
+        ("STI_CHLAM_SYMPT_I", "Chlamydia symptomatic (I)?", None),
+        ("STI_CHLAM_SYMPT_C", "Chlamydia symptomatic (C)?", None),
+        ("STI_CHLAM_ASYMP_I", "Chlamydia asymptomatic (I)?", None),
+        ("STI_CHLAM_ASYMP_C", "Chlamydia asymptomatic (C)?", None),
+        ("STI_GONORR_I", "Gonorrhea (I)?", None),
+        ("STI_GONORR_C", "Gonorrhea (C)?", None),
+        ("STI_OTHER_CURRENT", "Other current STIs?", None),
+        ("STI_VAGINITIS", "Vaginitis?", None),
+        ("STI_INCREASED_RISK", "Increased risk of STIs?", None),
+    ]),
+    ("HIV & TB", [
+        ("HIV_HIGH_RISK", "High risk of HIV infection?", None),
+        ("HIV_INF_CD4_GE200", "HIV infected, CD4≥200?", None),
+        ("HIV_INF_CD4_LT200_I", "HIV infected, CD4<200 (I)?", None),
+        ("HIV_INF_CD4_LT200_C", "HIV infected, CD4<200 (C)?", None),
+        ("TB_NON_PELVIC", "TB (non-pelvic)?", None),
+        ("TB_PELVIC_I", "TB (pelvic) - Initiation?", None),
+        ("TB_PELVIC_C", "TB (pelvic) - Continuation?", None),
+    ]),
+    ("Diabetes", [
+        ("DM_GESTATIONAL", "Gestational diabetes history?", None),
+        ("DM_NON_VASC_NON_INSULIN", "Diabetes, non-vascular, non-insulin?", None),
+        ("DM_NON_VASC_INSULIN", "Diabetes, non-vascular, insulin?", None),
+        ("DM_NEURO_RETINO", "Diabetic nephropathy/retinopathy?", None),
+        ("DM_OTHER_VASC", "Other vascular diabetes?", None),
+    ]),
+    ("Gastrointestinal & liver", [
+        ("IBD", "Inflammatory bowel disease?", None),
+        ("HEP_ACUTE_FLARE_I", "Acute or flare hepatitis (I)?", None),
+        ("HEP_ACUTE_FLARE_C", "Acute or flare hepatitis (C)?", None),
+        ("HEP_CARRIER", "Hepatitis carrier?", None),
+        ("HEP_CHRONIC", "Chronic hepatitis?", None),
+        ("CIRRHOSIS_MILD", "Mild (compensated)", "cirrhosis"),
+        ("CIRRHOSIS_SEVERE", "Severe (decompensated)", "cirrhosis"),
+        ("LIVER_BENIGN_FNH", "Benign liver tumor (focal nodular hyperplasia)?", None),
+        ("LIVER_BENIGN_HCA", "Benign hepatocellular adenoma?", None),
+        ("LIVER_MALIGNANT", "Malignant liver tumor?", None),
+    ]),
+    ("Anaemias", [
+        ("THALASSAEMIA", "Thalassaemia?", None),
+        ("SICKLE_CELL", "Sickle cell disease?", None),
+        ("IRON_DEF_ANAEMIA", "Iron deficiency anaemia?", None),
+    ]),
+    ("Rheumatic disease", [
+        ("RA", "Rheumatoid arthritis?", None),
+        ("SLE_NO_APL", "No antiphospholipid antibodies", "sle"),
+        ("SLE_APL", "With antiphospholipid antibodies", "sle"),
+    ]),
+]
+
+_DERIVED_SECTIONS = {"Age & parity", "Breastfeeding & postpartum", "Smoking", "Obesity"}
+
+CONDITION_SCHEMA = tuple(
+    ConditionSpec(key, label, section, group, section in _DERIVED_SECTIONS)
+    for section, rows in _SCHEMA_TABLE
+    for key, label, group in rows
+)
+CONDITION_SPECS = {spec.key: spec for spec in CONDITION_SCHEMA}
+
+
+def condition_label(key: str) -> str:
+    """
+    A key's label for use outside its form field. A grouped label is only
+    written to be read inside its radio ("Complicated"), so it is prefixed
+    with the group's, e.g. "Hypertension: 140-159/90-99".
+    """
+    spec = CONDITION_SPECS[key]
+    return f"{GROUP_LABELS[spec.group]}: {spec.label}" if spec.group else spec.label
+
+
+def validate_schema(schema=CONDITION_SCHEMA, data=UKMEC_DATA) -> None:
+    """
+    Check that the schema and the table describe exactly the same keys.
+    Raises ValueError listing any key missing from either side.
+    """
+    schema_keys = [spec.key for spec in schema]
+    duplicates = sorted({k for k in schema_keys if schema_keys.count(k) > 1})
+    missing = sorted(set(data) - set(schema_keys))
+    unknown = sorted(set(schema_keys) - set(data))
+    if duplicates or missing or unknown:
+        raise ValueError(
+            f"Condition schema out of sync with UKMEC_DATA: "
+            f"duplicates={duplicates}, missing={missing}, unknown={unknown}"
+        )
+
+
+def form_sections(schema=CONDITION_SCHEMA) -> list[FormSection]:
+    """
+    Group the non-derived specs into FormSections, keeping schema order and
+    folding each exclusivity group into one field at its first member.
+    """
+    validate_schema(schema)
+    sections: dict[str, list] = {}
+    group_fields: dict[str, list[ConditionSpec]] = {}
+    for spec in schema:
+        if spec.derived:
+            continue
+        fields = sections.setdefault(spec.section, [])
+        if spec.group is None:
+            fields.append((spec,))
+        elif spec.group in group_fields:
+            group_fields[spec.group].append(spec)
+        else:
+            group_fields[spec.group] = [spec]
+            fields.append(spec.group)
+
+    return [
+        FormSection(name, tuple(
+            tuple(group_fields[field]) if isinstance(field, str) else field
+            for field in fields
+        ))
+        for name, fields in sections.items()
+    ]
@@ -0,0 +1,369 @@
+"""
+Local HTTP JSON API for UKMEC evaluation, on tornado.
+
+Endpoints:
+    POST /v1/evaluate        {"conditions": ["AGE_GE_20", ...]}
+    POST /v1/evaluate/batch  {"selections": [["AGE_GE_20", ...], ...]}
+    GET  /v1/stats           request counts and latency histogram
+    GET  /metrics            ukmec.metrics in the Prometheus text format
+    GET  /healthz
+
+Both evaluate endpoints answer with every method under Initiation and
+Continuation, e.g. {"results": {"CHC": {"I": 4, "C": 4}, ...}, "unknown": [],
+"rules_applied": true}. Results are escalated by the combination rules
+(ukmec.rules), so they match what the app shows; start the server with
+--no-apply-rules for the plain worst categories. Every response says which
+it got in "rules_applied".
+
+Single-patient requests are micro-batched: they wait at most
+--batch-window-ms (or until --max-batch requests are pending) and are then
+scored together with one evaluate_cohort() call. The number of requests in
+flight is bounded by --max-queue; beyond it the server answers 503 with a
+Retry-After header instead of queueing without limit. A batch request with
+more selections than --max-queue could never be admitted, so it gets 413
+straight away rather than a 503 to retry. The latency histogram only
+counts requests that were scored. If scoring a micro-batch fails, every
+request in it gets a 500. Connections are HTTP/1.1 keep-alive. A replaced
+UKMEC table file is hot-reloaded (see ukmec.core.watch_table); requests
+already scored keep their results.
+
+Usage:
+    python -m ukmec.server [--port 8502] [--max-queue 1024] [--no-apply-rules]
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import time
+
+import numpy as np
+import tornado.httpserver
+import tornado.web
+
+from .core import (
+    CONDITION_INDEX,
+    CONDITION_KEYS,
+    current_table,
+    evaluate_cohort,
+    results_json,
+    selection_matrix_to_words,
+    watch_table,
+)
+from .metrics import CONTENT_TYPE, EVALUATION_SECONDS, EVALUATIONS, REGISTRY
+from .rules import current_rules
+
+DEFAULT_PORT = 8502
+DEFAULT_MAX_QUEUE = 1024
+DEFAULT_MAX_BATCH = 256
+DEFAULT_BATCH_WINDOW_MS = 1.0
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+# Upper bounds of the latency histogram buckets, in milliseconds.
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+
+
+class QueueFullError(Exception):
+    """Raised when accepting a request would exceed the in-flight bound."""
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with approximate quantiles."""
+
+    def __init__(self, buckets_ms=LATENCY_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self.counts = [0] * (len(self.buckets_ms) + 1)  # last one is +Inf
+        self.count = 0
+        self.sum_ms = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect.bisect_left(self.buckets_ms, ms)] += 1
+        self.count += 1
+        self.sum_ms += ms
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th quantile (inf if overflowed)."""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for bound, n in zip(self.buckets_ms + (float("inf"),), self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def to_dict(self) -> dict:
+        p50, p99 = self.quantile(0.50), self.quantile(0.99)
+        return {
+            "count": self.count,
+            "mean_ms": self.sum_ms / self.count if self.count else 0.0,
+            # None means the quantile fell past the last finite bucket.
+            "p50_ms": None if p50 == float("inf") else p50,
+            "p99_ms": None if p99 == float("inf") else p99,
+            "buckets": {
+                ("+Inf" if bound == float("inf") else str(bound)): n
+                for bound, n in zip(self.buckets_ms + (float("inf"),), self.counts)
+            },
+        }
+
+
+##############################################################################
+# 1) REQUEST BATCHING
+##############################################################################
+def selection_rows(conditions) -> tuple[list[int], list[str]]:
+    """Split a JSON condition list into known table rows and unknown keys."""
+    if not isinstance(conditions, list) or not all(isinstance(k, str) for k in conditions):
+        raise ValueError("conditions must be a list of condition-key strings")
+    rows = [CONDITION_INDEX[k] for k in conditions if k in CONDITION_INDEX]
+    unknown = [k for k in conditions if k not in CONDITION_INDEX]
+    return rows, unknown
+
+
+def score_rows(selections: list[list[int]], apply_rules: bool = True) -> np.ndarray:
+    """
+    Score several row-index selections with one evaluate_cohort() call,
+    escalated by the combination rules with apply_rules.
+    """
+    with EVALUATION_SECONDS.time("server"):
+        matrix = np.zeros((len(selections), len(CONDITION_KEYS)), dtype=bool)
+        for i, rows in enumerate(selections):
+            matrix[i, rows] = True
+        worst = evaluate_cohort(matrix)
+        if apply_rules:
+            worst, _ = current_rules().apply_cohort(selection_matrix_to_words(matrix), worst)
+    EVALUATIONS.inc("server", amount=len(selections))
+    return worst
+
+
+class MicroBatcher:
+    """
+    Collects single-patient selections on the IOLoop and scores them together.
+
+    A batch is flushed when max_batch selections are pending or batch_window
+    seconds after the first one arrived, whichever comes first. Admission is
+    bounded by max_queue selections in flight.
+    """
+
+    def __init__(self, max_queue: int, max_batch: int, batch_window: float, apply_rules: bool = True):
+        self.max_queue = max_queue
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.apply_rules = apply_rules
+        self.in_flight = 0
+        self.batches = 0
+        self._pending: list[tuple[list[int], asyncio.Future]] = []
+        self._timer = None
+
+    def admit(self, n: int = 1):
+        if self.in_flight + n > self.max_queue:
+            raise QueueFullError
+        self.in_flight += n
+
+    def release(self, n: int = 1):
+        self.in_flight -= n
+
+    async def submit(self, rows: list[int]) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((rows, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.batch_window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        try:
+            worst = score_rows([rows for rows, _ in pending], self.apply_rules)
+        except Exception as exc:
+            # Fail the waiting requests rather than leave them hanging (and
+            # holding their in-flight slots) until the client gives up.
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        self.batches += 1
+        for (_, future), result in zip(pending, worst):
+            if not future.done():
+                future.set_result(result)
+
+
+##############################################################################
+# 2) HANDLERS
+##############################################################################
+class _JSONHandler(tornado.web.RequestHandler):
+    def initialize(self, batcher: MicroBatcher, stats: dict):
+        self.batcher = batcher
+        self.stats = stats
+
+    def write_json(self, payload: dict, status: int = 200):
+        self.set_status(status)
+        self.set_header("Content-Type", "application/json")
+        self.finish(json.dumps(payload))
+
+    def write_error(self, status_code: int, **kwargs):
+        self.write_json({"error": self._reason}, status_code)
+
+    def read_json(self) -> dict:
+        try:
+            body = json.loads(self.request.body)
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason="Body is not valid JSON")
+        if not isinstance(body, dict):
+            raise tornado.web.HTTPError(400, reason="Body must be a JSON object")
+        return body
+
+    def reject_overloaded(self):
+        self.stats["rejected"] += 1
+        self.set_header("Retry-After", "1")
+        self.write_json({"error": "Request queue is full"}, 503)
+
+    def on_finish(self):
+        # Fast rejections (503, 4xx) would drag the quantiles down under overload.
+        if self.request.method == "POST" and self.get_status() == 200:
+            self.stats["latency"].observe(self.request.request_time() * 1000)
+
+
+class EvaluateHandler(_JSONHandler):
+    async def post(self):
+        body = self.read_json()
+        try:
+            rows, unknown = selection_rows(body.get("conditions"))
+        except ValueError as exc:
+            raise tornado.web.HTTPError(400, reason=str(exc))
+        try:
+            self.batcher.admit()
+        except QueueFullError:
+            return self.reject_overloaded()
+        try:
+            worst = await self.batcher.submit(rows)
+        finally:
+            self.batcher.release()
+        self.stats["patients"] += 1
+        self.write_json({
+            "results": results_json(worst),
+            "unknown": unknown,
+            "rules_applied": self.batcher.apply_rules,
+        })
+
+
+class BatchEvaluateHandler(_JSONHandler):
+    async def post(self):
+        body = self.read_json()
+        selections = body.get("selections")
+        if not isinstance(selections, list):
+            raise tornado.web.HTTPError(400, reason="selections must be a list")
+        if len(selections) > self.batcher.max_queue:
+            raise tornado.web.HTTPError(
+                413, reason=f"At most {self.batcher.max_queue} selections per request"
+            )
+        try:
+            parsed = [selection_rows(conditions) for conditions in selections]
+        except ValueError as exc:
+            raise tornado.web.HTTPError(400, reason=str(exc))
+        try:
+            self.batcher.admit(len(parsed))
+        except QueueFullError:
+            return self.reject_overloaded()
+        try:
+            worst = score_rows([rows for rows, _ in parsed], self.batcher.apply_rules)
+        finally:
+            self.batcher.release(len(parsed))
+        self.stats["patients"] += len(parsed)
+        self.write_json({
+            "results": [
+                {"results": results_json(w), "unknown": unknown}
+                for w, (_, unknown) in zip(worst, parsed)
+            ],
+            "rules_applied": self.batcher.apply_rules,
+        })
+
+
+class StatsHandler(_JSONHandler):
+    def get(self):
+        table = current_table()
+        self.write_json({
+            "patients": self.stats["patients"],
+            "rejected": self.stats["rejected"],
+            "in_flight": self.batcher.in_flight,
+            "micro_batches": self.batcher.batches,
+            "rules_applied": self.batcher.apply_rules,
+            "uptime_s": time.monotonic() - self.stats["started"],
+            "latency": self.stats["latency"].to_dict(),
+            "table": {"label": table.label, "version": table.version},
+        })
+
+
+class MetricsHandler(tornado.web.RequestHandler):
+    def get(self):
+        self.set_header("Content-Type", CONTENT_TYPE)
+        self.finish(REGISTRY.render())
+
+
+class HealthHandler(tornado.web.RequestHandler):
+    def get(self):
+        self.finish("ok")
+
+
+def make_app(
+    max_queue: int = DEFAULT_MAX_QUEUE,
+    max_batch: int = DEFAULT_MAX_BATCH,
+    batch_window_ms: float = DEFAULT_BATCH_WINDOW_MS,
+    apply_rules: bool = True,
+) -> tornado.web.Application:
+    batcher = MicroBatcher(max_queue, max_batch, batch_window_ms / 1000, apply_rules)
+    stats = {
+        "patients": 0,
+        "rejected": 0,
+        "started": time.monotonic(),
+        "latency": LatencyHistogram(),
+    }
+    shared = {"batcher": batcher, "stats": stats}
+    return tornado.web.Application([
+        (r"/v1/evaluate", EvaluateHandler, shared),
+        (r"/v1/evaluate/batch", BatchEvaluateHandler, shared),
+        (r"/v1/stats", StatsHandler, shared),
+        (r"/metrics", MetricsHandler),
+        (r"/healthz", HealthHandler),
+    ])
+
+
+async def serve(port: int, address: str, **app_options):
+    server = tornado.httpserver.HTTPServer(
+        make_app(**app_options),
+        max_body_size=MAX_BODY_BYTES,
+        idle_connection_timeout=60,
+    )
+    server.listen(port, address)
+    watch_table()
+    print(f"UKMEC API listening on http://{address}:{port}")
+    await asyncio.Event().wait()
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Serve the UKMEC engine over HTTP/JSON.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--address", default="127.0.0.1")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE)
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument("--batch-window-ms", type=float, default=DEFAULT_BATCH_WINDOW_MS)
+    parser.add_argument("--apply-rules", action=argparse.BooleanOptionalAction, default=True,
+                        help="escalate results with the combination rules (ukmec.rules), "
+                             "as the app does (default: on)")
+    args = parser.parse_args(argv)
+    asyncio.run(serve(
+        args.port, args.address,
+        max_queue=args.max_queue,
+        max_batch=args.max_batch,
+        batch_window_ms=args.batch_window_ms,
+        apply_rules=args.apply_rules,
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Per-session evaluation state that can be evicted, and a memory report.
+
+A session's canonical selection is one integer bitmask (bit i =
+CONDITION_KEYS[i]) that the app keeps in st.session_state. Everything else
+a session needs to evaluate quickly -- its IncrementalEvaluator -- is
+derived from that mask, so it lives here in a process-wide SessionRegistry
+keyed by session id, where it can be dropped without losing anything:
+
+* an entry idle for longer than idle_seconds is evicted by the next call
+  into the registry from any session;
+* beyond max_sessions entries, the least recently used is evicted.
+
+An evicted session just rebuilds its evaluator from the mask on its next
+rerun. evaluator() also brings a kept evaluator up to date with the mask by
+toggling only the bits that differ.
+
+The registry also samples each session's st.session_state size (at most
+every SIZE_SAMPLE_SECONDS per session) for report(): live sessions, bytes
+per session and the process RSS, to check how many sessions fit in a
+container. Configure with UKMEC_SESSION_IDLE_S and UKMEC_SESSION_MAX.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+
+from .incremental import IncrementalEvaluator
+from .instrument import deep_sizeof, process_rss_bytes
+
+SESSION_IDLE_ENV = "UKMEC_SESSION_IDLE_S"
+SESSION_MAX_ENV = "UKMEC_SESSION_MAX"
+DEFAULT_IDLE_SECONDS = 900.0
+DEFAULT_MAX_SESSIONS = 1000
+SIZE_SAMPLE_SECONDS = 10.0
+
+
+@dataclass
+class _Entry:
+    evaluator: IncrementalEvaluator
+    last_active: float
+    state_bytes: int = 0
+    evaluator_bytes: int = 0
+    sized_at: float = float("-inf")
+
+
+@dataclass(frozen=True)
+class MemoryReport:
+    live_sessions: int          # entries active within the idle window
+    evicted: int                # evictions since the registry was created
+    state_bytes_total: int      # sampled st.session_state sizes, summed
+    state_bytes_mean: float
+    state_bytes_max: int
+    evaluator_bytes_mean: float
+    rss_bytes: int | None       # whole process, None off Linux
+
+
+class SessionRegistry:
+    def __init__(self, idle_seconds: float = DEFAULT_IDLE_SECONDS,
+                 max_sessions: int = DEFAULT_MAX_SESSIONS):
+        self.idle_seconds = idle_seconds
+        self.max_sessions = max_sessions
+        self.evicted = 0
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def evaluator(self, session_id: str, mask: int) -> IncrementalEvaluator:
+        """The session's evaluator, rebuilt if evicted and synced to mask."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+            if entry is None:
+                entry = _Entry(IncrementalEvaluator(), now)
+            entry.last_active = now
+            self._entries[session_id] = entry
+            self._evict(now)
+        entry.evaluator.set_mask(mask)
+        return entry.evaluator
+
+    def record_state_size(self, session_id: str, state: Callable[[], Mapping]):
+        """
+        Sample the size of a session's state (state() returns it), at most
+        every SIZE_SAMPLE_SECONDS.
+        """
+        entry = self._entries.get(session_id)
+        now = time.monotonic()
+        if entry is None or now - entry.sized_at < SIZE_SAMPLE_SECONDS:
+            return
+        entry.sized_at = now
+        entry.state_bytes = deep_sizeof(dict(state()))
+        entry.evaluator_bytes = deep_sizeof(entry.evaluator)
+
+    def forget(self, session_id: str):
+        with self._lock:
+            if self._entries.pop(session_id, None) is not None:
+                self.evicted += 1
+
+    def evict_idle(self) -> int:
+        """Evict idle entries now; returns how many were evicted."""
+        with self._lock:
+            before = self.evicted
+            self._evict(time.monotonic())
+            return self.evicted - before
+
+    def live_count(self) -> int:
+        """Entries active within the idle window, evicting the idle ones first."""
+        with self._lock:
+            self._evict(time.monotonic())
+            return len(self._entries)
+
+    def _evict(self, now: float):
+        # Entries are kept in least-recently-used order.
+        while self._entries:
+            session_id, entry = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_sessions and now - entry.last_active <= self.idle_seconds:
+                break
+            del self._entries[session_id]
+            self.evicted += 1
+
+    def report(self) -> MemoryReport:
+        with self._lock:
+            self._evict(time.monotonic())
+            entries = list(self._entries.values())
+        sized = [entry for entry in entries if entry.state_bytes]
+        state = [entry.state_bytes for entry in sized]
+        return MemoryReport(
+            live_sessions=len(entries),
+            evicted=self.evicted,
+            state_bytes_total=sum(state),
+            state_bytes_mean=sum(state) / len(state) if state else 0.0,
+            state_bytes_max=max(state, default=0),
+            evaluator_bytes_mean=(
+                sum(entry.evaluator_bytes for entry in sized) / len(sized) if sized else 0.0
+            ),
+            rss_bytes=process_rss_bytes(),
+        )
+
+
+_registry: SessionRegistry | None = None
+_registry_lock = threading.Lock()
+
+
+def session_registry() -> SessionRegistry:
+    """The process-wide registry, configured from the environment on first use."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = SessionRegistry(
+                float(os.environ.get(SESSION_IDLE_ENV, DEFAULT_IDLE_SECONDS)),
+                int(os.environ.get(SESSION_MAX_ENV, DEFAULT_MAX_SESSIONS)),
+            )
+        return _registry
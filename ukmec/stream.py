@@ -0,0 +1,253 @@
+"""
+Streaming JSONL evaluation for pipes, without Streamlit or a server.
+
+    cat consults.jsonl | python -m ukmec.stream > scored.jsonl
+
+Each input line is a JSON object with a ``conditions`` list of condition
+keys and/or raw patient attributes (``age``, ``bmi``, ``smoker``, ... -- see
+ukmec.derive.ATTRIBUTES). Every output line is the input object plus
+``results`` ({method: {"I": .., "C": ..}}: the worst categories escalated
+by the combination rules in ukmec.rules, as the app shows them, unless
+--no-apply-rules is given) and ``unknown`` (skipped keys). A line that
+can't be parsed comes out as {"line": n, "error": "..."}. Blank lines are
+skipped, so output lines match the non-blank input lines one to one and in
+order; the "line" of an error is its number in the input, blank lines
+included. Throughput counts the scored records only; error lines are
+counted apart.
+
+A reader thread parses lines into micro-batches and hands them over a
+bounded queue; the main thread scores each batch with one evaluate_cohort()
+call and writes it out straight away. When the output side is slower, the
+queue fills and the reader blocks, so about --max-in-flight records (at
+least three batches) are held in memory. Throughput stats go to stderr at exit.
+
+Usage:
+    python -m ukmec.stream [input.jsonl] [--batch-size 512] [--max-in-flight 8192]
+        [--no-apply-rules]
+"""
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from .core import (
+    CONDITION_INDEX,
+    CONDITION_KEYS,
+    evaluate_cohort,
+    results_json,
+    selection_matrix_to_words,
+)
+from .derive import ATTRIBUTES, derive_selection_matrix
+from .rules import current_rules
+
+DEFAULT_BATCH_SIZE = 512
+DEFAULT_MAX_IN_FLIGHT = 8192
+_MAX_RESULT_FRAGMENTS = 4096
+
+_END = object()
+
+
+@dataclass
+class StreamStats:
+    records: int = 0        # scored records; bad lines are only in errors
+    errors: int = 0
+    batches: int = 0
+    unknown_keys: int = 0
+    seconds: float = 0.0
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.seconds if self.seconds else 0.0
+
+
+##############################################################################
+# 1) PARSING
+##############################################################################
+def parse_records(lines, conditions_field: str = "conditions"):
+    """
+    Yield (line number, record or None, error or None) for each non-blank
+    input line.
+    """
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield number, None, f"invalid JSON: {exc}"
+            continue
+        if not isinstance(record, dict):
+            yield number, None, "record must be a JSON object"
+            continue
+        conditions = record.get(conditions_field, [])
+        if not isinstance(conditions, list) or not all(isinstance(k, str) for k in conditions):
+            yield number, None, f"{conditions_field} must be a list of condition-key strings"
+            continue
+        yield number, record, None
+
+
+def batched(items, size: int):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+##############################################################################
+# 2) SCORING
+##############################################################################
+def score_records(
+    records: list[dict], conditions_field: str = "conditions", apply_rules: bool = True
+) -> tuple[np.ndarray, list]:
+    """
+    Score a micro-batch of parsed records. Returns the (records x methods x 2)
+    worst categories -- escalated by the combination rules with
+    apply_rules -- and each record's unknown keys.
+    """
+    matrix = np.zeros((len(records), len(CONDITION_KEYS)), dtype=bool)
+    unknown = []
+    for i, record in enumerate(records):
+        keys = record.get(conditions_field, [])
+        matrix[i, [CONDITION_INDEX[k] for k in keys if k in CONDITION_INDEX]] = True
+        unknown.append([k for k in keys if k not in CONDITION_INDEX])
+
+    present = [name for name in ATTRIBUTES if any(name in record for record in records)]
+    if present:
+        columns = {
+            name: [_number(record.get(name)) for record in records] for name in present
+        }
+        matrix |= derive_selection_matrix(columns)
+    worst = evaluate_cohort(matrix)
+    if apply_rules:
+        worst, _ = current_rules().apply_cohort(selection_matrix_to_words(matrix), worst)
+    return worst, unknown
+
+
+def _number(value) -> float:
+    """Attribute value as a float; anything non-numeric counts as missing."""
+    if isinstance(value, (bool, int, float)):
+        return float(value)
+    return np.nan
+
+
+def _results_fragment(result: np.ndarray, fragments: dict) -> str:
+    """
+    The JSON text of results_json(result). Patients share a small number of
+    distinct results, so the encoded text is memoized on the result bytes.
+    """
+    key = result.tobytes()
+    fragment = fragments.get(key)
+    if fragment is None:
+        if len(fragments) >= _MAX_RESULT_FRAGMENTS:
+            fragments.clear()
+        fragment = fragments[key] = json.dumps(results_json(result))
+    return fragment
+
+
+def _read_batches(lines, out_queue: queue.Queue, batch_size: int, conditions_field: str):
+    try:
+        for batch in batched(parse_records(lines, conditions_field), batch_size):
+            out_queue.put(batch)
+    except Exception as exc:  # surface reader failures in the main thread
+        out_queue.put(exc)
+    finally:
+        out_queue.put(_END)
+
+
+def evaluate_stream(
+    lines,
+    out,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    conditions_field: str = "conditions",
+    apply_rules: bool = True,
+) -> StreamStats:
+    """
+    Read JSON lines from `lines`, write scored JSON lines to `out` in input
+    order, holding at most max_in_flight records between the two.
+    """
+    stats = StreamStats()
+    start = time.perf_counter()
+    # Besides the queued batches, one is being scored and one is being read.
+    pending = queue.Queue(maxsize=max(1, max_in_flight // batch_size - 2))
+    reader = threading.Thread(
+        target=_read_batches, args=(lines, pending, batch_size, conditions_field), daemon=True
+    )
+    reader.start()
+
+    fragments = {}
+    while True:
+        batch = pending.get()
+        if batch is _END:
+            break
+        if isinstance(batch, Exception):
+            raise batch
+
+        records = [record for _, record, error in batch if error is None]
+        worst, unknown = score_records(records, conditions_field, apply_rules)
+        scored = iter(zip(records, worst, unknown))
+        lines_out = []
+        for number, record, error in batch:
+            if error is not None:
+                lines_out.append(json.dumps({"line": number, "error": error}))
+                stats.errors += 1
+                continue
+            record, result, skipped = next(scored)
+            # Splice the pre-encoded results into the record's own JSON.
+            record.pop("results", None)
+            record["unknown"] = skipped
+            encoded = json.dumps(record)
+            lines_out.append(f'{encoded[:-1]}, "results": {_results_fragment(result, fragments)}}}')
+            stats.unknown_keys += len(skipped)
+        out.write("\n".join(lines_out) + "\n")
+        out.flush()
+        stats.records += len(records)
+        stats.batches += 1
+
+    reader.join()
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Score JSON lines of patient selections against UKMEC.")
+    parser.add_argument("input", nargs="?", help="JSONL file (default: stdin)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT)
+    parser.add_argument("--conditions-field", default="conditions")
+    parser.add_argument("--apply-rules", action=argparse.BooleanOptionalAction, default=True,
+                        help="escalate results with the combination rules (ukmec.rules), "
+                             "as the app does (default: on)")
+    args = parser.parse_args(argv)
+
+    source = open(args.input) if args.input else sys.stdin
+    try:
+        stats = evaluate_stream(
+            source, sys.stdout, args.batch_size, args.max_in_flight, args.conditions_field,
+            args.apply_rules,
+        )
+    except BrokenPipeError:
+        return 1
+    finally:
+        if args.input:
+            source.close()
+    print(
+        f"Scored {stats.records} records in {stats.batches} batches, "
+        f"{stats.seconds:.2f}s ({stats.records_per_second:,.0f} records/s); "
+        f"{stats.errors} bad lines, {stats.unknown_keys} unknown condition keys skipped.",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Build, export and inspect UKMEC table files (see ukmec.tablefile).
+
+A correction to a category is made by exporting the active table to CSV,
+editing it, and compiling it back; a running app or API picks up the new
+file through its watcher without a restart.
+
+Usage:
+    python -m ukmec.tablecli compile [--from-csv table.csv] [--label L] out.ukt
+    python -m ukmec.tablecli export table.ukt out.csv
+    python -m ukmec.tablecli info table.ukt
+    python -m ukmec.tablecli diff old.ukt new.ukt
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+import numpy as np
+
+from .core import CONDITION_KEYS, PHASES, compile_category_tensor, load_table
+from .data import METHODS, UKMEC_DATA
+from .tablefile import TableFile, TableFileError, read_table, write_table
+
+
+##############################################################################
+# 1) CSV EXPORT / IMPORT
+##############################################################################
+def export_csv(table: TableFile, out_path: str):
+    """Wide CSV: one row per condition, one column per method and phase."""
+    columns = [f"{m}_{s}" for m in table.methods for s in PHASES]
+    with open(out_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["condition", *columns])
+        for key, cells in zip(table.conditions, table.tensor.reshape(len(table.conditions), -1)):
+            writer.writerow([key, *("" if c == 0 else int(c) for c in cells)])
+
+
+def tensor_from_csv(path: str, conditions, methods) -> np.ndarray:
+    """Read an export_csv()-style file; blank cells are not applicable."""
+    index = {key: i for i, key in enumerate(conditions)}
+    tensor = np.zeros((len(conditions), len(methods), 2), dtype=np.int8)
+    seen = set()
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            key = row["condition"]
+            if key not in index:
+                raise TableFileError(f"{path}: unknown condition {key}")
+            seen.add(key)
+            for j, method in enumerate(methods):
+                for p, suffix in enumerate(PHASES):
+                    cell = (row.get(f"{method}_{suffix}") or "").strip()
+                    if cell not in ("", "1", "2", "3", "4"):
+                        raise TableFileError(f"{path}: {key} {method}_{suffix}: bad category {cell!r}")
+                    tensor[index[key], j, p] = int(cell) if cell else 0
+    missing = set(conditions) - seen
+    if missing:
+        raise TableFileError(f"{path}: missing conditions {sorted(missing)}")
+    return tensor
+
+
+##############################################################################
+# 2) CLI
+##############################################################################
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Build and inspect UKMEC table files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("compile", help="write a table file")
+    build.add_argument("output")
+    build.add_argument("--from-csv", help="category CSV (as written by export); default UKMEC_DATA")
+    build.add_argument("--label", default="2016 UKMEC final summary table")
+    export = commands.add_parser("export", help="write a table file as CSV")
+    export.add_argument("table")
+    export.add_argument("output")
+    info = commands.add_parser("info", help="print a table file's header")
+    info.add_argument("table")
+    diff = commands.add_parser("diff", help="list the cells that differ between two table files")
+    diff.add_argument("old")
+    diff.add_argument("new")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "compile":
+            if args.from_csv:
+                tensor = tensor_from_csv(args.from_csv, CONDITION_KEYS, METHODS)
+            else:
+                tensor = compile_category_tensor(UKMEC_DATA)
+            write_table(args.output, tensor, CONDITION_KEYS, METHODS, args.label)
+            read_table(args.output, CONDITION_KEYS, METHODS)
+        elif args.command == "export":
+            export_csv(read_table(args.table), args.output)
+        elif args.command == "diff":
+            from .editions import TableDiff
+
+            for cell in TableDiff(load_table(args.old), load_table(args.new)).cells():
+                print(f"{cell.condition}\t{cell.method}\t{cell.phase}\t{cell.old or 'NA'} -> {cell.new or 'NA'}")
+        else:
+            table = read_table(args.table)
+            print(json.dumps({
+                "label": table.label,
+                "created": table.created,
+                "conditions": len(table.conditions),
+                "methods": list(table.methods),
+                "bytes": os.path.getsize(args.table),
+            }, indent=2))
+    except (OSError, ValueError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""
+Versioned on-disk format for the UKMEC category table, and a file watcher.
+
+Layout (little-endian):
+
+    8 bytes   magic b"UKMECTAB"
+    uint32    format version (FORMAT_VERSION)
+    uint32    header length in bytes
+    header    UTF-8 JSON: label, created, methods, conditions, sha1 of data
+    padding   spaces, so the data starts on a DATA_ALIGN boundary
+    data      int8 (conditions x methods x I/C), C order; 0 = not applicable
+
+The data block is memory-mapped read-only, so every worker process that
+loads the same file shares one physical copy of it through the page cache.
+Files are always written to a temporary name and renamed into place, so a
+reader (or the watcher) never sees a half-written table. Never rewrite a
+table file in place: a process that has it mapped would see the change
+mid-evaluation. ``python -m ukmec.tablecli`` builds and inspects files.
+"""
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+MAGIC = b"UKMECTAB"
+FORMAT_VERSION = 1
+DATA_ALIGN = 64
+CATEGORY_RANGE = (0, 4)
+_PREAMBLE = struct.Struct("<8sII")
+
+logger = logging.getLogger(__name__)
+
+
+class TableFileError(ValueError):
+    """Raised when a table file is malformed or doesn't match the engine."""
+
+
+@dataclass(frozen=True)
+class TableFile:
+    tensor: np.ndarray
+    label: str
+    created: str
+    methods: tuple[str, ...]
+    conditions: tuple[str, ...]
+    path: str
+
+
+##############################################################################
+# 1) READ / WRITE
+##############################################################################
+def write_table(path: str, tensor: np.ndarray, conditions, methods, label: str):
+    """Atomically write `tensor` to path in the table file format."""
+    data = np.ascontiguousarray(tensor, dtype=np.int8)
+    if data.shape != (len(conditions), len(methods), 2):
+        raise TableFileError(f"Tensor shape {data.shape} doesn't match the keys and methods")
+    header = json.dumps({
+        "label": label,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "methods": list(methods),
+        "conditions": list(conditions),
+        "sha1": hashlib.sha1(data.tobytes()).hexdigest(),
+    }).encode()
+    header += b" " * (-(_PREAMBLE.size + len(header)) % DATA_ALIGN)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".ukmec-table-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+            f.write(header)
+            f.write(data.tobytes())
+        # mkstemp creates the file 0600; workers running as another user
+        # must still be able to map it.
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_table(path: str, conditions=None, methods=None) -> TableFile:
+    """
+    Memory-map a table file and validate it. If conditions/methods are
+    given, the file must list exactly those, in that order.
+    """
+    with open(path, "rb") as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            raise TableFileError(f"{path}: empty file")
+    if len(buffer) < _PREAMBLE.size:
+        raise TableFileError(f"{path}: truncated preamble")
+    magic, version, header_len = _PREAMBLE.unpack_from(buffer)
+    if magic != MAGIC:
+        raise TableFileError(f"{path}: not a UKMEC table file")
+    if version != FORMAT_VERSION:
+        raise TableFileError(f"{path}: unsupported format version {version}")
+    try:
+        header = json.loads(buffer[_PREAMBLE.size:_PREAMBLE.size + header_len])
+    except ValueError as exc:
+        raise TableFileError(f"{path}: bad header: {exc}")
+
+    file_methods = tuple(header.get("methods", ()))
+    file_conditions = tuple(header.get("conditions", ()))
+    if methods is not None and file_methods != tuple(methods):
+        raise TableFileError(f"{path}: methods {list(file_methods)} don't match the engine")
+    if conditions is not None and file_conditions != tuple(conditions):
+        raise TableFileError(
+            f"{path}: condition keys differ from the engine's; adding or reordering "
+            "conditions needs a code release"
+        )
+
+    shape = (len(file_conditions), len(file_methods), 2)
+    offset = _PREAMBLE.size + header_len
+    if len(buffer) != offset + int(np.prod(shape)):
+        raise TableFileError(f"{path}: data size doesn't match {shape}")
+    tensor = np.frombuffer(buffer, dtype=np.int8, offset=offset).reshape(shape)
+    if hashlib.sha1(tensor.tobytes()).hexdigest() != header.get("sha1"):
+        raise TableFileError(f"{path}: checksum mismatch")
+    low, high = CATEGORY_RANGE
+    if tensor.size and (tensor.min() < low or tensor.max() > high):
+        raise TableFileError(f"{path}: categories outside {low}..{high}")
+
+    return TableFile(
+        tensor=tensor,
+        label=str(header.get("label", "")),
+        created=str(header.get("created", "")),
+        methods=file_methods,
+        conditions=file_conditions,
+        path=os.path.abspath(path),
+    )
+
+
+##############################################################################
+# 2) WATCHER
+##############################################################################
+def file_stamp(path: str) -> tuple | None:
+    """(inode, mtime_ns, size) of path, or None if it doesn't exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class TableWatcher:
+    """
+    Polls a table file and calls reload(path) when it changes. An exception
+    from reload (e.g. a TableFileError for an invalid file) is logged and
+    kept in last_error; the previously loaded table stays in use.
+    """
+
+    def __init__(self, path: str, reload, interval: float = 2.0):
+        self.path = path
+        self.reload = reload
+        self.interval = interval
+        self.reloads = 0
+        self.last_error: str | None = None
+        self._stamp = file_stamp(path)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="ukmec-table-watcher", daemon=True)
+
+    def start(self) -> "TableWatcher":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def check(self) -> bool:
+        """Reload if the file changed since the last check; True if reloaded."""
+        stamp = file_stamp(self.path)
+        if stamp is None or stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        try:
+            self.reload(self.path)
+        except Exception as exc:
+            self.last_error = str(exc)
+            logger.warning("Not reloading UKMEC table %s: %s", self.path, exc)
+            return False
+        self.reloads += 1
+        self.last_error = None
+        logger.info("Reloaded UKMEC table %s", self.path)
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()